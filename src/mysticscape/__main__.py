@@ -4,10 +4,18 @@ Main entry point for Mystic Scape application
 
 import sys
 import logging
+from pathlib import Path
 from PyQt6.QtWidgets import QApplication
-from PyQt6.QtCore import QTimer
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from mysticscape.core.startup import StartupOrchestrator, StartupStage
 from mysticscape.ui.simple_splash import show_splash_screen
-from mysticscape.ui.main_window import MainWindow
+
+PROFILE_STARTUP_FLAG = "--profile-startup"
+
+class StartupBridge(QObject):
+    """Carries orchestrator callbacks from worker threads to the GUI thread"""
+    progress = pyqtSignal(int, str)
+    finished = pyqtSignal()
 
 def setup_logging():
     """Configure logging for the application"""
@@ -16,27 +24,88 @@ def setup_logging():
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
 
+def init_engine(results):
+    """Initialize the core engine"""
+    from mysticscape.core.engine import MysticEngine
+    engine = MysticEngine()
+    if not engine.initialize():
+        raise RuntimeError("MysticEngine failed to initialize")
+    return engine
+
+def init_pipeline(results):
+    """Construct the render pipeline (runs Pipeline.initialize_pipeline)"""
+    from mysticscape.core.pipeline import Pipeline
+    return Pipeline()
+
+def scan_plugins(results):
+    """Discover plugins on the pipeline's plugin paths"""
+    plugin_manager = results["pipeline"].plugin_manager
+    plugin_manager.scan_plugins()
+    return len(plugin_manager.manifests)
+
+def load_assets(results):
+    """Warm the compiled mesh cache for bundled mascot models"""
+    from mysticscape.ui.mascot.asset_cache import load_mascot_mesh
+    mascot_dir = Path(__file__).parent / "ui" / "resources" / "mascot"
+    return [load_mascot_mesh(path) for path in sorted(mascot_dir.glob("*.fbx"))]
+
+def create_main_window(results):
+    """Build the main window on the GUI thread"""
+    from mysticscape.ui.main_window import MainWindow
+    return MainWindow()
+
+def startup_stages():
+    """The real initialization work, in dependency order"""
+    return [
+        StartupStage("engine", init_engine, "Loading core engine...", weight=1),
+        StartupStage("pipeline", init_pipeline, "Initializing render pipeline...", weight=2),
+        StartupStage("plugins", scan_plugins, "Loading plugins...",
+                     depends_on=("pipeline",), weight=2),
+        StartupStage("assets", load_assets, "Loading assets...", weight=2),
+        StartupStage("main_window", create_main_window, "Preparing UI...",
+                     weight=3, main_thread=True),
+    ]
+
 def main():
     """Main application entry point"""
     setup_logging()
     logger = logging.getLogger(__name__)
 
+    profile_startup = PROFILE_STARTUP_FLAG in sys.argv
+    argv = [arg for arg in sys.argv if arg != PROFILE_STARTUP_FLAG]
+
     try:
-        app = QApplication(sys.argv)
-        
+        app = QApplication(argv)
+
         # Show splash screen
-        splash = show_splash_screen()
-        
-        # Create main window
-        window = MainWindow()
-        
-        # Show main window when ready
+        splash = show_splash_screen(simulate_progress=False)
+
+        bridge = StartupBridge()
+        bridge.progress.connect(splash.update_progress)
+        orchestrator = StartupOrchestrator(
+            startup_stages(),
+            on_progress=bridge.progress.emit,
+            on_finished=bridge.finished.emit,
+        )
+
+        # Show main window the moment every stage is done
         def show_main():
+            window = orchestrator.results.get("main_window")
+            if window is None:
+                logger.error("Main window failed to initialize")
+                QTimer.singleShot(0, lambda: app.exit(1))
+                return
             window.show()
             splash.finish(window)
-        
-        QTimer.singleShot(3000, show_main)
-        
+            if profile_startup:
+                print(orchestrator.report(), file=sys.stderr)
+
+        bridge.finished.connect(show_main)
+
+        # Background stages run while the GUI thread builds the main window
+        orchestrator.start()
+        orchestrator.run_main_thread_stages()
+
         return app.exec()
 
     except Exception as e:
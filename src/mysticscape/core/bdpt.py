@@ -0,0 +1,434 @@
+"""
+Progressive bidirectional path tracer with resumable checkpoints
+
+Every sample traces a camera subpath and a light subpath and joins each
+pair of their vertices with a shadow ray. Contributions are weighted
+uniformly over the strategies able to produce the same path, so the
+estimate stays unbiased with mirror vertices in the mix. The sky is only
+reached by camera subpaths.
+
+Rendering runs in passes over tiles in a process pool. Workers accumulate
+straight into a memory-mapped (height, width, 4) buffer of summed RGB plus a
+per-pixel sample count, so any pass can be previewed. Finished passes are
+periodically committed as a snapshot of that buffer, so a render killed
+mid-way resumes from the last commit without counting a partial pass.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+import numpy as np
+from mysticscape.core.bvh import BVH
+from mysticscape.core.path_tracer import (
+    EPSILON, Camera, RenderStats, Scene, SceneArrays, benchmark_scene,
+    cosine_sample_hemisphere, reflect, split_tiles,
+)
+
+ACCUMULATION_FILE = "accumulation.f64"  # Working buffer the workers write into
+SNAPSHOT_FILE = "snapshot-{}.f64"       # Committed accumulation after that many passes
+METADATA_FILE = "checkpoint.json"
+
+@dataclass
+class BidirectionalSettings:
+    samples_per_pass: int = 2
+    passes: int = 16
+    max_depth: int = 5         # Vertices per subpath
+    tile_size: int = 32
+    seed: int = 0
+    checkpoint_interval: float = 30.0  # Seconds between commits to disk
+
+class LightSampler:
+    """Samples points uniformly by area over emissive spheres and triangles"""
+
+    def __init__(self, scene: SceneArrays):
+        emits = scene.emission.max(axis=0) > 0.0
+        self.spheres = np.flatnonzero(emits[scene.material_ids])
+        sphere_areas = 4.0 * np.pi * scene.radii[self.spheres] ** 2
+
+        self.triangles = np.zeros((0, 3, 3))
+        self.triangle_materials = np.zeros(0, dtype=np.int64)
+        triangle_areas = np.zeros(0)
+        if scene.bvh is not None:
+            lit = np.flatnonzero(emits[scene.face_materials])
+            self.triangles = scene.bvh.vertices[scene.bvh.faces[lit]]
+            self.triangle_materials = scene.face_materials[lit]
+            triangle_areas = 0.5 * np.linalg.norm(np.cross(
+                self.triangles[:, 1] - self.triangles[:, 0],
+                self.triangles[:, 2] - self.triangles[:, 0]), axis=1)
+
+        areas = np.concatenate([sphere_areas, triangle_areas])
+        self.total_area = float(areas.sum())
+        self.cdf = np.cumsum(areas) / self.total_area if self.total_area > 0 else areas
+        self.scene = scene
+
+    def sample(self, count: int, rng: np.random.Generator
+               ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Points (3, N), outward normals (3, N) and emitted radiance (3, N)"""
+        scene = self.scene
+        choice = np.minimum(np.searchsorted(self.cdf, rng.random(count)), len(self.cdf) - 1)
+        points = np.zeros((3, count))
+        normals = np.zeros((3, count))
+        emission = np.zeros((3, count))
+
+        sphere = choice < len(self.spheres)
+        if sphere.any():
+            ids = self.spheres[choice[sphere]]
+            direction = rng.normal(size=(3, int(sphere.sum())))
+            direction /= np.linalg.norm(direction, axis=0)
+            normals[:, sphere] = direction
+            points[:, sphere] = scene.centers[:, ids] + direction * scene.radii[ids]
+            emission[:, sphere] = scene.emission[:, scene.material_ids[ids]]
+
+        triangle = ~sphere
+        if triangle.any():
+            ids = choice[triangle] - len(self.spheres)
+            tris = self.triangles[ids]
+            root = np.sqrt(rng.random(len(ids)))
+            v = rng.random(len(ids))
+            weights = np.stack([1.0 - root, root * (1.0 - v), root * v], axis=1)
+            points[:, triangle] = np.einsum("nk,nkc->cn", weights, tris)
+            normal = np.cross(tris[:, 1] - tris[:, 0], tris[:, 2] - tris[:, 0])
+            normal /= np.linalg.norm(normal, axis=1, keepdims=True)
+            # Triangles emit from both faces: pick one and double the radiance
+            side = np.where(rng.random(len(ids)) < 0.5, 1.0, -1.0)
+            normals[:, triangle] = (normal * side[:, None]).T
+            emission[:, triangle] = 2.0 * scene.emission[:, self.triangle_materials[ids]]
+
+        return points, normals, emission
+
+@dataclass
+class Subpath:
+    """Vertices of a batch of subpaths; vectors are (depth, 3, N), the rest (depth, N)"""
+    position: np.ndarray
+    normal: np.ndarray     # Faces the side the path arrived from
+    material: np.ndarray
+    beta: np.ndarray       # Throughput arriving at the vertex
+    diffuse: np.ndarray    # False where the path continued with a mirror bounce
+    valid: np.ndarray
+
+    @classmethod
+    def empty(cls, depth: int, count: int) -> 'Subpath':
+        return cls(np.zeros((depth, 3, count)), np.zeros((depth, 3, count)),
+                   np.zeros((depth, count), dtype=np.int64), np.zeros((depth, 3, count)),
+                   np.ones((depth, count), dtype=bool), np.zeros((depth, count), dtype=bool))
+
+def extend_subpath(scene: SceneArrays, path: Subpath, start: int, alive: np.ndarray,
+                   origins: np.ndarray, directions: np.ndarray, beta: np.ndarray,
+                   rng: np.random.Generator, sky: Optional[np.ndarray] = None):
+    """Random-walk from vertex `start`, recording each hit into path
+
+    When sky is given, the radiance of rays escaping the scene is added to it.
+    """
+    for depth in range(start, path.valid.shape[0]):
+        distance, normals, material = scene.intersect(origins, directions)
+        missed = ~np.isfinite(distance)
+        if sky is not None:
+            sky[:, alive[missed]] += beta[:, missed] * scene.sky(directions[:, missed])
+
+        hit = ~missed
+        alive, origins, directions = alive[hit], origins[:, hit], directions[:, hit]
+        beta, normals, material, distance = beta[:, hit], normals[:, hit], material[hit], distance[hit]
+        if not len(alive):
+            return
+
+        normals = np.where(np.sum(normals * directions, axis=0) < 0.0, normals, -normals)
+        origins = origins + directions * distance
+        path.position[depth][:, alive] = origins
+        path.normal[depth][:, alive] = normals
+        path.material[depth, alive] = material
+        path.beta[depth][:, alive] = beta
+        path.valid[depth, alive] = True
+
+        mirror = rng.random(len(alive)) < scene.specular[material]
+        path.diffuse[depth, alive] = ~mirror
+        origins = origins + normals * EPSILON
+        directions = np.where(mirror, reflect(directions, normals),
+                              cosine_sample_hemisphere(normals, rng))
+        beta = beta * scene.albedo[:, material]
+
+        if depth >= 3:
+            survive = np.clip(beta.max(axis=0), 0.05, 1.0)
+            keep = rng.random(len(alive)) < survive
+            beta = beta[:, keep] / survive[keep]
+            alive, origins, directions = alive[keep], origins[:, keep], directions[:, keep]
+
+def strategy_count(flags: np.ndarray, max_depth: int) -> np.ndarray:
+    """Number of strategies able to sample each path
+
+    flags is (vertices, N): whether each path vertex, in camera-to-light
+    order, is non-specular. Connections need both ends non-specular and
+    both halves within max_depth; hitting the light from the camera needs
+    the whole path within max_depth.
+    """
+    length = flags.shape[0]
+    count = np.full(flags.shape[1], 1.0 if length <= max_depth else 0.0)
+    for edge in range(1, length):
+        if edge <= max_depth and length - edge <= max_depth:
+            count += flags[edge - 1] & flags[edge]
+    return count
+
+def diffuse_bsdf(scene: SceneArrays, material: np.ndarray) -> np.ndarray:
+    return (1.0 - scene.specular[material]) * scene.albedo[:, material] / np.pi
+
+def bidirectional_radiance(scene: SceneArrays, lights: LightSampler, origins: np.ndarray,
+                           directions: np.ndarray, max_depth: int,
+                           rng: np.random.Generator) -> np.ndarray:
+    """(3, N) radiance estimates for a batch of camera rays"""
+    count = origins.shape[1]
+    radiance = np.zeros((3, count))
+    everyone = np.arange(count)
+
+    camera = Subpath.empty(max_depth, count)
+    extend_subpath(scene, camera, 0, everyone, origins, directions, np.ones((3, count)),
+                   rng, sky=radiance)
+
+    light = Subpath.empty(max_depth, count)
+    if lights.total_area > 0:
+        points, normals, emission = lights.sample(count, rng)
+        light.position[0], light.normal[0], light.valid[0] = points, normals, True
+        light.beta[0] = emission * lights.total_area
+        extend_subpath(scene, light, 1, everyone, points + normals * EPSILON,
+                       cosine_sample_hemisphere(normals, rng), light.beta[0] * np.pi, rng)
+
+    for i in range(max_depth):
+        # Camera subpath hits an emitter
+        idx = np.flatnonzero(camera.valid[i])
+        material = camera.material[i, idx]
+        emitted = scene.emission[:, material]
+        if emitted.any():
+            flags = np.vstack([camera.diffuse[:i, idx], np.ones((1, len(idx)), dtype=bool)])
+            radiance[:, idx] += camera.beta[i][:, idx] * emitted / strategy_count(flags, max_depth)
+
+        # Connect camera vertex i to every light vertex
+        for k in range(max_depth):
+            idx = np.flatnonzero(camera.valid[i] & light.valid[k])
+            if not len(idx):
+                continue
+            z, y = camera.position[i][:, idx], light.position[k][:, idx]
+            offset = y - z
+            dist = np.linalg.norm(offset, axis=0)
+            w = offset / np.maximum(dist, 1e-12)
+            cos_z = np.sum(camera.normal[i][:, idx] * w, axis=0)
+            cos_y = -np.sum(light.normal[k][:, idx] * w, axis=0)
+            facing = (cos_z > 0.0) & (cos_y > 0.0) & (dist > EPSILON)
+
+            idx, w, dist = idx[facing], w[:, facing], dist[facing]
+            if not len(idx):
+                continue
+            shadow_origin = camera.position[i][:, idx] + camera.normal[i][:, idx] * EPSILON
+            blocker, _, _ = scene.intersect(shadow_origin, w)
+            visible = blocker >= dist * (1.0 - 1e-3) - EPSILON
+            idx, geometry = idx[visible], (cos_z[facing] * cos_y[facing] / dist ** 2)[visible]
+            if not len(idx):
+                continue
+
+            contribution = (camera.beta[i][:, idx] * diffuse_bsdf(scene, camera.material[i, idx])
+                            * light.beta[k][:, idx] * geometry)
+            if k > 0:
+                contribution *= diffuse_bsdf(scene, light.material[k, idx])
+
+            ones = np.ones((1, len(idx)), dtype=bool)
+            flags = np.vstack([camera.diffuse[:i, idx], ones, ones,
+                               light.diffuse[k - 1::-1, idx] if k > 0 else ones[:0]])
+            radiance[:, idx] += contribution / strategy_count(flags, max_depth)
+
+    return radiance
+
+def scene_digest(scene: SceneArrays, camera: Camera, settings: BidirectionalSettings) -> str:
+    """Identifies everything that must match for a checkpoint to be resumed"""
+    digest = hashlib.sha256()
+    for item in fields(scene):
+        value = getattr(scene, item.name)
+        arrays = (value.vertices, value.faces) if isinstance(value, BVH) else (value,)
+        for array in arrays:
+            if array is not None:
+                digest.update(np.ascontiguousarray(array).tobytes())
+    digest.update(repr((asdict(camera), settings.samples_per_pass, settings.max_depth,
+                        settings.tile_size, settings.seed)).encode())
+    return digest.hexdigest()
+
+class Checkpoint:
+    """Memory-mapped accumulation buffer plus the last committed pass count
+
+    Workers add into the working buffer directly, so after a crash it can
+    hold part of a pass. Resumes therefore start from the snapshot named in
+    the metadata, which only ever covers whole passes.
+    """
+
+    def __init__(self, directory: Path, height: int, width: int, key: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.key = key
+        self.path = self.directory / ACCUMULATION_FILE
+        self.metadata_path = self.directory / METADATA_FILE
+        self.shape = (height, width, 4)
+        self.buffer = np.memmap(self.path, dtype=np.float64, mode="w+", shape=self.shape)
+        self.next_pass, self.snapshot = 0, None
+        resume = self.read_snapshot()
+        if resume is not None:
+            self.next_pass, self.snapshot = resume
+            self.buffer[:] = np.fromfile(self.snapshot, dtype=np.float64).reshape(self.shape)
+
+    def read_snapshot(self) -> Optional[Tuple[int, Path]]:
+        """Committed pass count and snapshot to resume from, if one matches"""
+        expected_size = int(np.prod(self.shape)) * np.dtype(np.float64).itemsize
+        try:
+            with open(self.metadata_path, "r", encoding="utf-8") as f:
+                metadata = json.load(f)
+            next_pass = int(metadata["next_pass"])
+            snapshot = self.directory / SNAPSHOT_FILE.format(next_pass)
+            if metadata.get("key") != self.key or snapshot.stat().st_size != expected_size:
+                return None
+            return next_pass, snapshot
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def commit(self, next_pass: int):
+        """Persist every finished pass: snapshot the buffer, then point the metadata at it
+
+        Call only between passes. The previous snapshot is deleted after the
+        metadata moves on, so a crash at any point leaves a consistent pair.
+        """
+        if next_pass == self.next_pass and self.snapshot is not None:
+            return
+        self.buffer.flush()
+        snapshot = self.directory / SNAPSHOT_FILE.format(next_pass)
+        tmp_path = snapshot.with_suffix(".tmp")
+        self.buffer.tofile(tmp_path)
+        os.replace(tmp_path, snapshot)
+
+        tmp_path = self.metadata_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"key": self.key, "next_pass": next_pass}, f)
+        os.replace(tmp_path, self.metadata_path)
+
+        if self.snapshot is not None and self.snapshot != snapshot:
+            self.snapshot.unlink(missing_ok=True)
+        self.snapshot = snapshot
+        self.next_pass = next_pass
+
+    def flush(self):
+        self.buffer.flush()
+
+    def image(self) -> np.ndarray:
+        """Current estimate: summed radiance over samples taken, per pixel"""
+        return (self.buffer[..., :3] / np.maximum(self.buffer[..., 3:], 1.0)).astype(np.float32)
+
+    def close(self):
+        self.flush()
+        del self.buffer
+
+# Per-process worker state, set once by the pool initializer
+_worker = {}
+
+def _init_worker(scene: SceneArrays, camera: Camera, settings: BidirectionalSettings,
+                 accumulation_path: str):
+    _worker["scene"] = scene
+    _worker["lights"] = LightSampler(scene)
+    _worker["camera"] = camera
+    _worker["settings"] = settings
+    _worker["accumulation"] = np.memmap(accumulation_path, dtype=np.float64, mode="r+",
+                                        shape=(camera.height, camera.width, 4))
+
+def _render_tile(pass_index: int, tile_index: int, tile: Tuple[int, int, int, int]) -> int:
+    scene, camera, settings = _worker["scene"], _worker["camera"], _worker["settings"]
+    x, y, width, height = tile
+    rng = np.random.default_rng((settings.seed, pass_index, tile_index))
+    spp = settings.samples_per_pass
+
+    origins, directions, pixel = camera.generate_rays(x, y, width, height, spp, rng)
+    radiance = bidirectional_radiance(scene, _worker["lights"], origins, directions,
+                                      settings.max_depth, rng)
+
+    accum = np.zeros((3, width * height))
+    for channel in range(3):
+        accum[channel] = np.bincount(pixel, weights=radiance[channel], minlength=width * height)
+    # Tiles never overlap, so workers can add into the shared mapping directly
+    region = _worker["accumulation"][y:y + height, x:x + width]
+    region[..., :3] += accum.T.reshape(height, width, 3)
+    region[..., 3] += spp
+    return len(pixel)
+
+class BiPathTracer:
+    """Bidirectional path tracer rendering progressive passes across a process pool"""
+
+    def __init__(self, settings: Optional[BidirectionalSettings] = None,
+                 workers: Optional[int] = None):
+        self.logger = logging.getLogger(__name__)
+        self.settings = settings or BidirectionalSettings()
+        self.workers = workers or os.cpu_count() or 1
+        self.last_stats: Optional[RenderStats] = None
+
+    def render(self, scene: Scene, camera: Camera, checkpoint_dir: Optional[Path] = None,
+               on_pass: Optional[Callable[[np.ndarray, int], None]] = None) -> np.ndarray:
+        """Render a linear float32 (height, width, 3) image
+
+        With checkpoint_dir, a matching earlier render in that directory is
+        resumed rather than restarted. on_pass receives the current image
+        and the number of passes finished.
+        """
+        if checkpoint_dir is None:
+            with tempfile.TemporaryDirectory(prefix="mysticscape-bdpt-") as scratch:
+                return self.render(scene, camera, Path(scratch), on_pass)
+
+        arrays = scene.arrays()
+        checkpoint = Checkpoint(checkpoint_dir, camera.height, camera.width,
+                                scene_digest(arrays, camera, self.settings))
+        if checkpoint.next_pass:
+            self.logger.info(f"Resuming render from pass {checkpoint.next_pass}")
+
+        tiles = split_tiles(camera.width, camera.height, self.settings.tile_size)
+        paths = 0
+        start = last_commit = time.perf_counter()
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                     initargs=(arrays, camera, self.settings,
+                                               str(checkpoint.path))) as pool:
+                for pass_index in range(checkpoint.next_pass, self.settings.passes):
+                    paths += sum(pool.map(_render_tile, [pass_index] * len(tiles),
+                                          range(len(tiles)), tiles))
+
+                    if time.perf_counter() - last_commit >= self.settings.checkpoint_interval:
+                        checkpoint.commit(pass_index + 1)
+                        last_commit = time.perf_counter()
+                    if on_pass:
+                        on_pass(checkpoint.image(), pass_index + 1)
+            checkpoint.commit(self.settings.passes)
+
+            self.last_stats = RenderStats(paths, time.perf_counter() - start, self.workers)
+            self.logger.info(f"Rendered {paths:,} paths in {self.last_stats.seconds:.2f}s, "
+                             f"{self.last_stats.samples_per_second_per_core:,.0f} paths/s/core")
+            return checkpoint.image()
+        finally:
+            checkpoint.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bidirectional path tracer benchmark")
+    parser.add_argument("--width", type=int, default=320)
+    parser.add_argument("--height", type=int, default=180)
+    parser.add_argument("--spp", type=int, default=2, help="samples per pixel per pass")
+    parser.add_argument("--passes", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--checkpoint-dir", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    tracer = BiPathTracer(BidirectionalSettings(samples_per_pass=args.spp, passes=args.passes),
+                          args.workers)
+    tracer.render(benchmark_scene(), Camera(width=args.width, height=args.height),
+                  args.checkpoint_dir,
+                  on_pass=lambda image, done: print(f"pass {done}/{args.passes}"))
+    stats = tracer.last_stats
+    print(f"{stats.samples:,} paths in {stats.seconds:.2f}s on {stats.workers} workers")
+    print(f"{stats.samples_per_second:,.0f} paths/s, "
+          f"{stats.samples_per_second_per_core:,.0f} paths/s/core")
+
+if __name__ == "__main__":
+    main()
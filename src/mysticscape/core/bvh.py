@@ -0,0 +1,304 @@
+"""
+Bounding volume hierarchy for ray/triangle queries
+
+The tree is built with a full-sweep surface area heuristic and flattened
+into contiguous NumPy arrays. Interior nodes store the index of their left
+child (the right child always follows it); leaves store a run of the
+reordered primitive list. Traversal processes a whole ray packet per step,
+carrying (ray, node) pairs breadth-first. Rays are (3, N) arrays, matching
+the structure-of-arrays layout used by the path tracer.
+"""
+
+import hashlib
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Tuple
+import numpy as np
+
+LEAF_SIZE = 4
+TRAVERSAL_COST = 1.0
+INTERSECT_COST = 1.0
+EPSILON = 1e-7
+FORMAT_VERSION = 1
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class RayHits:
+    distance: np.ndarray   # (N,) inf where the ray missed
+    primitive: np.ndarray  # (N,) face index, -1 where the ray missed
+    u: np.ndarray          # Barycentric coordinates of the hit
+    v: np.ndarray
+
+    @property
+    def hit(self) -> np.ndarray:
+        return self.primitive >= 0
+
+def surface_area(lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    extent = np.maximum(hi - lo, 0.0)
+    return 2.0 * (extent[..., 0] * extent[..., 1] + extent[..., 1] * extent[..., 2]
+                  + extent[..., 2] * extent[..., 0])
+
+def intersect_triangles(origins: np.ndarray, directions: np.ndarray, v0: np.ndarray,
+                        e1: np.ndarray, e2: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Moller-Trumbore over paired (3, K) rays and triangles; t is inf on a miss"""
+    p = np.cross(directions, e2, axis=0)
+    det = np.sum(e1 * p, axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        inv_det = 1.0 / det
+        s = origins - v0
+        u = np.sum(s * p, axis=0) * inv_det
+        q = np.cross(s, e1, axis=0)
+        v = np.sum(directions * q, axis=0) * inv_det
+        t = np.sum(e2 * q, axis=0) * inv_det
+        # Parallel rays leave u and v inf or nan, so u + v is computed under errstate too
+        valid = (np.abs(det) > EPSILON) & (u >= 0.0) & (v >= 0.0) & (u + v <= 1.0) & (t > 1e-4)
+    return np.where(valid, t, np.inf), u, v
+
+def geometry_digest(array: np.ndarray) -> str:
+    return hashlib.sha256(np.ascontiguousarray(array).tobytes()).hexdigest()
+
+class BVH:
+    """Flattened SAH bounding volume hierarchy over a triangle mesh"""
+
+    def __init__(self, vertices: np.ndarray, faces: np.ndarray, primitives: np.ndarray,
+                 bounds_min: np.ndarray, bounds_max: np.ndarray, first: np.ndarray,
+                 count: np.ndarray, depth: np.ndarray):
+        self.faces = faces
+        self.primitives = primitives  # Face index for each position in leaf order
+        self.bounds_min = bounds_min  # (nodes, 3)
+        self.bounds_max = bounds_max
+        self.first = first            # Left child for interior nodes, first primitive for leaves
+        self.count = count            # Primitive count; 0 marks an interior node
+        self.depth = depth
+        self.set_vertices(vertices)
+
+    @classmethod
+    def build(cls, vertices, faces, leaf_size: int = LEAF_SIZE) -> 'BVH':
+        vertices = np.asarray(vertices, dtype=np.float64)
+        faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+        triangles = vertices[faces]
+        tri_min, tri_max = triangles.min(axis=1), triangles.max(axis=1)
+        centroids = (tri_min + tri_max) * 0.5
+
+        capacity = max(2 * len(faces) - 1, 1)
+        bounds_min = np.zeros((capacity, 3))
+        bounds_max = np.zeros((capacity, 3))
+        first = np.zeros(capacity, dtype=np.int64)
+        count = np.zeros(capacity, dtype=np.int64)
+        depth = np.zeros(capacity, dtype=np.int64)
+        primitives = np.arange(len(faces), dtype=np.int64)
+
+        node_count = 1
+        stack = [(0, 0, len(faces), 0)]
+        while stack:
+            node, start, end, level = stack.pop()
+            items = primitives[start:end]
+            if len(items):
+                bounds_min[node] = tri_min[items].min(axis=0)
+                bounds_max[node] = tri_max[items].max(axis=0)
+            depth[node] = level
+
+            split = None
+            if len(items) > leaf_size:
+                split = cls.sah_split(items, tri_min, tri_max, centroids,
+                                      bounds_min[node], bounds_max[node])
+            if split is None:
+                first[node], count[node] = start, len(items)
+                continue
+
+            order, mid = split
+            primitives[start:end] = items[order]
+            left = node_count
+            node_count += 2
+            first[node] = left
+            stack.append((left, start, start + mid, level + 1))
+            stack.append((left + 1, start + mid, end, level + 1))
+
+        return cls(vertices, faces, primitives, bounds_min[:node_count].copy(),
+                   bounds_max[:node_count].copy(), first[:node_count].copy(),
+                   count[:node_count].copy(), depth[:node_count].copy())
+
+    @staticmethod
+    def sah_split(items: np.ndarray, tri_min: np.ndarray, tri_max: np.ndarray,
+                  centroids: np.ndarray, lo: np.ndarray, hi: np.ndarray
+                  ) -> Optional[Tuple[np.ndarray, int]]:
+        """Cheapest split as (ordering of items, left count), or None if a leaf is cheaper"""
+        n = len(items)
+        parent_area = max(float(surface_area(lo, hi)), 1e-12)
+        left_counts = np.arange(1, n)
+        best_cost, best = np.inf, None
+
+        for axis in range(3):
+            order = np.argsort(centroids[items, axis], kind="stable")
+            sorted_min, sorted_max = tri_min[items[order]], tri_max[items[order]]
+            left_area = surface_area(np.minimum.accumulate(sorted_min),
+                                     np.maximum.accumulate(sorted_max))[:-1]
+            right_area = surface_area(np.minimum.accumulate(sorted_min[::-1])[::-1],
+                                      np.maximum.accumulate(sorted_max[::-1])[::-1])[1:]
+            cost = TRAVERSAL_COST + INTERSECT_COST * (
+                left_area * left_counts + right_area * (n - left_counts)) / parent_area
+            index = int(np.argmin(cost))
+            if cost[index] < best_cost:
+                best_cost, best = cost[index], (order, index + 1)
+
+        if best_cost >= INTERSECT_COST * n:
+            return None
+        return best
+
+    @property
+    def node_count(self) -> int:
+        return len(self.first)
+
+    def set_vertices(self, vertices: np.ndarray):
+        """Cache per-triangle edge data in leaf order for intersection"""
+        self.vertices = np.asarray(vertices, dtype=np.float64)
+        triangles = self.vertices[self.faces[self.primitives]]
+        self.v0 = triangles[:, 0].T.copy()
+        self.e1 = (triangles[:, 1] - triangles[:, 0]).T.copy()
+        self.e2 = (triangles[:, 2] - triangles[:, 0]).T.copy()
+
+    def refit(self, vertices):
+        """Update bounds for moved vertices without changing the tree topology
+
+        Cheaper than a rebuild for animated meshes, though tree quality
+        degrades if the mesh deforms far from its build pose.
+        """
+        self.set_vertices(vertices)
+        triangles = self.vertices[self.faces[self.primitives]]
+        tri_min, tri_max = triangles.min(axis=1), triangles.max(axis=1)
+
+        leaves = np.flatnonzero(self.count > 0)
+        leaves = leaves[np.argsort(self.first[leaves])]
+        if len(tri_min):
+            self.bounds_min[leaves] = np.minimum.reduceat(tri_min, self.first[leaves])
+            self.bounds_max[leaves] = np.maximum.reduceat(tri_max, self.first[leaves])
+
+        # Children are deeper than their parents, so sweep levels bottom-up
+        for level in range(int(self.depth.max()), -1, -1):
+            interior = np.flatnonzero((self.depth == level) & (self.count == 0))
+            if not len(interior):
+                continue
+            left = self.first[interior]
+            self.bounds_min[interior] = np.minimum(self.bounds_min[left], self.bounds_min[left + 1])
+            self.bounds_max[interior] = np.maximum(self.bounds_max[left], self.bounds_max[left + 1])
+
+    def intersect(self, origins: np.ndarray, directions: np.ndarray,
+                  t_max: Optional[np.ndarray] = None) -> RayHits:
+        """Closest triangle hit for each of the (3, N) rays, nearer than t_max"""
+        n = origins.shape[1]
+        best = np.full(n, np.inf) if t_max is None else np.array(np.broadcast_to(t_max, n), dtype=np.float64)
+        primitive = np.full(n, -1, dtype=np.int64)
+        hit_u = np.zeros(n)
+        hit_v = np.zeros(n)
+        if not len(self.faces):
+            return RayHits(np.full(n, np.inf), primitive, hit_u, hit_v)
+
+        with np.errstate(divide="ignore"):
+            inv_dir = 1.0 / directions
+        rays = np.arange(n)
+        nodes = np.zeros(n, dtype=np.int64)
+
+        while len(rays):
+            near, far = self.slab_test(origins[:, rays], inv_dir[:, rays], nodes)
+            keep = (near <= far) & (far >= 0.0) & (near < best[rays])
+            rays, nodes = rays[keep], nodes[keep]
+
+            leaf = self.count[nodes] > 0
+            if leaf.any():
+                self.intersect_leaves(origins, directions, rays[leaf], nodes[leaf],
+                                      best, primitive, hit_u, hit_v)
+
+            inner = ~leaf
+            rays = np.repeat(rays[inner], 2)
+            nodes = (self.first[nodes[inner]][:, None] + np.array([0, 1])).ravel()
+
+        distance = np.where(primitive >= 0, best, np.inf)
+        return RayHits(distance, primitive, hit_u, hit_v)
+
+    def occluded(self, origins: np.ndarray, directions: np.ndarray,
+                 t_max: np.ndarray) -> np.ndarray:
+        """True for rays that hit a triangle before t_max"""
+        return self.intersect(origins, directions, t_max).hit
+
+    def slab_test(self, origins: np.ndarray, inv_dir: np.ndarray,
+                  nodes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        t0 = (self.bounds_min[nodes].T - origins) * inv_dir
+        t1 = (self.bounds_max[nodes].T - origins) * inv_dir
+        # fmin/fmax skip the NaNs produced by 0 * inf on axis-parallel rays
+        near = np.fmax.reduce(np.fmin(t0, t1), axis=0)
+        far = np.fmin.reduce(np.fmax(t0, t1), axis=0)
+        return near, far
+
+    def intersect_leaves(self, origins: np.ndarray, directions: np.ndarray, rays: np.ndarray,
+                         nodes: np.ndarray, best: np.ndarray, primitive: np.ndarray,
+                         hit_u: np.ndarray, hit_v: np.ndarray):
+        # Expand each (ray, leaf) pair into one (ray, triangle) pair per primitive
+        counts = self.count[nodes]
+        offsets = np.cumsum(counts) - counts
+        pair_rays = np.repeat(rays, counts)
+        slots = np.repeat(self.first[nodes] - offsets, counts) + np.arange(counts.sum())
+
+        t, u, v = intersect_triangles(origins[:, pair_rays], directions[:, pair_rays],
+                                      self.v0[:, slots], self.e1[:, slots], self.e2[:, slots])
+        closer = t < best[pair_rays]
+        pair_rays, slots, t, u, v = pair_rays[closer], slots[closer], t[closer], u[closer], v[closer]
+        if not len(t):
+            return
+
+        np.minimum.at(best, pair_rays, t)
+        won = t == best[pair_rays]
+        primitive[pair_rays[won]] = self.primitives[slots[won]]
+        hit_u[pair_rays[won]] = u[won]
+        hit_v[pair_rays[won]] = v[won]
+
+    def save(self, path: Path):
+        """Write the tree so later loads of the same mesh skip the build"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(f, version=FORMAT_VERSION, faces_digest=geometry_digest(self.faces),
+                     vertices_digest=geometry_digest(self.vertices), primitives=self.primitives,
+                     bounds_min=self.bounds_min, bounds_max=self.bounds_max,
+                     first=self.first, count=self.count, depth=self.depth)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path, vertices, faces) -> Optional['BVH']:
+        """Load a saved tree for this mesh, or None if it is missing or for other topology
+
+        A tree saved for the same faces but different vertex positions is
+        refitted rather than rejected.
+        """
+        vertices = np.asarray(vertices, dtype=np.float64)
+        faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+        try:
+            with np.load(path) as data:
+                if int(data["version"]) != FORMAT_VERSION or \
+                        str(data["faces_digest"]) != geometry_digest(faces):
+                    return None
+                bvh = cls(vertices, faces, data["primitives"], data["bounds_min"],
+                          data["bounds_max"], data["first"], data["count"], data["depth"])
+                moved = str(data["vertices_digest"]) != geometry_digest(vertices)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable BVH cache {path}: {str(e)}")
+            return None
+
+        if moved:
+            bvh.refit(vertices)
+        return bvh
+
+    @classmethod
+    def load_or_build(cls, path: Path, vertices, faces) -> 'BVH':
+        if (bvh := cls.load(path, vertices, faces)) is not None:
+            return bvh
+        bvh = cls.build(vertices, faces)
+        try:
+            bvh.save(path)
+        except OSError as e:
+            logger.warning(f"Could not write BVH cache {path}: {str(e)}")
+        return bvh
@@ -0,0 +1,85 @@
+"""
+Import-time benchmark for Mystic Scape modules
+
+Usage: python -m mysticscape.core.import_profile [--top N] [module ...]
+
+Each module is imported in a fresh interpreter under ``python -X importtime``
+and the slowest imports are reported, so regressions in time-to-first-window
+can be tracked.
+"""
+
+import argparse
+import subprocess
+import sys
+from dataclasses import dataclass
+from typing import List
+
+DEFAULT_MODULES = [
+    "mysticscape.ui.simple_splash",
+    "mysticscape.ui.main_window",
+    "mysticscape.core.pipeline",
+    "mysticscape.__main__",
+]
+
+@dataclass
+class ImportRecord:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+def parse_importtime(output: str) -> List[ImportRecord]:
+    """Parse the stderr of ``python -X importtime``"""
+    records = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            stripped = name.lstrip()
+            records.append(ImportRecord(stripped.strip(), int(self_us), int(cumulative_us),
+                                        (len(name) - len(stripped) - 1) // 2))
+        except ValueError:
+            continue
+    return records
+
+def profile_import(module: str) -> List[ImportRecord]:
+    """Import module in a fresh interpreter and return its import timings"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "unknown error"
+        raise RuntimeError(f"Importing {module} failed: {error}")
+    return parse_importtime(result.stderr)
+
+def format_report(module: str, records: List[ImportRecord], top: int) -> str:
+    """Slowest imports by cumulative time, plus the total for the module"""
+    total = next((r.cumulative_us for r in records if r.module == module and r.depth == 0),
+                 sum(r.self_us for r in records))
+    lines = [f"{module}: {total / 1000:.1f} ms total, {len(records)} modules imported",
+             f"  {'cumulative ms':>13}  {'self ms':>8}  module"]
+    for record in sorted(records, key=lambda r: r.cumulative_us, reverse=True)[:top]:
+        lines.append(f"  {record.cumulative_us / 1000:>13.1f}  {record.self_us / 1000:>8.1f}  "
+                     f"{'  ' * record.depth}{record.module}")
+    return "\n".join(lines)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Report import times for Mystic Scape modules")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--top", type=int, default=15, help="number of imports to list")
+    args = parser.parse_args(argv)
+
+    status = 0
+    for module in args.modules:
+        try:
+            print(format_report(module, profile_import(module), args.top))
+        except RuntimeError as e:
+            print(str(e))
+            status = 1
+        print()
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""
+Deferred module loading for heavy optional dependencies
+"""
+
+import importlib
+import importlib.util
+import sys
+import threading
+from types import ModuleType
+
+class MissingModule(ModuleType):
+    """Stand-in for a module that is not installed
+
+    Importing it succeeds so the package still loads; the ImportError is
+    raised on first attribute access, where callers already handle failures.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+
+    def __getattr__(self, attr):
+        raise ModuleNotFoundError(f"No module named '{self.__name__}'", name=self.__name__)
+
+class LazyModule(ModuleType):
+    """Stand-in that imports the real module on first attribute access
+
+    The import runs under a lock, so threads that touch the module at the
+    same time all wait for one complete import instead of seeing a module
+    that is still executing.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._lock = threading.Lock()
+        self._module = None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def _load(self) -> ModuleType:
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self.__name__)
+        return self._module
+
+def lazy_import(name: str) -> ModuleType:
+    """Return a module whose body only executes on first attribute access"""
+    if name in sys.modules:
+        return sys.modules[name]
+
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        spec = None
+    if spec is None or spec.loader is None:
+        return MissingModule(name)
+    return LazyModule(name)
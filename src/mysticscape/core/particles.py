@@ -0,0 +1,182 @@
+"""
+Vectorized particle simulation
+
+Particles live in fixed-capacity structure-of-arrays float32 buffers; the
+first `count` slots are alive. Each step emits into the free tail,
+integrates forces over the live range (optionally in chunks across a
+thread pool, since NumPy releases the GIL on large arrays) and compacts
+dead particles in place by moving survivors from the tail into the holes.
+"""
+
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, fields
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+
+CHUNK_SIZE = 1 << 18
+
+@dataclass
+class ParticleSettings:
+    capacity: int = 100_000
+    emission_rate: float = 10_000.0  # Particles per second
+    lifetime: Tuple[float, float] = (1.0, 3.0)
+    emitter_position: Tuple[float, float, float] = (0.0, 0.0, 0.0)
+    emitter_radius: float = 0.1
+    direction: Tuple[float, float, float] = (0.0, 1.0, 0.0)
+    speed: Tuple[float, float] = (1.0, 3.0)
+    spread: float = 0.3              # Random velocity added per axis, relative to speed
+    gravity: Tuple[float, float, float] = (0.0, -9.81, 0.0)
+    wind: Tuple[float, float, float] = (0.0, 0.0, 0.0)
+    drag: float = 0.1                # Fraction of velocity relative to the wind lost per second
+    seed: Optional[int] = None
+
+    @classmethod
+    def from_params(cls, params: Dict[str, Any]) -> 'ParticleSettings':
+        """Settings from a params dict; unknown keys are ignored"""
+        names = {f.name for f in fields(cls)}
+        return cls(**{key: value for key, value in params.items() if key in names})
+
+class ParticleSystem:
+    def __init__(self, settings: Optional[ParticleSettings] = None, workers: int = 1,
+                 chunk_size: int = CHUNK_SIZE):
+        self.logger = logging.getLogger(__name__)
+        self.settings = settings or ParticleSettings()
+        self.workers = max(1, workers)
+        self.chunk_size = chunk_size
+        self.rng = np.random.default_rng(self.settings.seed)
+        self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix="particles") \
+            if self.workers > 1 else None
+
+        capacity = self.settings.capacity
+        self.position = np.zeros((3, capacity), dtype=np.float32)
+        self.velocity = np.zeros((3, capacity), dtype=np.float32)
+        self.age = np.zeros(capacity, dtype=np.float32)
+        self.lifetime = np.zeros(capacity, dtype=np.float32)
+        self.count = 0
+        self.emission_debt = 0.0  # Fractional particles carried between steps
+        self.time = 0.0
+
+    @property
+    def capacity(self) -> int:
+        return len(self.age)
+
+    @property
+    def live_positions(self) -> np.ndarray:
+        """(3, count) view of live particle positions"""
+        return self.position[:, :self.count]
+
+    def buffers(self):
+        return self.position, self.velocity, self.age, self.lifetime
+
+    def step(self, dt: float):
+        self.emission_debt += self.settings.emission_rate * dt
+        emit_count = int(self.emission_debt)
+        self.emission_debt -= emit_count
+        self.emit(emit_count)
+
+        ranges = [(start, min(start + self.chunk_size, self.count))
+                  for start in range(0, self.count, self.chunk_size)]
+        if self.executor and len(ranges) > 1:
+            list(self.executor.map(lambda r: self.integrate(r[0], r[1], dt), ranges))
+        else:
+            for start, stop in ranges:
+                self.integrate(start, stop, dt)
+
+        self.compact()
+        self.time += dt
+
+    def emit(self, count: int):
+        """Spawn particles into the free tail of the buffers"""
+        count = min(count, self.capacity - self.count)
+        if count <= 0:
+            return
+        s, rng = self.settings, self.rng
+        new = slice(self.count, self.count + count)
+
+        offset = rng.standard_normal((3, count), dtype=np.float32)
+        offset *= s.emitter_radius / np.maximum(np.linalg.norm(offset, axis=0), 1e-6)
+        offset *= rng.random(count, dtype=np.float32) ** (1.0 / 3.0)
+        self.position[:, new] = np.asarray(s.emitter_position, dtype=np.float32)[:, None] + offset
+
+        speed = rng.uniform(*s.speed, size=count).astype(np.float32)
+        direction = np.asarray(s.direction, dtype=np.float32)[:, None] \
+            + rng.uniform(-s.spread, s.spread, size=(3, count)).astype(np.float32)
+        self.velocity[:, new] = direction * speed
+
+        self.age[new] = 0.0
+        self.lifetime[new] = rng.uniform(*s.lifetime, size=count)
+        self.count += count
+
+    def integrate(self, start: int, stop: int, dt: float):
+        """Apply forces and advance one chunk in place (semi-implicit Euler)"""
+        s = self.settings
+        position = self.position[:, start:stop]
+        velocity = self.velocity[:, start:stop]
+
+        # Drag pulls velocity towards the wind velocity
+        wind = np.asarray(s.wind, dtype=np.float32)[:, None]
+        retain = np.float32(np.exp(-s.drag * dt))
+        velocity -= wind
+        velocity *= retain
+        velocity += wind + np.asarray(s.gravity, dtype=np.float32)[:, None] * np.float32(dt)
+
+        scratch = np.multiply(velocity, np.float32(dt))
+        position += scratch
+        self.age[start:stop] += np.float32(dt)
+
+    def compact(self):
+        """Drop dead particles by filling their slots with survivors from the tail"""
+        live = self.count
+        dead = np.flatnonzero(self.age[:live] >= self.lifetime[:live])
+        if not len(dead):
+            return
+        survivors = live - len(dead)
+        holes = dead[dead < survivors]
+        tail = np.arange(survivors, live)
+        movers = tail[self.age[survivors:live] < self.lifetime[survivors:live]]
+        for buffer in self.buffers():
+            buffer[..., holes] = buffer[..., movers]
+        self.count = survivors
+
+    def clear(self):
+        self.count = 0
+        self.emission_debt = 0.0
+
+    def shutdown(self):
+        if self.executor:
+            self.executor.shutdown()
+            self.executor = None
+
+def run_benchmark(particles: int = 1_000_000, steps: int = 50, workers: int = 1,
+                  dt: float = 1.0 / 60.0) -> Tuple[float, int]:
+    """Seconds per step with the buffers held full, and the particle count"""
+    settings = ParticleSettings(capacity=particles, emission_rate=particles / 2.0 / dt,
+                                lifetime=(0.25, 2.0), seed=0)
+    system = ParticleSystem(settings, workers=workers)
+    system.emit(particles)
+    start = time.perf_counter()
+    for _ in range(steps):
+        system.step(dt)
+    elapsed = (time.perf_counter() - start) / steps
+    count = system.count
+    system.shutdown()
+    return elapsed, count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Particle system benchmark")
+    parser.add_argument("--particles", type=int, default=1_000_000)
+    parser.add_argument("--steps", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    for workers in sorted({1, args.workers}):
+        seconds, count = run_benchmark(args.particles, args.steps, workers)
+        print(f"{workers} worker(s): {seconds * 1000:.2f} ms/step, "
+              f"{count / seconds / 1e6:.1f}M particle updates/s ({count:,} live)")
+
+if __name__ == "__main__":
+    main()
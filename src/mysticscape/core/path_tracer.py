@@ -0,0 +1,374 @@
+"""
+Multi-core unidirectional path tracer for CPU render nodes
+
+Frames are split into tiles that are rendered in a process pool. Within a
+tile every ray is traced at once as NumPy structure-of-arrays batches
+(each attribute is a (3, N) or (N,) array), and finished tiles are written
+straight into a shared-memory frame buffer.
+"""
+
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+import numpy as np
+from mysticscape.core.bvh import BVH
+
+EPSILON = 1e-4
+
+@dataclass
+class Material:
+    albedo: Tuple[float, float, float] = (0.8, 0.8, 0.8)
+    emission: Tuple[float, float, float] = (0.0, 0.0, 0.0)
+    specular: float = 0.0  # Probability of a mirror bounce instead of a diffuse one
+
+@dataclass
+class Camera:
+    position: Tuple[float, float, float] = (0.0, 1.0, 5.0)
+    target: Tuple[float, float, float] = (0.0, 0.5, 0.0)
+    up: Tuple[float, float, float] = (0.0, 1.0, 0.0)
+    fov: float = 45.0
+    width: int = 640
+    height: int = 360
+
+    def basis(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Forward, right and up unit vectors"""
+        forward = np.subtract(self.target, self.position).astype(np.float64)
+        forward /= np.linalg.norm(forward)
+        right = np.cross(forward, self.up)
+        right /= np.linalg.norm(right)
+        return forward, right, np.cross(right, forward)
+
+    def generate_rays(self, x0: int, y0: int, width: int, height: int, spp: int,
+                      rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Jittered primary rays for a tile: origins (3, N), directions (3, N), pixel ids (N,)"""
+        forward, right, up = self.basis()
+        scale = np.tan(np.radians(self.fov) / 2.0)
+        aspect = self.width / self.height
+
+        ys, xs = np.mgrid[y0:y0 + height, x0:x0 + width]
+        pixel = np.repeat((ys - y0) * width + (xs - x0), spp, axis=None)
+        px = np.repeat(xs.ravel(), spp) + rng.random(len(pixel))
+        py = np.repeat(ys.ravel(), spp) + rng.random(len(pixel))
+
+        sx = (2.0 * px / self.width - 1.0) * aspect * scale
+        sy = (1.0 - 2.0 * py / self.height) * scale
+        directions = (forward[:, None] + right[:, None] * sx + up[:, None] * sy)
+        directions /= np.linalg.norm(directions, axis=0)
+        origins = np.broadcast_to(np.asarray(self.position, dtype=np.float64)[:, None],
+                                  directions.shape).copy()
+        return origins, directions, pixel
+
+@dataclass
+class Scene:
+    """Spheres and triangle meshes with per-object materials under a gradient sky"""
+    materials: List[Material] = field(default_factory=list)
+    centers: List[Tuple[float, float, float]] = field(default_factory=list)
+    radii: List[float] = field(default_factory=list)
+    material_ids: List[int] = field(default_factory=list)
+    meshes: List[Tuple[np.ndarray, np.ndarray, int]] = field(default_factory=list)
+    sky_top: Tuple[float, float, float] = (0.5, 0.7, 1.0)
+    sky_bottom: Tuple[float, float, float] = (1.0, 1.0, 1.0)
+
+    def add_material(self, material: Material) -> int:
+        self.materials.append(material)
+        return len(self.materials) - 1
+
+    def add_sphere(self, center, radius: float, material_id: int):
+        self.centers.append(tuple(center))
+        self.radii.append(float(radius))
+        self.material_ids.append(material_id)
+
+    def add_mesh(self, vertices, faces, material_id: int):
+        self.meshes.append((np.asarray(vertices, dtype=np.float64),
+                            np.asarray(faces, dtype=np.int64).reshape(-1, 3), material_id))
+
+    def arrays(self) -> 'SceneArrays':
+        """Pack the scene for rendering, building one BVH over all mesh triangles"""
+        bvh, face_normals, face_materials = None, None, None
+        if self.meshes:
+            offsets = np.cumsum([0] + [len(v) for v, _, _ in self.meshes[:-1]])
+            vertices = np.concatenate([v for v, _, _ in self.meshes])
+            faces = np.concatenate([f + offset for (_, f, _), offset in zip(self.meshes, offsets)])
+            face_materials = np.concatenate([np.full(len(f), m, dtype=np.int64)
+                                             for _, f, m in self.meshes])
+            bvh = BVH.build(vertices, faces)
+            triangles = vertices[faces]
+            normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+            normals /= np.maximum(np.linalg.norm(normals, axis=1, keepdims=True), 1e-12)
+            face_normals = normals.T.copy()
+
+        return SceneArrays(
+            centers=np.asarray(self.centers, dtype=np.float64).reshape(-1, 3).T.copy(),
+            radii=np.asarray(self.radii, dtype=np.float64),
+            material_ids=np.asarray(self.material_ids, dtype=np.int64),
+            albedo=np.asarray([m.albedo for m in self.materials], dtype=np.float64).T.copy(),
+            emission=np.asarray([m.emission for m in self.materials], dtype=np.float64).T.copy(),
+            specular=np.asarray([m.specular for m in self.materials], dtype=np.float64),
+            sky_top=np.asarray(self.sky_top, dtype=np.float64)[:, None],
+            sky_bottom=np.asarray(self.sky_bottom, dtype=np.float64)[:, None],
+            bvh=bvh,
+            face_normals=face_normals,
+            face_materials=face_materials,
+        )
+
+@dataclass
+class SceneArrays:
+    """Scene data as structure-of-arrays; vectors are stored as (3, N)"""
+    centers: np.ndarray
+    radii: np.ndarray
+    material_ids: np.ndarray
+    albedo: np.ndarray
+    emission: np.ndarray
+    specular: np.ndarray
+    sky_top: np.ndarray
+    sky_bottom: np.ndarray
+    bvh: Optional[BVH] = None
+    face_normals: Optional[np.ndarray] = None
+    face_materials: Optional[np.ndarray] = None
+
+    def intersect(self, origins: np.ndarray, directions: np.ndarray
+                  ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Closest hit per ray: distance (inf on miss), surface normal, material id"""
+        distance, normals, material = self.intersect_spheres(origins, directions)
+        if self.bvh is not None:
+            hits = self.bvh.intersect(origins, directions, t_max=distance)
+            mesh = hits.hit
+            distance = np.where(mesh, hits.distance, distance)
+            normals[:, mesh] = self.face_normals[:, hits.primitive[mesh]]
+            material[mesh] = self.face_materials[hits.primitive[mesh]]
+        return distance, normals, material
+
+    def intersect_spheres(self, origins: np.ndarray, directions: np.ndarray
+                          ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        count = origins.shape[1]
+        if not len(self.radii):
+            return np.full(count, np.inf), np.zeros((3, count)), np.zeros(count, dtype=np.int64)
+
+        oc = origins[:, :, None] - self.centers[:, None, :]        # (3, N, S)
+        b = np.einsum("in,ins->ns", directions, oc)
+        c = np.einsum("ins,ins->ns", oc, oc) - self.radii ** 2
+        disc = b * b - c
+        hit = disc > 0
+        root = np.sqrt(np.where(hit, disc, 0.0))
+        t = -b - root
+        t = np.where(t > EPSILON, t, -b + root)
+        t = np.where(hit & (t > EPSILON), t, np.inf)
+
+        nearest = np.argmin(t, axis=1)
+        rows = np.arange(len(nearest))
+        distance = t[rows, nearest]
+        points = origins + directions * np.where(np.isfinite(distance), distance, 0.0)
+        normals = (points - self.centers[:, nearest]) / self.radii[nearest]
+        return distance, normals, self.material_ids[nearest]
+
+    def sky(self, directions: np.ndarray) -> np.ndarray:
+        blend = 0.5 * (directions[1] + 1.0)
+        return self.sky_bottom * (1.0 - blend) + self.sky_top * blend
+
+def cosine_sample_hemisphere(normals: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Cosine-weighted directions around each (3, N) normal"""
+    count = normals.shape[1]
+    u1 = rng.random(count)
+    u2 = rng.random(count)
+    radius = np.sqrt(u1)
+    phi = 2.0 * np.pi * u2
+    x, y, z = radius * np.cos(phi), radius * np.sin(phi), np.sqrt(np.maximum(0.0, 1.0 - u1))
+
+    # Branchless orthonormal basis (Duff et al. 2017)
+    nx, ny, nz = normals
+    sign = np.where(nz >= 0.0, 1.0, -1.0)
+    a = -1.0 / (sign + nz)
+    b = nx * ny * a
+    tangent = np.stack([1.0 + sign * nx * nx * a, sign * b, -sign * nx])
+    bitangent = np.stack([b, sign + ny * ny * a, -ny])
+    return tangent * x + bitangent * y + normals * z
+
+def reflect(directions: np.ndarray, normals: np.ndarray) -> np.ndarray:
+    return directions - 2.0 * np.sum(directions * normals, axis=0) * normals
+
+@dataclass
+class RenderSettings:
+    samples_per_pixel: int = 16
+    max_depth: int = 6
+    tile_size: int = 32
+    seed: int = 0
+
+def trace_paths(scene: SceneArrays, origins: np.ndarray, directions: np.ndarray,
+                max_depth: int, rng: np.random.Generator) -> np.ndarray:
+    """Trace a batch of paths and return the (3, N) radiance of each"""
+    count = origins.shape[1]
+    radiance = np.zeros((3, count))
+    throughput = np.ones((3, count))
+    alive = np.arange(count)
+
+    for depth in range(max_depth):
+        distance, normals, material = scene.intersect(origins, directions)
+        missed = ~np.isfinite(distance)
+        radiance[:, alive[missed]] += throughput[:, missed] * scene.sky(directions[:, missed])
+
+        # Keep only the rays that hit something
+        hit = ~missed
+        alive, origins, directions = alive[hit], origins[:, hit], directions[:, hit]
+        throughput, normals, material, distance = (throughput[:, hit], normals[:, hit],
+                                                   material[hit], distance[hit])
+        if not len(alive):
+            break
+
+        radiance[:, alive] += throughput * scene.emission[:, material]
+
+        # Face the normal towards the incoming ray
+        facing = np.sum(normals * directions, axis=0) < 0.0
+        normals = np.where(facing, normals, -normals)
+        origins = origins + directions * distance + normals * EPSILON
+
+        mirror = rng.random(len(alive)) < scene.specular[material]
+        diffuse_dirs = cosine_sample_hemisphere(normals, rng)
+        directions = np.where(mirror, reflect(directions, normals), diffuse_dirs)
+        throughput = throughput * scene.albedo[:, material]
+
+        # Russian roulette once paths have had a few bounces
+        if depth >= 3:
+            survive = np.clip(throughput.max(axis=0), 0.05, 1.0)
+            keep = rng.random(len(alive)) < survive
+            throughput = throughput[:, keep] / survive[keep]
+            alive, origins, directions = alive[keep], origins[:, keep], directions[:, keep]
+            if not len(alive):
+                break
+
+    return radiance
+
+def split_tiles(width: int, height: int, tile_size: int) -> List[Tuple[int, int, int, int]]:
+    """(x, y, width, height) tiles covering the frame"""
+    return [(x, y, min(tile_size, width - x), min(tile_size, height - y))
+            for y in range(0, height, tile_size)
+            for x in range(0, width, tile_size)]
+
+# Per-process worker state, set once by the pool initializer
+_worker = {}
+
+def _init_worker(scene: SceneArrays, camera: Camera, settings: RenderSettings, buffer_name: str):
+    _worker["buffer_name"] = buffer_name
+    _worker["scene"] = scene
+    _worker["camera"] = camera
+    _worker["settings"] = settings
+
+def _render_tile(tile_index: int, tile: Tuple[int, int, int, int]) -> int:
+    scene, camera, settings = _worker["scene"], _worker["camera"], _worker["settings"]
+    x, y, width, height = tile
+    rng = np.random.default_rng((settings.seed, tile_index))
+    spp = settings.samples_per_pixel
+
+    origins, directions, pixel = camera.generate_rays(x, y, width, height, spp, rng)
+    radiance = trace_paths(scene, origins, directions, settings.max_depth, rng)
+
+    # Average the samples of each pixel
+    accum = np.zeros((3, width * height))
+    for channel in range(3):
+        accum[channel] = np.bincount(pixel, weights=radiance[channel], minlength=width * height)
+    tile_pixels = (accum / spp).T.reshape(height, width, 3)
+
+    # Attach to the frame buffer only for the write so no worker holds a handle past its
+    # tile; the view is a temporary so its buffer export is gone before close()
+    shm = shared_memory.SharedMemory(name=_worker["buffer_name"])
+    try:
+        np.ndarray((camera.height, camera.width, 3), dtype=np.float32,
+                   buffer=shm.buf)[y:y + height, x:x + width] = tile_pixels
+    finally:
+        shm.close()
+    return len(pixel)
+
+@dataclass
+class RenderStats:
+    samples: int
+    seconds: float
+    workers: int
+
+    @property
+    def samples_per_second(self) -> float:
+        return self.samples / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def samples_per_second_per_core(self) -> float:
+        return self.samples_per_second / self.workers
+
+class UniPathTracer:
+    """Unidirectional path tracer rendering tiles across a process pool"""
+
+    def __init__(self, settings: Optional[RenderSettings] = None, workers: Optional[int] = None):
+        self.logger = logging.getLogger(__name__)
+        self.settings = settings or RenderSettings()
+        self.workers = workers or os.cpu_count() or 1
+        self.last_stats: Optional[RenderStats] = None
+
+    def render(self, scene: Scene, camera: Camera) -> np.ndarray:
+        """Render a linear float32 (height, width, 3) image"""
+        shape = (camera.height, camera.width, 3)
+        nbytes = int(np.prod(shape)) * np.dtype(np.float32).itemsize
+        shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        try:
+            frame = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+            frame.fill(0.0)
+            tiles = split_tiles(camera.width, camera.height, self.settings.tile_size)
+            arrays = scene.arrays()  # Built once here, not in every worker
+
+            start = time.perf_counter()
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                     initargs=(arrays, camera, self.settings, shm.name)) as pool:
+                samples = sum(pool.map(_render_tile, range(len(tiles)), tiles))
+            self.last_stats = RenderStats(samples, time.perf_counter() - start, self.workers)
+
+            self.logger.info(f"Rendered {camera.width}x{camera.height} in "
+                             f"{self.last_stats.seconds:.2f}s, "
+                             f"{self.last_stats.samples_per_second_per_core:,.0f} samples/s/core")
+            return frame.copy()
+        finally:
+            shm.close()
+            shm.unlink()
+
+def to_rgb8(image: np.ndarray, gamma: float = 2.2) -> np.ndarray:
+    """Clamp and gamma-encode a linear image to uint8"""
+    return (np.clip(image, 0.0, 1.0) ** (1.0 / gamma) * 255.0 + 0.5).astype(np.uint8)
+
+def benchmark_scene() -> Scene:
+    """Three spheres on a ground plane, lit by an emissive sphere and the sky"""
+    scene = Scene()
+    ground = scene.add_material(Material(albedo=(0.5, 0.5, 0.5)))
+    red = scene.add_material(Material(albedo=(0.8, 0.2, 0.2)))
+    mirror = scene.add_material(Material(albedo=(0.9, 0.9, 0.9), specular=1.0))
+    green = scene.add_material(Material(albedo=(0.2, 0.7, 0.3)))
+    light = scene.add_material(Material(albedo=(0.0, 0.0, 0.0), emission=(8.0, 7.0, 6.0)))
+
+    scene.add_sphere((0.0, -1000.0, 0.0), 1000.0, ground)
+    scene.add_sphere((-1.1, 0.5, 0.0), 0.5, red)
+    scene.add_sphere((0.0, 0.5, -0.4), 0.5, mirror)
+    scene.add_sphere((1.1, 0.5, 0.0), 0.5, green)
+    scene.add_sphere((0.0, 3.0, 1.0), 0.6, light)
+    return scene
+
+def run_benchmark(width: int = 320, height: int = 180, spp: int = 16,
+                  workers: Optional[int] = None) -> RenderStats:
+    """Render the benchmark scene and return its throughput"""
+    tracer = UniPathTracer(RenderSettings(samples_per_pixel=spp), workers)
+    tracer.render(benchmark_scene(), Camera(width=width, height=height))
+    return tracer.last_stats
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Path tracer benchmark")
+    parser.add_argument("--width", type=int, default=320)
+    parser.add_argument("--height", type=int, default=180)
+    parser.add_argument("--spp", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    stats = run_benchmark(args.width, args.height, args.spp, args.workers)
+    print(f"{stats.samples:,} samples in {stats.seconds:.2f}s on {stats.workers} workers")
+    print(f"{stats.samples_per_second:,.0f} samples/s, "
+          f"{stats.samples_per_second_per_core:,.0f} samples/s/core")
+
+if __name__ == "__main__":
+    main()
@@ -7,13 +7,19 @@ import sys
 import json
 import importlib
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
 from enum import Enum
 from typing import Dict, List, Optional, Any
 from pathlib import Path
-import numpy as np
-import OpenGL.GL as gl
-import pyusd
 from abc import ABC, abstractmethod
+from mysticscape.core.lazy import lazy_import
+from mysticscape.core.render_registry import RendererRegistry
+
+# Heavy modules are loaded on first use rather than at import time
+np = lazy_import("numpy")
+gl = lazy_import("OpenGL.GL")
+pyusd = lazy_import("pyusd")
 
 class RenderEngine(Enum):
     HYPERION = "hyperion"
@@ -49,10 +55,47 @@ class Plugin(ABC):
     def shutdown(self) -> None:
         pass
 
+@dataclass
+class PluginManifest:
+    """What discovery needs to know about a plugin file without executing it"""
+    path: str
+    mtime_ns: int
+    size: int
+    name: Optional[str] = None  # None when the file defines no plugin
+    version: Optional[str] = None
+    plugin_type: Optional[str] = None
+
+    @classmethod
+    def for_file(cls, path: Path, stat: os.stat_result,
+                 plugin: Optional[Plugin] = None) -> 'PluginManifest':
+        manifest = cls(str(path), stat.st_mtime_ns, stat.st_size)
+        if plugin is not None:
+            manifest.name = plugin.name
+            manifest.version = plugin.version
+            manifest.plugin_type = plugin.type.value
+        return manifest
+
+    def matches(self, stat: os.stat_result) -> bool:
+        """True if the file is unchanged since this manifest was recorded"""
+        return (self.mtime_ns, self.size) == (stat.st_mtime_ns, stat.st_size)
+
+    @property
+    def type(self) -> Optional[PluginType]:
+        return PluginType(self.plugin_type) if self.plugin_type else None
+
+def default_plugin_cache_path() -> Path:
+    """Location of the plugin manifest cache"""
+    if override := os.environ.get("MYSTICSCAPE_CACHE_DIR"):
+        return Path(override) / "plugins.json"
+    return Path.home() / ".mysticscape" / "cache" / "plugins.json"
+
 class PluginManager:
-    def __init__(self):
+    def __init__(self, cache_path: Optional[Path] = None, max_workers: Optional[int] = None):
         self.plugins: Dict[str, Plugin] = {}
+        self.manifests: Dict[str, PluginManifest] = {}
         self.plugin_paths: List[Path] = []
+        self.cache_path = cache_path or default_plugin_cache_path()
+        self.max_workers = max_workers
         self.logger = logging.getLogger(__name__)
 
     def add_plugin_path(self, path: Path):
@@ -77,17 +120,87 @@ class PluginManager:
         return None
 
     def scan_plugins(self):
-        """Scan for available plugins"""
+        """Scan for available plugins
+
+        Unchanged files are described from the manifest cache without being
+        executed; they are imported on first get_plugin(). New or modified
+        files are loaded in parallel and their manifests recorded.
+        """
+        cache = self.load_manifest_cache()
+        found: Dict[str, PluginManifest] = {}
+        changed = []
         for path in self.plugin_paths:
-            for plugin_file in path.glob("*.py"):
-                if plugin := self.load_plugin(plugin_file):
-                    self.plugins[plugin.name] = plugin
+            for plugin_file in sorted(path.glob("*.py")):
+                stat = plugin_file.stat()
+                cached = cache.get(str(plugin_file))
+                if cached and cached.matches(stat):
+                    found[str(plugin_file)] = cached
+                else:
+                    changed.append((plugin_file, stat))
+
+        if changed:
+            with ThreadPoolExecutor(max_workers=self.max_workers,
+                                    thread_name_prefix="plugins") as pool:
+                loaded = pool.map(lambda item: self.load_plugin(item[0]), changed)
+                for (plugin_file, stat), plugin in zip(changed, loaded):
+                    found[str(plugin_file)] = PluginManifest.for_file(plugin_file, stat, plugin)
+                    if plugin:
+                        self.plugins[plugin.name] = plugin
+
+        self.manifests = {m.name: m for m in found.values() if m.name}
+        scanned = set(self.plugin_paths)
+        removed = [path for path in cache if path not in found and Path(path).parent in scanned]
+        if changed or removed:
+            self.save_manifest_cache(found)
+
+    def get_plugin(self, name: str) -> Optional[Plugin]:
+        """Return a discovered plugin, importing it on first use"""
+        if name in self.plugins:
+            return self.plugins[name]
+        manifest = self.manifests.get(name)
+        if manifest is None:
+            return None
+        if plugin := self.load_plugin(Path(manifest.path)):
+            self.plugins[plugin.name] = plugin
+        return plugin
+
+    def load_manifest_cache(self) -> Dict[str, PluginManifest]:
+        """Read cached manifests keyed by plugin file path"""
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+            return {entry["path"]: PluginManifest(**entry) for entry in entries}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, TypeError, KeyError) as e:
+            self.logger.warning(f"Ignoring unreadable plugin cache {self.cache_path}: {str(e)}")
+            return {}
+
+    def save_manifest_cache(self, manifests: Dict[str, PluginManifest]):
+        """Write manifests to the cache file atomically
+
+        The cache is shared by every plugin manager, so entries for files
+        outside this manager's plugin paths are read back and kept.
+        """
+        scanned = set(self.plugin_paths)
+        merged = {path: manifest for path, manifest in self.load_manifest_cache().items()
+                  if Path(path).parent not in scanned}
+        merged.update(manifests)
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump([asdict(m) for m in merged.values()], f, indent=1)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            self.logger.warning(f"Could not write plugin cache {self.cache_path}: {str(e)}")
 
 class Pipeline:
     def __init__(self):
         self.plugin_manager = PluginManager()
         self.current_engine = RenderEngine.HYPERION
         self.logger = logging.getLogger(__name__)
+        self._query_engine = None
         self.initialize_pipeline()
 
     def initialize_pipeline(self):
@@ -103,32 +216,56 @@ class Pipeline:
         self.setup_render_engines()
 
     def init_usd(self):
-        """Initialize OpenUSD workflow"""
+        """Initialize OpenUSD workflow
+
+        The streaming stage works without pyusd; the USD stage, when it can
+        be created, is kept as its backend.
+        """
+        from mysticscape.core.usd_stage import StreamingStage
+        backend = None
         try:
-            self.stage = pyusd.Stage.CreateInMemory()
+            backend = pyusd.Stage.CreateInMemory()
             self.logger.info("OpenUSD initialized successfully")
         except Exception as e:
             self.logger.error(f"Failed to initialize OpenUSD: {str(e)}")
+        self.stage = StreamingStage(backend=backend)
 
     def setup_render_engines(self):
-        """Setup available render engines"""
-        self.render_engines = {
-            RenderEngine.HYPERION: self.create_hyperion_renderer(),
-            RenderEngine.RENDERMAN: self.create_renderman_renderer(),
-            RenderEngine.VRAY: self.create_vray_renderer(),
-            RenderEngine.UNI_PATH_TRACER: self.create_uni_path_tracer(),
-            RenderEngine.BI_PATH_TRACER: self.create_bi_path_tracer(),
-            RenderEngine.PIXAR_UNIFIED: self.create_pixar_unified_renderer()
-        }
+        """Setup available render engines
+
+        Engines are registered by factory and built on first use; only the
+        default engine is constructed here.
+        """
+        self.render_engines = RendererRegistry()
+        self.render_engines.register(RenderEngine.HYPERION, self.create_hyperion_renderer)
+        self.render_engines.register(RenderEngine.RENDERMAN, self.create_renderman_renderer)
+        self.render_engines.register(RenderEngine.VRAY, self.create_vray_renderer)
+        self.render_engines.register(RenderEngine.UNI_PATH_TRACER, self.create_uni_path_tracer)
+        self.render_engines.register(RenderEngine.BI_PATH_TRACER, self.create_bi_path_tracer)
+        self.render_engines.register(RenderEngine.PIXAR_UNIFIED, self.create_pixar_unified_renderer)
+        self.render_engines.activate(self.current_engine)
 
     def set_render_engine(self, engine: RenderEngine):
         """Switch active render engine"""
         if engine in self.render_engines:
+            self.render_engines.activate(engine)
             self.current_engine = engine
             self.logger.info(f"Switched to {engine.value} renderer")
             return True
         return False
 
+    @property
+    def renderer(self):
+        """Instance of the active render engine, built if it was evicted"""
+        return self.render_engines.activate(self.current_engine)
+
+    def render(self, *args, **kwargs):
+        """Render with the active engine"""
+        renderer = self.renderer
+        if renderer is None:
+            raise RuntimeError(f"{self.current_engine.value} renderer is not available")
+        return renderer.render(*args, **kwargs)
+
     def create_hyperion_renderer(self):
         """Create Hyperion renderer instance"""
         # TODO: Implement Hyperion renderer
@@ -146,33 +283,53 @@ class Pipeline:
 
     def create_uni_path_tracer(self):
         """Create Uni-Directional Path Tracer"""
-        # TODO: Implement Uni-Directional Path Tracer
-        pass
+        from mysticscape.core.path_tracer import UniPathTracer
+        return UniPathTracer()
 
     def create_bi_path_tracer(self):
         """Create Bi-Directional Path Tracer"""
-        # TODO: Implement Bi-Directional Path Tracer
-        pass
+        from mysticscape.core.bdpt import BiPathTracer
+        return BiPathTracer()
 
     def create_pixar_unified_renderer(self):
         """Create Pixar Unified renderer instance"""
         # TODO: Implement Pixar Unified renderer
         pass
 
+    @property
+    def query_engine(self):
+        """Scene objects visible to execute_query, created on first use"""
+        if self._query_engine is None:
+            from mysticscape.core.query import SceneQueryEngine
+            self._query_engine = SceneQueryEngine()
+        return self._query_engine
+
     def execute_query(self, query: str, parallel: bool = True):
-        """Execute a query in the pipeline"""
-        # TODO: Implement query execution system
-        pass
+        """Execute a query in the pipeline, yielding matching scene objects"""
+        return self.query_engine.execute(query, parallel)
 
     def create_particle_system(self, params: Dict[str, Any]):
-        """Create a particle system"""
-        # TODO: Implement particle system
-        pass
+        """Create a particle system
+
+        params may set any ParticleSettings field, plus "workers" for
+        multi-threaded chunked stepping.
+        """
+        from mysticscape.core.particles import ParticleSettings, ParticleSystem
+        return ParticleSystem(ParticleSettings.from_params(params),
+                              workers=params.get("workers", 1))
 
     def create_volumetrics(self, params: Dict[str, Any]):
-        """Create volumetric effects"""
-        # TODO: Implement volumetrics
-        pass
+        """Create volumetric effects
+
+        params: "shape" (voxels per axis, default 512^3), "dtype", "voxel_size",
+        "origin", and "path" to back the blocks with a memory-mapped file.
+        """
+        from mysticscape.core.volumetrics import SparseVoxelGrid
+        return SparseVoxelGrid(params.get("shape", (512, 512, 512)),
+                               dtype=params.get("dtype", "float32"),
+                               voxel_size=params.get("voxel_size", 1.0),
+                               origin=params.get("origin", (0.0, 0.0, 0.0)),
+                               path=params.get("path"))
 
     def send_support_email(self, subject: str, message: str):
         """Send support email"""
@@ -0,0 +1,426 @@
+"""
+Scene query engine
+
+Queries select scene objects by type, path, attribute and bounding region:
+
+    type = Mesh and material = "gold" and height >= 2 and intersects (0, 0, 0, 10, 10, 10)
+
+Clauses are joined with ``and``. Supported forms are ``name <op> value``
+(ops: = != < <= > >= like), ``name in (v1, v2, ...)``, ``has name`` and
+``inside``/``intersects`` with a (min x, y, z, max x, y, z) box. ``type`` and
+``path`` refer to the object itself, any other name to an attribute.
+
+The planner drives each query from the most selective clause that an index
+can answer (type, attribute hash and sorted-range indexes, built on first
+use and maintained on edits) and applies the rest as vectorized filters over
+chunks of candidates, in a thread pool when parallel.
+"""
+
+import fnmatch
+import logging
+import math
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+import numpy as np
+
+CHUNK_SIZE = 2048
+INITIAL_CAPACITY = 1024
+
+class QueryError(ValueError):
+    pass
+
+@dataclass
+class SceneObject:
+    path: str
+    type: str
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    bounds: Optional[Tuple[float, float, float, float, float, float]] = None  # min xyz, max xyz
+
+@dataclass
+class Clause:
+    kind: str    # "compare", "in", "has" or "bounds"
+    name: str
+    op: str = ""
+    value: Any = None
+
+    def __str__(self):
+        if self.kind == "has":
+            return f"has {self.name}"
+        if self.kind == "bounds":
+            return f"{self.op} {self.value}"
+        return f"{self.name} {self.op} {self.value!r}"
+
+TOKEN = re.compile(r"""\s*(?:
+    (?P<string>"[^"]*"|'[^']*')
+  | (?P<number>-?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)(?![\w/.*])
+  | (?P<op><=|>=|!=|==|=|<|>)
+  | (?P<punct>[(),])
+  | (?P<word>[\w/.*?\[\]:-]+)
+)""", re.VERBOSE)
+
+def tokenize(query: str) -> List[Tuple[str, Any]]:
+    tokens, position = [], 0
+    query = query.strip()
+    while position < len(query):
+        match = TOKEN.match(query, position)
+        if not match or match.end() == position:
+            raise QueryError(f"Unexpected character at {position}: {query[position:position + 10]!r}")
+        kind = match.lastgroup
+        text = match.group(kind)
+        if kind == "string":
+            tokens.append(("value", text[1:-1]))
+        elif kind == "number":
+            tokens.append(("value", float(text) if re.search(r"[.eE]", text) else int(text)))
+        else:
+            tokens.append((kind, text))
+        position = match.end()
+    return tokens
+
+def parse_query(query: str) -> List[Clause]:
+    """Parse a query string into its and-ed clauses"""
+    tokens = tokenize(query)
+    clauses, i = [], 0
+
+    def take(kind=None, text=None):
+        nonlocal i
+        if i >= len(tokens):
+            raise QueryError(f"Query ends unexpectedly: {query!r}")
+        token = tokens[i]
+        if (kind and token[0] != kind) or (text and token[1] != text):
+            raise QueryError(f"Expected {text or kind}, got {token[1]!r}")
+        i += 1
+        return token
+
+    def peek(text: str) -> bool:
+        """Whether the next token is the given keyword or punctuation"""
+        if i >= len(tokens) or tokens[i][0] == "value":
+            return False
+        return tokens[i][1].lower() == text
+
+    def value():
+        kind, text = take()
+        if kind == "value":
+            return text
+        if kind == "word":
+            return {"true": True, "false": False}.get(text.lower(), text)
+        raise QueryError(f"Expected a value, got {text!r}")
+
+    def value_list():
+        take("punct", "(")
+        values = [value()]
+        while peek(","):
+            take("punct", ",")
+            values.append(value())
+        take("punct", ")")
+        return values
+
+    while i < len(tokens):
+        word = take("word")[1]
+        keyword = word.lower()
+        if keyword == "has":
+            clauses.append(Clause("has", take("word")[1]))
+        elif keyword in ("inside", "intersects"):
+            box = value_list()
+            if len(box) != 6 or not all(isinstance(v, (int, float)) for v in box):
+                raise QueryError(f"{keyword} needs six numbers")
+            clauses.append(Clause("bounds", "bounds", keyword, tuple(float(v) for v in box)))
+        elif peek("in"):
+            i += 1
+            clauses.append(Clause("in", word, "in", value_list()))
+        else:
+            kind, op = take()
+            if kind not in ("op", "word") or (kind == "word" and op.lower() != "like"):
+                raise QueryError(f"Expected an operator after {word!r}, got {op!r}")
+            clauses.append(Clause("compare", word, "=" if op == "==" else op.lower(), value()))
+
+        if i < len(tokens):
+            if not peek("and"):
+                raise QueryError(f"Expected 'and', got {tokens[i][1]!r}")
+            i += 1
+            if i == len(tokens):
+                raise QueryError("Query ends with 'and'")
+    return clauses
+
+class AttributeIndex:
+    """Hash index of value -> ids plus a lazily sorted numeric index for ranges"""
+
+    def __init__(self):
+        self.ids_by_value: Dict[Any, Set[int]] = {}
+        self.present: Set[int] = set()  # Every id with the attribute, hashable value or not
+        self.numeric: Dict[int, float] = {}
+        self.sorted = None  # (values, ids), rebuilt after edits
+
+    def add(self, object_id: int, value: Any):
+        self.present.add(object_id)
+        try:
+            self.ids_by_value.setdefault(value, set()).add(object_id)
+        except TypeError:
+            pass  # Unhashable values can only be filtered, not looked up
+        # NaN compares false to everything, so it must stay out of the sorted ranges
+        if isinstance(value, (int, float)) and not isinstance(value, bool) \
+                and not math.isnan(value):
+            self.numeric[object_id] = float(value)
+            self.sorted = None
+
+    def discard(self, object_id: int, value: Any):
+        self.present.discard(object_id)
+        try:
+            ids = self.ids_by_value.get(value)
+        except TypeError:
+            ids = None
+        if ids is not None:
+            ids.discard(object_id)
+            if not ids:
+                del self.ids_by_value[value]
+        if self.numeric.pop(object_id, None) is not None:
+            self.sorted = None
+
+    def all_ids(self) -> np.ndarray:
+        return ids_array(self.present)
+
+    def equal(self, values) -> np.ndarray:
+        ids = set()
+        for value in values:
+            try:
+                ids |= self.ids_by_value.get(value, set())
+            except TypeError:
+                pass
+        return ids_array(ids)
+
+    def range(self, op: str, bound: float) -> np.ndarray:
+        if self.sorted is None:
+            ids = np.fromiter(self.numeric.keys(), dtype=np.int64, count=len(self.numeric))
+            values = np.fromiter(self.numeric.values(), dtype=np.float64, count=len(self.numeric))
+            order = np.argsort(values, kind="stable")
+            self.sorted = (values[order], ids[order])
+        values, ids = self.sorted
+        if op == "<":
+            return np.sort(ids[:np.searchsorted(values, bound, "left")])
+        if op == "<=":
+            return np.sort(ids[:np.searchsorted(values, bound, "right")])
+        if op == ">":
+            return np.sort(ids[np.searchsorted(values, bound, "right"):])
+        return np.sort(ids[np.searchsorted(values, bound, "left"):])
+
+def ids_array(ids) -> np.ndarray:
+    return np.sort(np.fromiter(ids, dtype=np.int64, count=len(ids)))
+
+@dataclass
+class QueryPlan:
+    driver: Optional[Clause]  # None means a full scan
+    candidates: np.ndarray
+    filters: List[Tuple[Clause, Optional[np.ndarray]]]  # With the clause's indexed ids, if any
+
+    def explain(self) -> str:
+        source = f"index on {self.driver}" if self.driver else "full scan"
+        steps = [f"{source}: {len(self.candidates)} candidates"]
+        steps += [f"filter {clause}" + (" (indexed)" if ids is not None else "")
+                  for clause, ids in self.filters]
+        return "\n".join(steps)
+
+class SceneQueryEngine:
+    """Object table with indexes for selecting scene objects by query"""
+
+    def __init__(self, max_workers: Optional[int] = None, chunk_size: int = CHUNK_SIZE):
+        self.logger = logging.getLogger(__name__)
+        self.lock = threading.RLock()
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.executor: Optional[ThreadPoolExecutor] = None
+
+        self.objects: List[Optional[SceneObject]] = []
+        self.ids: Dict[str, int] = {}
+        self.free_ids: List[int] = []
+        self.bounds = np.full((INITIAL_CAPACITY, 6), np.nan)
+        self.type_index: Dict[str, Set[int]] = {}
+        self.attribute_indexes: Dict[str, AttributeIndex] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, obj: SceneObject):
+        """Add an object, replacing any existing object at the same path"""
+        with self.lock:
+            self.remove(obj.path)
+            object_id = self.free_ids.pop() if self.free_ids else len(self.objects)
+            if object_id == len(self.objects):
+                self.objects.append(None)
+            if object_id >= len(self.bounds):
+                grown = np.full((len(self.bounds) * 2, 6), np.nan)
+                grown[:len(self.bounds)] = self.bounds
+                self.bounds = grown
+
+            self.objects[object_id] = obj
+            self.ids[obj.path] = object_id
+            self.bounds[object_id] = obj.bounds if obj.bounds is not None else np.nan
+            self.type_index.setdefault(obj.type, set()).add(object_id)
+            for name, index in self.attribute_indexes.items():
+                if name in obj.attributes:
+                    index.add(object_id, obj.attributes[name])
+
+    def update(self, path: str, **attributes):
+        """Change attributes of an existing object, keeping indexes current"""
+        with self.lock:
+            obj = self.get(path)
+            if obj is None:
+                raise KeyError(path)
+            self.add(SceneObject(obj.path, obj.type, {**obj.attributes, **attributes}, obj.bounds))
+
+    def remove(self, path: str) -> bool:
+        with self.lock:
+            object_id = self.ids.pop(path, None)
+            if object_id is None:
+                return False
+            obj = self.objects[object_id]
+            self.objects[object_id] = None
+            self.bounds[object_id] = np.nan
+            self.type_index[obj.type].discard(object_id)
+            for name, index in self.attribute_indexes.items():
+                if name in obj.attributes:
+                    index.discard(object_id, obj.attributes[name])
+            self.free_ids.append(object_id)
+            return True
+
+    def get(self, path: str) -> Optional[SceneObject]:
+        object_id = self.ids.get(path)
+        return self.objects[object_id] if object_id is not None else None
+
+    def clear(self):
+        with self.lock:
+            self.objects.clear()
+            self.ids.clear()
+            self.free_ids.clear()
+            self.bounds.fill(np.nan)
+            self.type_index.clear()
+            self.attribute_indexes.clear()
+
+    def attribute_index(self, name: str) -> AttributeIndex:
+        """Index for an attribute, built on the first query that uses it"""
+        index = self.attribute_indexes.get(name)
+        if index is None:
+            index = AttributeIndex()
+            for object_id, obj in enumerate(self.objects):
+                if obj is not None and name in obj.attributes:
+                    index.add(object_id, obj.attributes[name])
+            self.attribute_indexes[name] = index
+        return index
+
+    def index_lookup(self, clause: Clause) -> Optional[np.ndarray]:
+        """Candidate ids for a clause an index can answer, else None"""
+        if clause.name == "path" or clause.kind == "bounds" or clause.op in ("!=", "like"):
+            return None
+        if clause.name == "type":
+            if clause.op in ("=", "in"):
+                values = clause.value if clause.op == "in" else [clause.value]
+                return ids_array(set().union(*(self.type_index.get(v, set()) for v in values)))
+            return None
+        index = self.attribute_index(clause.name)
+        if clause.kind == "has":
+            return index.all_ids()
+        if clause.op in ("=", "in"):
+            return index.equal(clause.value if clause.op == "in" else [clause.value])
+        if isinstance(clause.value, (int, float)):
+            return index.range(clause.op, float(clause.value))
+        return None
+
+    def plan(self, query: str) -> QueryPlan:
+        """Pick the clause with the fewest indexed candidates to drive the query"""
+        clauses = parse_query(query)
+        with self.lock:
+            lookups = [(clause, self.index_lookup(clause)) for clause in clauses]
+            best, candidates = None, None
+            for clause, ids in lookups:
+                if ids is not None and (candidates is None or len(ids) < len(candidates)):
+                    best, candidates = clause, ids
+            if best is None:
+                candidates = ids_array(self.ids.values())
+            filters = [(clause, ids) for clause, ids in lookups if clause is not best]
+            # Vectorized filters first, per-object ones on what is left
+            filters.sort(key=lambda f: 0 if f[1] is not None or f[0].kind == "bounds" else 1)
+        return QueryPlan(best, candidates, filters)
+
+    def execute(self, query: str, parallel: bool = True) -> Iterator[SceneObject]:
+        """Matching objects, streamed chunk by chunk as they are filtered
+
+        The query is parsed and planned immediately, so syntax errors raise
+        here rather than on first iteration.
+        """
+        return self.stream(self.plan(query), parallel)
+
+    def stream(self, plan: QueryPlan, parallel: bool) -> Iterator[SceneObject]:
+        chunks = [plan.candidates[start:start + self.chunk_size]
+                  for start in range(0, len(plan.candidates), self.chunk_size)]
+
+        if parallel and len(chunks) > 1:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="query")
+            results = self.executor.map(lambda ids: self.filter_chunk(ids, plan.filters), chunks)
+        else:
+            results = (self.filter_chunk(ids, plan.filters) for ids in chunks)
+
+        for ids in results:
+            for object_id in ids:
+                obj = self.objects[object_id] if object_id < len(self.objects) else None
+                if obj is not None:
+                    yield obj
+
+    def filter_chunk(self, ids: np.ndarray,
+                     filters: List[Tuple[Clause, Optional[np.ndarray]]]) -> np.ndarray:
+        for clause, indexed in filters:
+            if not len(ids):
+                break
+            ids = ids[self.evaluate(clause, ids, indexed)]
+        return ids
+
+    def evaluate(self, clause: Clause, ids: np.ndarray,
+                 indexed: Optional[np.ndarray] = None) -> np.ndarray:
+        """Boolean mask of ids satisfying clause"""
+        if indexed is not None:
+            return np.isin(ids, indexed, assume_unique=True)
+        if clause.kind == "bounds":
+            lo, hi = np.asarray(clause.value[:3]), np.asarray(clause.value[3:])
+            box = self.bounds[ids]
+            with np.errstate(invalid="ignore"):
+                if clause.op == "inside":
+                    return np.all((box[:, :3] >= lo) & (box[:, 3:] <= hi), axis=1)
+                return np.all((box[:, :3] <= hi) & (box[:, 3:] >= lo), axis=1)
+
+        objects = [self.objects[i] for i in ids]
+        if clause.name in ("type", "path"):
+            values = [getattr(obj, clause.name) if obj else None for obj in objects]
+            present = [obj is not None for obj in objects]
+        else:
+            values = [obj.attributes.get(clause.name) if obj else None for obj in objects]
+            present = [obj is not None and clause.name in obj.attributes for obj in objects]
+        if clause.kind == "has":
+            return np.array(present, dtype=bool)
+        return np.array([ok and matches(value, clause.op, clause.value)
+                         for value, ok in zip(values, present)], dtype=bool)
+
+    def shutdown(self):
+        if self.executor:
+            self.executor.shutdown()
+            self.executor = None
+
+def matches(value: Any, op: str, operand: Any) -> bool:
+    if op == "=":
+        return value == operand
+    if op == "!=":
+        return value != operand
+    if op == "in":
+        return value in operand
+    if op == "like":
+        return isinstance(value, str) and fnmatch.fnmatchcase(value, str(operand))
+    try:
+        if op == "<":
+            return value < operand
+        if op == "<=":
+            return value <= operand
+        if op == ">":
+            return value > operand
+        return value >= operand
+    except TypeError:
+        return False
@@ -0,0 +1,152 @@
+"""
+Lazily constructed render engines
+
+Engines are registered as factories and built the first time they are
+asked for. Built engines stay in a warm pool, least recently used first,
+and are released once the pool's estimated memory exceeds its cap; the
+active engine is never evicted.
+
+An engine's memory comes from its memory_usage() method when it has one,
+otherwise from a shallow estimate of its attributes. Tracing allocations
+during construction is more accurate but slows every allocation in the
+process while it runs, so it is opt-in.
+"""
+
+import logging
+import sys
+import time
+import tracemalloc
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional
+
+DEFAULT_MEMORY_CAP = 1 << 30
+
+@dataclass
+class EngineRecord:
+    instance: Any
+    construction_seconds: float
+    memory_bytes: int
+
+def estimate_memory(instance: Any) -> int:
+    """Object size plus the buffers held directly by its attributes"""
+    size = sys.getsizeof(instance)
+    for value in getattr(instance, "__dict__", {}).values():
+        size += getattr(value, "nbytes", None) or sys.getsizeof(value)
+    return size
+
+def engine_memory(instance: Any, allocated: Optional[int] = None) -> int:
+    """Engine's own figure from memory_usage(), else traced allocations, else an estimate"""
+    usage = getattr(instance, "memory_usage", None)
+    if callable(usage):
+        try:
+            return int(usage())
+        except Exception:
+            pass
+    return allocated if allocated is not None else estimate_memory(instance)
+
+class RendererRegistry:
+    def __init__(self, memory_cap: int = DEFAULT_MEMORY_CAP, trace_allocations: bool = False):
+        self.logger = logging.getLogger(__name__)
+        self.trace_allocations = trace_allocations
+        self.factories: Dict[Hashable, Callable[[], Any]] = {}
+        self.pool: "OrderedDict[Hashable, EngineRecord]" = OrderedDict()  # Least recently used first
+        self.memory_cap = memory_cap
+        self.active: Optional[Hashable] = None
+        self.timings: Dict[Hashable, float] = {}  # Most recent construction time per engine
+
+    def register(self, key: Hashable, factory: Callable[[], Any]):
+        self.factories[key] = factory
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.factories
+
+    def __getitem__(self, key: Hashable) -> Any:
+        return self.get(key)
+
+    def is_built(self, key: Hashable) -> bool:
+        return key in self.pool
+
+    @property
+    def memory_used(self) -> int:
+        return sum(record.memory_bytes for record in self.pool.values())
+
+    def get(self, key: Hashable) -> Any:
+        """The engine for key, building it on first use"""
+        record = self.pool.get(key)
+        if record is None:
+            record = self.build(key)
+            self.pool[key] = record
+            self.evict(keep=key)
+        else:
+            self.pool.move_to_end(key)
+        return record.instance
+
+    def activate(self, key: Hashable) -> Any:
+        """Make key the active engine, building it if needed"""
+        if key not in self.factories:
+            raise KeyError(key)
+        instance = self.get(key)
+        self.active = key
+        self.evict()
+        return instance
+
+    def build(self, key: Hashable) -> EngineRecord:
+        if self.trace_allocations:
+            return self.traced_build(key)
+        start = time.perf_counter()
+        instance = self.factories[key]()
+        return self.record(key, instance, time.perf_counter() - start)
+
+    def traced_build(self, key: Hashable) -> EngineRecord:
+        """Build while tracing allocations, to measure engines without memory_usage()"""
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            instance = self.factories[key]()
+        finally:
+            seconds = time.perf_counter() - start
+            allocated = max(0, tracemalloc.get_traced_memory()[0] - before)
+            if not tracing:
+                tracemalloc.stop()
+        return self.record(key, instance, seconds, allocated)
+
+    def record(self, key: Hashable, instance: Any, seconds: float,
+               allocated: Optional[int] = None) -> EngineRecord:
+        name = getattr(key, "value", key)
+        self.timings[key] = seconds
+        record = EngineRecord(instance, seconds, engine_memory(instance, allocated))
+        self.logger.info(f"Constructed {name} renderer in {seconds * 1000:.1f} ms "
+                         f"({record.memory_bytes / 2 ** 20:.1f} MiB)")
+        return record
+
+    def evict(self, keep: Optional[Hashable] = None):
+        """Release least recently used engines until the pool fits the memory cap"""
+        for key in list(self.pool):
+            if self.memory_used <= self.memory_cap:
+                break
+            if key != self.active and key != keep:
+                self.release(key)
+
+    def release(self, key: Hashable) -> bool:
+        record = self.pool.pop(key, None)
+        if record is None:
+            return False
+        for method in ("shutdown", "release"):
+            cleanup = getattr(record.instance, method, None)
+            if callable(cleanup):
+                cleanup()
+                break
+        self.logger.info(f"Released {getattr(key, 'value', key)} renderer")
+        return True
+
+    def set_memory_cap(self, memory_cap: int):
+        self.memory_cap = memory_cap
+        self.evict()
+
+    def clear(self):
+        for key in list(self.pool):
+            self.release(key)
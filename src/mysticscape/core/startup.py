@@ -0,0 +1,150 @@
+"""
+Startup orchestration for Mystic Scape
+Runs independent initialization stages in parallel and measures each one
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+@dataclass
+class StartupStage:
+    name: str
+    run: Callable[[Dict[str, Any]], Any]  # Receives the results of earlier stages
+    label: str = ""
+    depends_on: Tuple[str, ...] = ()
+    weight: int = 1
+    main_thread: bool = False  # GUI work must stay on the main thread
+
+@dataclass
+class StageTiming:
+    name: str
+    thread: str
+    started: float = 0.0   # Seconds since the orchestrator started
+    duration: float = 0.0
+    ok: bool = True
+    error: Optional[str] = None
+
+class StartupOrchestrator:
+    """Runs startup stages on worker threads as soon as their dependencies finish
+
+    Background stages are started by start(). Stages marked main_thread are
+    run by run_main_thread_stages() on the calling thread and must not depend
+    on background stages. Progress and completion callbacks may be invoked
+    from worker threads.
+    """
+
+    def __init__(self, stages: List[StartupStage], max_workers: Optional[int] = None,
+                 on_progress: Optional[Callable[[int, str], None]] = None,
+                 on_finished: Optional[Callable[[], None]] = None):
+        self.logger = logging.getLogger(__name__)
+        self.stages = {stage.name: stage for stage in stages}
+        self.on_progress = on_progress
+        self.on_finished = on_finished
+        self.results: Dict[str, Any] = {}
+        self.timings: Dict[str, StageTiming] = {}
+        self.total_weight = sum(stage.weight for stage in stages) or 1
+        self.done_weight = 0
+        self.started_at = 0.0
+        self.finished_at = 0.0
+        self._pending = set(self.stages)
+        self._submitted = set()
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="startup")
+
+        for stage in stages:
+            for dependency in stage.depends_on:
+                if dependency not in self.stages:
+                    raise ValueError(f"Stage {stage.name} depends on unknown stage {dependency}")
+
+    def start(self):
+        """Start every background stage whose dependencies are met"""
+        self.started_at = time.perf_counter()
+        if not self.stages:
+            self._finish()
+            return
+        self._submit_ready()
+
+    def run_main_thread_stages(self):
+        """Run the main-thread stages in order on the calling thread"""
+        for stage in self.stages.values():
+            if stage.main_thread:
+                with self._lock:
+                    self._submitted.add(stage.name)
+                self._run_stage(stage)
+
+    def _submit_ready(self):
+        with self._lock:
+            ready = [stage for name, stage in self.stages.items()
+                     if name in self._pending and name not in self._submitted
+                     and not stage.main_thread
+                     and all(dep not in self._pending for dep in stage.depends_on)]
+            self._submitted.update(stage.name for stage in ready)
+        for stage in ready:
+            self._executor.submit(self._run_stage, stage)
+
+    def _run_stage(self, stage: StartupStage):
+        timing = StageTiming(stage.name, threading.current_thread().name)
+        start = time.perf_counter()
+        timing.started = start - self.started_at
+        try:
+            failed = [dep for dep in stage.depends_on if not self.timings[dep].ok]
+            if failed:
+                raise RuntimeError(f"skipped, {', '.join(failed)} failed")
+            self.results[stage.name] = stage.run(self.results)
+        except Exception as e:
+            timing.ok = False
+            timing.error = str(e)
+            self.logger.error(f"Startup stage {stage.name} failed: {str(e)}")
+        timing.duration = time.perf_counter() - start
+
+        with self._lock:
+            self.timings[stage.name] = timing
+            self._pending.discard(stage.name)
+            self.done_weight += stage.weight
+            percent = int(100 * self.done_weight / self.total_weight)
+            all_done = not self._pending
+
+        self.logger.info(f"Startup stage {stage.name} took {timing.duration * 1000:.1f} ms")
+        if self.on_progress:
+            self.on_progress(percent, stage.label or stage.name)
+        if all_done:
+            self._finish()
+        else:
+            self._submit_ready()
+
+    def _finish(self):
+        self.finished_at = time.perf_counter()
+        self._done.set()
+        self._executor.shutdown(wait=False)
+        if self.on_finished:
+            self.on_finished()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until every stage has finished"""
+        return self._done.wait(timeout)
+
+    @property
+    def is_finished(self) -> bool:
+        return self._done.is_set()
+
+    def report(self) -> str:
+        """Per-stage timing table"""
+        rows = sorted(self.timings.values(), key=lambda t: t.started)
+        width = max([len("Stage")] + [len(t.name) for t in rows])
+        lines = [f"{'Stage':<{width}}  {'Thread':<14}  {'Start ms':>9}  {'Time ms':>9}  Status",
+                 "-" * (width + 50)]
+        for t in rows:
+            status = "ok" if t.ok else f"FAILED ({t.error})"
+            lines.append(f"{t.name:<{width}}  {t.thread:<14}  {t.started * 1000:>9.1f}  "
+                         f"{t.duration * 1000:>9.1f}  {status}")
+        total = (self.finished_at or time.perf_counter()) - self.started_at
+        busy = sum(t.duration for t in rows)
+        lines.append("-" * (width + 50))
+        lines.append(f"Wall time {total * 1000:.1f} ms, summed stage time {busy * 1000:.1f} ms")
+        return "\n".join(lines)
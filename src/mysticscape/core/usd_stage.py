@@ -0,0 +1,356 @@
+"""
+Streaming scene stage with change tracking
+
+Prims are cheap records (type, attributes, bounds). Heavy data lives in
+payloads, which are loaded from their asset files on first access or when
+the prim's bounds enter the viewport, and are evicted least-recently-used
+first when loaded payloads exceed the memory budget. Every edit, load and
+unload is appended to a change journal, so consumers such as the renderer
+and exporters can each fetch just the prims dirtied since they last looked.
+"""
+
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from enum import Enum
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+import numpy as np
+from mysticscape.core.lazy import lazy_import
+
+pyusd = lazy_import("pyusd")
+
+DEFAULT_MEMORY_BUDGET = 1 << 30
+DEFAULT_JOURNAL_SIZE = 100_000
+
+class ChangeKind(Enum):
+    ADDED = "added"
+    REMOVED = "removed"
+    CHANGED = "changed"
+    LOADED = "loaded"
+    UNLOADED = "unloaded"
+
+@dataclass
+class Change:
+    sequence: int
+    path: str
+    kind: ChangeKind
+    fields: Tuple[str, ...] = ()
+
+@dataclass
+class ChangeSet:
+    """Prims dirtied since a consumer last looked"""
+    paths: Set[str]
+    changes: List[Change]
+    full_resync: bool = False  # The journal was trimmed past the consumer; reprocess everything
+
+class ChangeJournal:
+    """Bounded, sequenced log of stage changes with per-consumer cursors"""
+
+    def __init__(self, max_entries: int = DEFAULT_JOURNAL_SIZE):
+        self.entries: List[Change] = []
+        self.first_sequence = 0  # Sequence number of entries[0]
+        self.next_sequence = 0
+        self.max_entries = max_entries
+        self.cursors: Dict[str, int] = {}
+        self.listeners: List[Callable[[Change], None]] = []
+
+    def append(self, path: str, kind: ChangeKind, fields: Tuple[str, ...] = ()) -> Change:
+        change = Change(self.next_sequence, path, kind, fields)
+        self.entries.append(change)
+        self.next_sequence += 1
+        if len(self.entries) > self.max_entries:
+            self.trim(len(self.entries) - self.max_entries)
+        for listener in self.listeners:
+            listener(change)
+        return change
+
+    def trim(self, count: int):
+        del self.entries[:count]
+        self.first_sequence += count
+
+    def subscribe(self, listener: Callable[[Change], None]):
+        """Call listener for every change as it happens"""
+        self.listeners.append(listener)
+
+    def register(self, consumer: str):
+        """Start tracking a consumer from the current end of the journal"""
+        self.cursors.setdefault(consumer, self.next_sequence)
+
+    def since(self, sequence: int) -> Optional[List[Change]]:
+        """Changes from sequence on, or None if they have been trimmed"""
+        if sequence < self.first_sequence:
+            return None
+        return self.entries[sequence - self.first_sequence:]
+
+    def consume(self, consumer: str) -> ChangeSet:
+        """Changes since the consumer's last call, advancing its cursor
+
+        A consumer seen for the first time gets a full resync.
+        """
+        known = consumer in self.cursors
+        self.register(consumer)
+        changes = self.since(self.cursors[consumer]) if known else None
+        self.cursors[consumer] = self.next_sequence
+        # Entries every consumer has seen are no longer needed
+        oldest = min(self.cursors.values())
+        if oldest > self.first_sequence:
+            self.trim(oldest - self.first_sequence)
+        if changes is None:
+            return ChangeSet(set(), [], full_resync=True)
+        return ChangeSet({change.path for change in changes}, changes)
+
+@dataclass
+class Payload:
+    asset_path: Path
+    data: Any = None
+    nbytes: int = 0
+    loaded: bool = False
+    load_seconds: float = 0.0
+    pending: Optional[Future] = field(default=None, repr=False, compare=False)  # Read in flight
+
+@dataclass
+class Prim:
+    path: str
+    type_name: str = "Xform"
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    bounds: Optional[Tuple[float, float, float, float, float, float]] = None  # min xyz, max xyz
+    payload: Optional[Payload] = None
+
+def estimate_nbytes(data: Any) -> int:
+    """Approximate memory held by loaded payload data"""
+    if isinstance(data, np.ndarray):
+        return data.nbytes
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return len(data)
+    if isinstance(data, dict):
+        return sys.getsizeof(data) + sum(estimate_nbytes(v) for v in data.values())
+    if isinstance(data, (list, tuple)):
+        return sys.getsizeof(data) + sum(estimate_nbytes(v) for v in data)
+    nbytes = getattr(data, "nbytes", None)
+    return nbytes if isinstance(nbytes, int) else sys.getsizeof(data)
+
+def load_numpy(path: Path) -> Any:
+    if path.suffix == ".npy":
+        return np.load(path)
+    with np.load(path) as archive:
+        return {name: archive[name] for name in archive.files}
+
+def load_usd(path: Path) -> Any:
+    return pyusd.Stage.Open(str(path))
+
+def box_region(lo, hi) -> Callable[[np.ndarray], np.ndarray]:
+    """Viewport test selecting prims whose bounds overlap an axis-aligned box"""
+    lo, hi = np.asarray(lo, dtype=np.float64), np.asarray(hi, dtype=np.float64)
+    return lambda bounds: np.all((bounds[:, :3] <= hi) & (bounds[:, 3:] >= lo), axis=1)
+
+class StreamingStage:
+    """Prim hierarchy whose payloads stream in on demand under a memory budget"""
+
+    def __init__(self, memory_budget: int = DEFAULT_MEMORY_BUDGET, backend: Any = None,
+                 loader_threads: int = 2):
+        self.logger = logging.getLogger(__name__)
+        self.backend = backend  # Underlying USD stage, when pyusd is available
+        self.memory_budget = memory_budget
+        self.prims: Dict[str, Prim] = {}
+        self.journal = ChangeJournal()
+        self.loaded: "OrderedDict[str, Payload]" = OrderedDict()  # Least recently used first
+        self.visible: Set[str] = set()
+        self.memory_used = 0
+        self.lock = threading.RLock()
+        self.loader_threads = loader_threads
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.loaders: Dict[str, Callable[[Path], Any]] = {
+            ".npz": load_numpy, ".npy": load_numpy,
+            ".usd": load_usd, ".usda": load_usd, ".usdc": load_usd,
+        }
+
+    def register_loader(self, suffix: str, loader: Callable[[Path], Any]):
+        """Load payload files ending in suffix with loader(path)"""
+        self.loaders[suffix.lower()] = loader
+
+    def define_prim(self, path: str, type_name: str = "Xform",
+                    attributes: Optional[Dict[str, Any]] = None,
+                    bounds: Optional[Tuple[float, ...]] = None,
+                    payload: Optional[Path] = None) -> Prim:
+        """Define a prim; payload names an asset file loaded on first use"""
+        with self.lock:
+            existing = self.prims.get(path)
+            if existing is not None:
+                self.unload(path)
+            prim = Prim(path, type_name, dict(attributes or {}),
+                        tuple(bounds) if bounds is not None else None,
+                        Payload(Path(payload)) if payload else None)
+            self.prims[path] = prim
+            self.journal.append(path, ChangeKind.CHANGED if existing else ChangeKind.ADDED)
+            return prim
+
+    def remove_prim(self, path: str) -> bool:
+        """Remove a prim and its descendants"""
+        with self.lock:
+            doomed = [p for p in self.prims if p == path or p.startswith(path.rstrip("/") + "/")]
+            for prim_path in doomed:
+                self.unload(prim_path)
+                del self.prims[prim_path]
+                self.visible.discard(prim_path)
+                self.journal.append(prim_path, ChangeKind.REMOVED)
+            return bool(doomed)
+
+    def set_attribute(self, path: str, name: str, value: Any):
+        with self.lock:
+            self.prims[path].attributes[name] = value
+            self.journal.append(path, ChangeKind.CHANGED, (name,))
+
+    def set_bounds(self, path: str, bounds: Tuple[float, ...]):
+        with self.lock:
+            self.prims[path].bounds = tuple(bounds)
+            self.journal.append(path, ChangeKind.CHANGED, ("bounds",))
+
+    def children(self, path: str) -> List[str]:
+        prefix = path.rstrip("/") + "/"
+        return [p for p in self.prims if p.startswith(prefix) and "/" not in p[len(prefix):]]
+
+    def get_prim(self, path: str, load: bool = True) -> Optional[Prim]:
+        """Look up a prim, streaming in its payload unless load is False"""
+        prim = self.prims.get(path)
+        if prim is not None and load and prim.payload is not None:
+            self.load(path)
+        return prim
+
+    def payload_data(self, path: str) -> Any:
+        return self.load(path).data
+
+    def load(self, path: str) -> Payload:
+        """Load a prim's payload if needed and mark it most recently used
+
+        The asset is read outside the stage lock, so background loads run
+        concurrently; a second request for the same payload waits for the first.
+        If the prim is redefined meanwhile, its new payload is loaded instead.
+        """
+        with self.lock:
+            payload = self.prims[path].payload
+            if payload is None:
+                raise ValueError(f"Prim {path} has no payload")
+            if payload.loaded:
+                self.loaded.move_to_end(path)
+                return payload
+            loader = self.loaders.get(payload.asset_path.suffix.lower())
+            if loader is None:
+                raise ValueError(f"No payload loader for {payload.asset_path}")
+            pending = payload.pending
+            owner = pending is None
+            if owner:
+                pending = payload.pending = Future()
+        if not owner:
+            pending.result()
+            return self.latest_payload(path, payload)
+
+        try:
+            start = time.perf_counter()
+            data = loader(payload.asset_path)
+            seconds = time.perf_counter() - start
+        except Exception as e:
+            with self.lock:
+                payload.pending = None
+            pending.set_exception(e)
+            raise
+
+        with self.lock:
+            payload.pending = None
+            prim = self.prims.get(path)
+            if prim is not None and prim.payload is payload:
+                payload.data, payload.load_seconds = data, seconds
+                payload.nbytes = estimate_nbytes(data)
+                payload.loaded = True
+                self.loaded[path] = payload
+                self.memory_used += payload.nbytes
+                self.journal.append(path, ChangeKind.LOADED)
+                self.logger.debug(f"Loaded payload for {path}: {payload.nbytes:,} bytes "
+                                  f"in {seconds * 1000:.1f} ms")
+                self.evict(keep=path)
+        pending.set_result(payload)
+        return self.latest_payload(path, payload)
+
+    def latest_payload(self, path: str, payload: Payload) -> Payload:
+        """payload, or the prim's current one loaded if the prim was redefined meanwhile"""
+        with self.lock:
+            prim = self.prims.get(path)
+            if prim is None or prim.payload is None or prim.payload is payload:
+                return payload
+        return self.load(path)
+
+    def unload(self, path: str) -> bool:
+        with self.lock:
+            payload = self.loaded.pop(path, None)
+            if payload is None:
+                return False
+            self.memory_used -= payload.nbytes
+            payload.data, payload.nbytes, payload.loaded = None, 0, False
+            self.journal.append(path, ChangeKind.UNLOADED)
+            return True
+
+    def evict(self, keep: Optional[str] = None) -> List[str]:
+        """Unload least recently used payloads until memory fits the budget
+
+        Payloads of prims outside the viewport go first; keep is never evicted.
+        """
+        evicted = []
+        with self.lock:
+            for visible_pass in (False, True):
+                for path in list(self.loaded):
+                    if self.memory_used <= self.memory_budget:
+                        return evicted
+                    if path != keep and (path in self.visible) == visible_pass:
+                        self.unload(path)
+                        evicted.append(path)
+        if self.memory_used > self.memory_budget:
+            self.logger.warning(f"Payload memory {self.memory_used:,} bytes exceeds budget "
+                                f"{self.memory_budget:,} after eviction")
+        return evicted
+
+    def set_memory_budget(self, budget: int):
+        self.memory_budget = budget
+        self.evict()
+
+    def memory_report(self) -> Dict[str, int]:
+        """Bytes held by each loaded payload, most recently used last"""
+        with self.lock:
+            return {path: payload.nbytes for path, payload in self.loaded.items()}
+
+    def update_viewport(self, visible: Callable[[np.ndarray], np.ndarray],
+                        background: bool = False) -> List[Any]:
+        """Stream in payloads of prims whose bounds pass the visibility test
+
+        visible receives an (N, 6) bounds array and returns a boolean mask.
+        With background=True loads run on worker threads and futures are
+        returned; otherwise the loaded payloads are.
+        """
+        with self.lock:
+            candidates = [p for p in self.prims.values()
+                          if p.payload is not None and p.bounds is not None]
+            if candidates:
+                mask = visible(np.array([p.bounds for p in candidates], dtype=np.float64))
+                self.visible = {p.path for p, shown in zip(candidates, mask) if shown}
+            else:
+                self.visible = set()
+            paths = sorted(self.visible)
+
+        if not background:
+            return [self.load(path) for path in paths]
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(self.loader_threads, thread_name_prefix="payloads")
+        return [self.executor.submit(self.load, path) for path in paths]
+
+    def consume_changes(self, consumer: str) -> ChangeSet:
+        """Prims dirtied since consumer (e.g. "renderer", "exporter") last asked"""
+        with self.lock:
+            return self.journal.consume(consumer)
+
+    def shutdown(self):
+        if self.executor:
+            self.executor.shutdown()
+            self.executor = None
@@ -0,0 +1,375 @@
+"""
+Sparse block voxel grids for volumetric effects
+
+Like VDB leaf nodes, a grid stores only the 8^3 voxel blocks it needs. A
+dense int32 table maps block coordinates to slots in a block pool, which is
+either an in-memory array or a memory-mapped file, so a 2048^3 domain costs
+64 MB of index plus 2 KB per occupied float32 block. Ray marching skips
+empty space per block and per 8^3 group of blocks, and samples whole blocks
+at a time across every ray in the batch.
+"""
+
+import argparse
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+import numpy as np
+from mysticscape.core.path_tracer import Camera
+
+BLOCK_SIZE = 8
+COARSE_SIZE = 8  # Blocks per side of an empty-space skipping tile
+MARCH_SPAN = 4 * BLOCK_SIZE  # Voxels sampled per iteration once a ray reaches data
+GROWTH_BLOCKS = 1024
+FORMAT_VERSION = 1
+
+class BlockPool:
+    """Growable (capacity, 8, 8, 8) block storage, optionally backed by a file"""
+
+    def __init__(self, dtype, path: Optional[Path] = None, capacity: int = GROWTH_BLOCKS,
+                 writable: bool = True):
+        self.dtype = np.dtype(dtype)
+        self.path = Path(path) if path else None
+        self.writable = writable
+        self.data = self.open(capacity)
+
+    @property
+    def capacity(self) -> int:
+        return len(self.data)
+
+    @property
+    def block_bytes(self) -> int:
+        return BLOCK_SIZE ** 3 * self.dtype.itemsize
+
+    def open(self, capacity: int) -> np.ndarray:
+        shape = (capacity, BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE)
+        if self.path is None:
+            return np.zeros(shape, dtype=self.dtype)
+        if self.writable:
+            # Extending the file zero-fills the new blocks
+            with open(self.path, "ab") as f:
+                if f.tell() < capacity * self.block_bytes:
+                    f.truncate(capacity * self.block_bytes)
+        return np.memmap(self.path, dtype=self.dtype, mode="r+" if self.writable else "r",
+                         shape=shape)
+
+    def reserve(self, count: int):
+        if count <= self.capacity:
+            return
+        capacity = max(count, self.capacity * 2)
+        if self.path is None:
+            data = np.zeros((capacity,) + self.data.shape[1:], dtype=self.dtype)
+            data[:self.capacity] = self.data
+            self.data = data
+        else:
+            self.data.flush()
+            self.data = self.open(capacity)
+
+    def flush(self):
+        if isinstance(self.data, np.memmap) and self.writable:
+            self.data.flush()
+
+class SparseVoxelGrid:
+    """Sparse scalar field over a (X, Y, Z) voxel domain"""
+
+    def __init__(self, shape: Tuple[int, int, int], dtype=np.float32, voxel_size: float = 1.0,
+                 origin: Tuple[float, float, float] = (0.0, 0.0, 0.0),
+                 path: Optional[Path] = None):
+        """With path, blocks are written to a memory-mapped file in that directory"""
+        self.logger = logging.getLogger(__name__)
+        self.shape = tuple(int(s) for s in shape)
+        self.voxel_size = float(voxel_size)
+        self.origin = np.asarray(origin, dtype=np.float64)
+        self.path = Path(path) if path else None
+        if self.path:
+            self.path.mkdir(parents=True, exist_ok=True)
+
+        self.index = np.full(tuple(-(-s // BLOCK_SIZE) for s in self.shape), -1, dtype=np.int32)
+        self.owners = np.zeros((0, 3), dtype=np.int32)  # Block coordinate of each pool slot
+        self.pool = BlockPool(dtype, self.path / "blocks.raw" if self.path else None)
+        self.count = 0
+        self.coarse = None  # Empty-space skipping mask, rebuilt after allocation changes
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.pool.dtype
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by occupied blocks plus the index"""
+        return self.count * self.pool.block_bytes + self.index.nbytes + self.owners.nbytes
+
+    def block_data(self) -> np.ndarray:
+        return self.pool.data[:self.count]
+
+    def allocate(self, blocks: np.ndarray) -> np.ndarray:
+        """Pool slots for (M, 3) block coordinates, allocating any that are empty"""
+        blocks = np.asarray(blocks, dtype=np.int64).reshape(-1, 3)
+        slots = self.index[tuple(blocks.T)]
+        missing = np.unique(blocks[slots < 0], axis=0)
+        if len(missing):
+            start, stop = self.count, self.count + len(missing)
+            self.pool.reserve(stop)
+            if len(self.owners) < self.pool.capacity:
+                owners = np.zeros((self.pool.capacity, 3), dtype=np.int32)
+                owners[:len(self.owners)] = self.owners
+                self.owners = owners
+            self.pool.data[start:stop] = 0  # Slots freed by prune() hold stale data
+            self.index[tuple(missing.T)] = np.arange(start, stop, dtype=np.int32)
+            self.owners[start:stop] = missing
+            self.count = stop
+            self.coarse = None
+            slots = self.index[tuple(blocks.T)]
+        return slots
+
+    def set_values(self, coords: np.ndarray, values):
+        """Write values at (N, 3) integer voxel coordinates"""
+        coords = np.asarray(coords, dtype=np.int64).reshape(-1, 3)
+        slots = self.allocate(coords // BLOCK_SIZE)
+        local = coords % BLOCK_SIZE
+        self.pool.data[slots, local[:, 0], local[:, 1], local[:, 2]] = values
+
+    def get_values(self, coords: np.ndarray) -> np.ndarray:
+        """Values at (N, 3) integer voxel coordinates; 0 in empty blocks"""
+        coords = np.asarray(coords, dtype=np.int64).reshape(-1, 3)
+        slots = self.index[tuple((coords // BLOCK_SIZE).T)]
+        local = coords % BLOCK_SIZE
+        values = np.zeros(len(coords), dtype=np.float32)
+        stored = slots >= 0
+        values[stored] = self.pool.data[slots[stored], local[stored, 0], local[stored, 1],
+                                        local[stored, 2]]
+        return values
+
+    def fill(self, density: Callable[[np.ndarray], np.ndarray], blocks: np.ndarray,
+             threshold: float = 0.0, batch: int = 512):
+        """Evaluate density over candidate blocks, storing those that exceed threshold
+
+        density receives world-space voxel centers as (3, M, 8, 8, 8) and
+        returns (M, 8, 8, 8) values.
+        """
+        blocks = np.asarray(blocks, dtype=np.int64).reshape(-1, 3)
+        inside = np.all((blocks >= 0) & (blocks < self.index.shape), axis=1)
+        blocks = blocks[inside]
+        local = np.indices((BLOCK_SIZE,) * 3)
+        for start in range(0, len(blocks), batch):
+            chunk = blocks[start:start + batch]
+            voxels = chunk.T[:, :, None, None, None] * BLOCK_SIZE + local[:, None]
+            world = self.origin[:, None, None, None, None] + (voxels + 0.5) * self.voxel_size
+            values = density(world)
+            keep = values.reshape(len(chunk), -1).max(axis=1) > threshold
+            if keep.any():
+                slots = self.allocate(chunk[keep])
+                self.pool.data[slots] = values[keep]
+
+    def prune(self, threshold: float = 0.0) -> int:
+        """Free blocks whose values never exceed threshold; returns how many"""
+        if not self.count:
+            return 0
+        data = self.block_data().reshape(self.count, -1)
+        empty = np.flatnonzero(data.max(axis=1) <= threshold)
+        if not len(empty):
+            return 0
+        survivors = self.count - len(empty)
+        holes = empty[empty < survivors]
+        tail = np.arange(survivors, self.count)
+        movers = np.setdiff1d(tail, empty, assume_unique=True)
+
+        self.index[tuple(self.owners[empty].T)] = -1
+        self.pool.data[holes] = self.pool.data[movers]
+        self.owners[holes] = self.owners[movers]
+        self.index[tuple(self.owners[holes].T)] = holes
+        self.count = survivors
+        self.coarse = None
+        return len(empty)
+
+    def coarse_occupancy(self) -> np.ndarray:
+        """True for each 8^3 group of blocks holding at least one block"""
+        if self.coarse is None:
+            padded = tuple(-(-s // COARSE_SIZE) * COARSE_SIZE for s in self.index.shape)
+            occupied = np.zeros(padded, dtype=bool)
+            occupied[tuple(slice(0, s) for s in self.index.shape)] = self.index >= 0
+            cx, cy, cz = (s // COARSE_SIZE for s in padded)
+            self.coarse = occupied.reshape(cx, COARSE_SIZE, cy, COARSE_SIZE, cz, COARSE_SIZE
+                                           ).any(axis=(1, 3, 5))
+        return self.coarse
+
+    def march(self, origins: np.ndarray, directions: np.ndarray, step: float = 1.0,
+              sigma: float = 0.05, color=(1.0, 1.0, 1.0),
+              min_transmittance: float = 0.01) -> Tuple[np.ndarray, np.ndarray]:
+        """Emission-absorption ray march of world-space (3, N) rays
+
+        step is in voxels and sigma is extinction per voxel of unit density.
+        Returns radiance (3, N) and transmittance (N,).
+        """
+        count = origins.shape[1]
+        o = (origins - self.origin[:, None]) / self.voxel_size
+        d = directions / np.linalg.norm(directions, axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            inv_d = np.where(d != 0.0, 1.0 / d, np.inf)
+            upper = np.asarray(self.shape, dtype=np.float64)[:, None]
+            t_lo, t_hi = -o * inv_d, (upper - o) * inv_d
+            t_enter = np.fmax.reduce(np.fmin(t_lo, t_hi), axis=0)
+            t_exit = np.fmin.reduce(np.fmax(t_lo, t_hi), axis=0)
+        t = np.maximum(np.nan_to_num(t_enter, nan=0.0), 0.0) + 1e-4
+        t_exit = np.nan_to_num(t_exit, nan=-1.0)
+
+        coarse = self.coarse_occupancy()
+        transmittance = np.ones(count)
+        accumulated = np.zeros(count)
+        samples = max(1, int(MARCH_SPAN / step))
+        offsets = step * np.arange(samples)
+        limit = np.asarray(self.shape) - 1
+        voxels = self.pool.data.reshape(-1)
+
+        active = np.flatnonzero((t < t_exit) & (self.count > 0))
+        while len(active):
+            p = o[:, active] + d[:, active] * t[active]
+            voxel = np.clip(np.floor(p).astype(np.int64), 0, limit[:, None])
+            block = voxel // BLOCK_SIZE
+            coarse_empty = ~coarse[tuple(block // COARSE_SIZE)]
+            empty = coarse_empty | (self.index[tuple(block)] < 0)
+
+            # Jump to the far side of the empty block, or of the coarse tile if it is empty too
+            skip = active[empty]
+            size = np.where(coarse_empty[empty], BLOCK_SIZE * COARSE_SIZE, BLOCK_SIZE)
+            far = (voxel[:, empty] // size) * size + np.where(d[:, skip] > 0.0, size, 0)
+            with np.errstate(invalid="ignore"):
+                cell_exit = np.nan_to_num((far - o[:, skip]) * inv_d[:, skip], nan=np.inf).min(axis=0)
+            t[skip] = np.maximum(np.minimum(cell_exit, t_exit[skip]), t[skip]) + 1e-4
+
+            # Rays in an occupied block march a span of several blocks in one go;
+            # samples that land in empty blocks read as zero density
+            occupied = ~empty
+            if occupied.any():
+                rays = active[occupied]
+                ts = t[rays][:, None] + offsets
+                valid = ts < t_exit[rays][:, None]
+                points = (o[:, rays, None] + d[:, rays, None] * ts).astype(np.float32)
+                voxel = np.clip(points, 0, limit[:, None, None]).astype(np.int64)
+                slots = self.index[voxel[0] // BLOCK_SIZE, voxel[1] // BLOCK_SIZE,
+                                   voxel[2] // BLOCK_SIZE].astype(np.int64)
+                local = voxel % BLOCK_SIZE
+                flat = ((slots * BLOCK_SIZE + local[0]) * BLOCK_SIZE + local[1]) * BLOCK_SIZE + local[2]
+                density = np.where(valid & (slots >= 0), voxels.take(np.maximum(flat, 0)), 0.0)
+
+                # Constant color makes the front-to-back sum telescope: only optical depth matters
+                absorbed = np.exp(-sigma * step * density.sum(axis=1))
+                accumulated[rays] += transmittance[rays] * (1.0 - absorbed)
+                transmittance[rays] *= absorbed
+                t[rays] += step * samples
+
+            active = active[(t[active] < t_exit[active]) & (transmittance[active] > min_transmittance)]
+
+        radiance = np.asarray(color, dtype=np.float64)[:, None] * accumulated
+        return radiance, transmittance
+
+    def render(self, camera: Camera, background=(0.0, 0.0, 0.0), **march_options) -> np.ndarray:
+        """Ray-march a float32 (height, width, 3) image, one ray per pixel"""
+        rng = np.random.default_rng(0)
+        origins, directions, _ = camera.generate_rays(0, 0, camera.width, camera.height, 1, rng)
+        radiance, transmittance = self.march(origins, directions, **march_options)
+        radiance += np.asarray(background, dtype=np.float64)[:, None] * transmittance
+        return radiance.T.reshape(camera.height, camera.width, 3).astype(np.float32)
+
+    def save(self, path: Optional[Path] = None):
+        """Write the grid to a directory that open() can memory-map"""
+        path = Path(path) if path else self.path
+        if path is None:
+            raise ValueError("No path to save the voxel grid to")
+        path.mkdir(parents=True, exist_ok=True)
+        if path == self.path:
+            self.pool.flush()
+        else:
+            self.block_data().tofile(path / "blocks.raw")
+        np.save(path / "index.npy", self.index)
+        np.save(path / "owners.npy", self.owners[:self.count])
+        metadata = {"version": FORMAT_VERSION, "shape": self.shape, "dtype": self.dtype.str,
+                    "count": self.count, "voxel_size": self.voxel_size,
+                    "origin": self.origin.tolist()}
+        with open(path / "grid.json", "w", encoding="utf-8") as f:
+            json.dump(metadata, f)
+
+    @classmethod
+    def open(cls, path: Path, writable: bool = False) -> 'SparseVoxelGrid':
+        """Memory-map a saved grid; blocks are paged in as rays touch them"""
+        path = Path(path)
+        with open(path / "grid.json", "r", encoding="utf-8") as f:
+            metadata = json.load(f)
+        if metadata.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported voxel grid version in {path}")
+
+        grid = cls.__new__(cls)
+        grid.logger = logging.getLogger(__name__)
+        grid.shape = tuple(metadata["shape"])
+        grid.voxel_size = metadata["voxel_size"]
+        grid.origin = np.asarray(metadata["origin"], dtype=np.float64)
+        grid.path = path if writable else None
+        grid.index = np.load(path / "index.npy", mmap_mode="r+" if writable else "r")
+        grid.owners = np.load(path / "owners.npy")
+        grid.count = metadata["count"]
+        grid.pool = BlockPool(metadata["dtype"], path / "blocks.raw", max(grid.count, 1), writable)
+        grid.coarse = None
+        return grid
+
+def sphere_blocks(center, radius: float, grid: SparseVoxelGrid) -> np.ndarray:
+    """Block coordinates that may overlap a world-space sphere"""
+    center = (np.asarray(center, dtype=np.float64) - grid.origin) / grid.voxel_size
+    radius = radius / grid.voxel_size
+    lo = np.maximum(np.floor((center - radius) / BLOCK_SIZE).astype(int), 0)
+    hi = np.minimum(np.floor((center + radius) / BLOCK_SIZE).astype(int) + 1, grid.index.shape)
+    blocks = np.stack(np.meshgrid(*[np.arange(a, b) for a, b in zip(lo, hi)], indexing="ij"),
+                      axis=-1).reshape(-1, 3)
+    centers = (blocks + 0.5) * BLOCK_SIZE
+    reach = radius + BLOCK_SIZE * np.sqrt(3.0) / 2.0
+    return blocks[np.linalg.norm(centers - center, axis=1) <= reach]
+
+def cloud_density(center, radius: float, frequency: float = 0.05) -> Callable[[np.ndarray], np.ndarray]:
+    """Soft-edged, lumpy sphere of density, for tests and benchmarks"""
+    center = np.asarray(center, dtype=np.float64)
+
+    def density(points: np.ndarray) -> np.ndarray:
+        offset = points - center.reshape(3, *([1] * (points.ndim - 1)))
+        distance = np.sqrt(np.sum(offset * offset, axis=0))
+        falloff = np.clip((radius - distance) / (0.3 * radius), 0.0, 1.0)
+        lumps = np.sin(points[0] * frequency) * np.sin(points[1] * frequency * 1.3) \
+            * np.sin(points[2] * frequency * 0.7)
+        return (falloff * (0.6 + 0.4 * lumps)).astype(np.float32)
+    return density
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sparse voxel grid benchmark")
+    parser.add_argument("--resolution", type=int, default=2048)
+    parser.add_argument("--radius", type=float, default=160.0, help="cloud radius in voxels")
+    parser.add_argument("--width", type=int, default=160)
+    parser.add_argument("--height", type=int, default=90)
+    parser.add_argument("--dtype", default="float16")
+    parser.add_argument("--storage", type=Path, default=None,
+                        help="directory to build the grid in and reopen it from")
+    args = parser.parse_args(argv)
+
+    size = args.resolution
+    grid = SparseVoxelGrid((size, size, size), dtype=args.dtype, path=args.storage)
+    start = time.perf_counter()
+    for center in [(0.5, 0.5, 0.5), (0.42, 0.55, 0.5), (0.6, 0.48, 0.55)]:
+        world = np.asarray(center) * size
+        grid.fill(cloud_density(world, args.radius), sphere_blocks(world, args.radius, grid))
+    print(f"Built {grid.count:,} blocks in {time.perf_counter() - start:.1f}s, "
+          f"{grid.nbytes / 2 ** 30:.2f} GiB")
+
+    if args.storage:
+        grid.save()
+        grid = SparseVoxelGrid.open(args.storage)
+        print(f"Reopened memory-mapped grid from {args.storage}")
+
+    camera = Camera(position=(size * 0.5, size * 0.55, size * 0.5 + args.radius * 4),
+                    target=(size * 0.5, size * 0.5, size * 0.5),
+                    width=args.width, height=args.height)
+    for frame in range(3):
+        start = time.perf_counter()
+        grid.render(camera, background=(0.2, 0.3, 0.5), step=1.0)
+        print(f"Frame {frame}: {(time.perf_counter() - start) * 1000:.0f} ms "
+              f"for {args.width}x{args.height} rays")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Vectorized layer compositing engine for the 2D workspace
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Sequence, Tuple
+import numpy as np
+from PyQt6.QtGui import QImage
+
+# Format_ARGB32 is stored as BGRA bytes on little-endian machines
+ALPHA = 3
+COLOR = slice(0, 3)
+
+BAND_ROWS = 64
+
+def _normal(backdrop: np.ndarray, source: np.ndarray) -> np.ndarray:
+    return source
+
+def _multiply(backdrop: np.ndarray, source: np.ndarray) -> np.ndarray:
+    return backdrop * source
+
+def _screen(backdrop: np.ndarray, source: np.ndarray) -> np.ndarray:
+    return backdrop + source - backdrop * source
+
+def _overlay(backdrop: np.ndarray, source: np.ndarray) -> np.ndarray:
+    return np.where(backdrop <= 0.5,
+                    2.0 * backdrop * source,
+                    1.0 - 2.0 * (1.0 - backdrop) * (1.0 - source))
+
+def _add(backdrop: np.ndarray, source: np.ndarray) -> np.ndarray:
+    return np.minimum(backdrop + source, 1.0)
+
+BLEND_MODES: Dict[str, Callable[[np.ndarray, np.ndarray], np.ndarray]] = {
+    "normal": _normal,
+    "multiply": _multiply,
+    "screen": _screen,
+    "overlay": _overlay,
+    "add": _add,
+}
+
+# (pixels, opacity, blend_mode) for one source layer
+CompositeSource = Tuple[np.ndarray, float, str]
+
+def image_view(image: QImage, writable: bool = True) -> np.ndarray:
+    """Return a zero-copy (height, width, 4) uint8 view of a 32-bit QImage
+
+    The view aliases the image buffer, so the image must outlive it.
+    """
+    if image.depth() != 32:
+        raise ValueError(f"Expected a 32-bit image, got depth {image.depth()}")
+    bits = image.bits() if writable else image.constBits()
+    bits.setsize(image.sizeInBytes())
+    buffer = np.frombuffer(bits, dtype=np.uint8)
+    rows = buffer.reshape(image.height(), image.bytesPerLine() // 4, 4)
+    return rows[:, :image.width()]
+
+class Compositor:
+    """Blends layer stacks with premultiplied alpha, split into row bands"""
+
+    def __init__(self, max_workers: Optional[int] = None, band_rows: int = BAND_ROWS):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.band_rows = band_rows
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix="compositor")
+        return self._executor
+
+    def composite(self, sources: Sequence[CompositeSource], out: np.ndarray,
+                  parallel: bool = True):
+        """Composite sources bottom-to-top into out (straight-alpha BGRA uint8)"""
+        for _, _, blend_mode in sources:
+            if blend_mode not in BLEND_MODES:
+                raise ValueError(f"Unsupported blend mode: {blend_mode}")
+
+        self.run_bands(out.shape[0],
+                       lambda start, stop: self._composite_band(sources, out, start, stop),
+                       parallel)
+
+    def run_bands(self, height: int, band_fn: Callable[[int, int], None],
+                  parallel: bool = True):
+        """Call band_fn(start, stop) for each row band, spread over the pool"""
+        bands = [(start, min(start + self.band_rows, height))
+                 for start in range(0, height, self.band_rows)]
+        if not parallel or self.max_workers == 1 or len(bands) == 1:
+            for start, stop in bands:
+                band_fn(start, stop)
+            return
+
+        # NumPy releases the GIL for large array operations, so bands
+        # blend concurrently on separate cores
+        futures = [self.executor.submit(band_fn, start, stop) for start, stop in bands]
+        for future in futures:
+            future.result()
+
+    def composite_premultiplied(self, sources: Sequence[CompositeSource],
+                                start: int, stop: int, width: int,
+                                color: Optional[np.ndarray] = None,
+                                alpha: Optional[np.ndarray] = None
+                                ) -> Tuple[np.ndarray, np.ndarray]:
+        """Blend sources over a premultiplied float backdrop for rows start:stop"""
+        rows = stop - start
+        if color is None:
+            color = np.zeros((rows, width, 3), dtype=np.float32)
+        if alpha is None:
+            alpha = np.zeros((rows, width, 1), dtype=np.float32)
+
+        for pixels, opacity, blend_mode in sources:
+            if opacity <= 0.0:
+                continue
+            band = pixels[start:min(stop, pixels.shape[0]), :width]
+            if band.size == 0:
+                continue
+            h, w = band.shape[:2]
+            dst_color = color[:h, :w]
+            dst_alpha = alpha[:h, :w]
+
+            src = band.astype(np.float32) * (1.0 / 255.0)
+            src_alpha = src[..., ALPHA:ALPHA + 1] * opacity
+            src_color = src[..., COLOR]
+
+            if blend_mode == "normal":
+                dst_color *= 1.0 - src_alpha
+                dst_color += src_color * src_alpha
+            else:
+                backdrop = np.divide(dst_color, dst_alpha,
+                                     out=np.zeros_like(dst_color),
+                                     where=dst_alpha > 0)
+                blended = BLEND_MODES[blend_mode](backdrop, src_color)
+                dst_color[...] = (src_color * src_alpha * (1.0 - dst_alpha)
+                                  + dst_color * (1.0 - src_alpha)
+                                  + src_alpha * dst_alpha * blended)
+            dst_alpha *= 1.0 - src_alpha
+            dst_alpha += src_alpha
+
+        return color, alpha
+
+    def _composite_band(self, sources: Sequence[CompositeSource], out: np.ndarray,
+                        start: int, stop: int):
+        color, alpha = self.composite_premultiplied(sources, start, stop, out.shape[1])
+        store_straight(color, alpha, out[start:stop])
+
+    def shutdown(self):
+        """Stop the worker threads"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+def store_straight(color: np.ndarray, alpha: np.ndarray, out: np.ndarray):
+    """Un-premultiply float color/alpha into a straight-alpha uint8 buffer"""
+    straight = np.divide(color, alpha, out=np.zeros_like(color), where=alpha > 0)
+    np.clip(straight * 255.0 + 0.5, 0, 255, out=straight)
+    out[..., COLOR] = straight
+    out[..., ALPHA] = (alpha[..., 0] * 255.0 + 0.5).astype(np.uint8)
+
+_default_compositor: Optional[Compositor] = None
+
+def get_compositor() -> Compositor:
+    """Return the shared compositor instance"""
+    global _default_compositor
+    if _default_compositor is None:
+        _default_compositor = Compositor()
+    return _default_compositor
@@ -0,0 +1,291 @@
+"""
+Retained-mode OpenGL rendering with vertex buffers and a small shader
+"""
+
+import ctypes
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.GL import shaders
+
+VERTEX_SHADER = """
+#version 120
+attribute vec3 a_position;
+attribute vec3 a_color;
+attribute vec3 a_normal;
+uniform mat4 u_model;
+uniform bool u_lit;
+uniform bool u_pick;
+uniform vec3 u_pick_color;
+varying vec3 v_color;
+
+void main() {
+    gl_Position = gl_ModelViewProjectionMatrix * (u_model * vec4(a_position, 1.0));
+    if (u_pick) {
+        v_color = u_pick_color;
+    } else if (u_lit) {
+        vec3 normal = normalize(gl_NormalMatrix * (mat3(u_model) * a_normal));
+        float diffuse = max(dot(normal, normalize(vec3(0.4, 0.7, 0.6))), 0.0);
+        v_color = a_color * (0.25 + 0.75 * diffuse);
+    } else {
+        v_color = a_color;
+    }
+}
+"""
+
+FRAGMENT_SHADER = """
+#version 120
+varying vec3 v_color;
+
+void main() {
+    gl_FragColor = vec4(v_color, 1.0);
+}
+"""
+
+# Interleaved vertex layout: position, color, normal
+FLOATS_PER_VERTEX = 9
+STRIDE = FLOATS_PER_VERTEX * 4
+ATTRIBUTES = (("a_position", 0), ("a_color", 12), ("a_normal", 24))
+
+def triangulate(faces: np.ndarray) -> np.ndarray:
+    """Fan-triangulate an (N, k) array of polygon indices into (M, 3) triangles"""
+    faces = np.asarray(faces, dtype=np.uint32)
+    if faces.ndim != 2 or faces.shape[1] < 3:
+        raise ValueError(f"Expected (N, k>=3) faces, got shape {faces.shape}")
+    corners = faces.shape[1]
+    if corners == 3:
+        return faces
+    fan = np.arange(1, corners - 1)
+    triangles = np.stack([np.repeat(faces[:, :1], corners - 2, axis=1),
+                          faces[:, fan], faces[:, fan + 1]], axis=2)
+    return triangles.reshape(-1, 3)
+
+def vertex_normals(positions: np.ndarray, triangles: np.ndarray) -> np.ndarray:
+    """Area-weighted per-vertex normals for an indexed triangle mesh"""
+    corners = positions[triangles]
+    face_normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    normals = np.zeros_like(positions)
+    for corner in range(3):
+        np.add.at(normals, triangles[:, corner], face_normals)
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    return np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+
+def interleave(positions: np.ndarray, colors=None, normals=None) -> np.ndarray:
+    """Pack positions, colors and normals into one contiguous float32 array"""
+    positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+    data = np.zeros((len(positions), FLOATS_PER_VERTEX), dtype=np.float32)
+    data[:, 0:3] = positions
+    data[:, 3:6] = 1.0 if colors is None else np.asarray(colors, dtype=np.float32)
+    if normals is not None:
+        data[:, 6:9] = normals
+    return data
+
+class ShaderProgram:
+    """The shared flat/lambert shader used by retained-mode meshes"""
+
+    def __init__(self):
+        self.program = shaders.compileProgram(
+            shaders.compileShader(VERTEX_SHADER, GL_VERTEX_SHADER),
+            shaders.compileShader(FRAGMENT_SHADER, GL_FRAGMENT_SHADER),
+        )
+        self.attributes = {name: glGetAttribLocation(self.program, name)
+                           for name, _ in ATTRIBUTES}
+        self.u_model = glGetUniformLocation(self.program, "u_model")
+        self.u_lit = glGetUniformLocation(self.program, "u_lit")
+        self.u_pick = glGetUniformLocation(self.program, "u_pick")
+        self.u_pick_color = glGetUniformLocation(self.program, "u_pick_color")
+
+    def use(self):
+        glUseProgram(self.program)
+
+    def release(self):
+        glDeleteProgram(self.program)
+
+class MeshBuffer:
+    """Geometry kept on the GPU and re-uploaded only when it changes"""
+
+    def __init__(self, mode=GL_TRIANGLES, lit: bool = True):
+        self.mode = mode
+        self.lit = lit
+        self.visible = True
+        self.model = np.identity(4, dtype=np.float32)
+        self.vertex_data: Optional[np.ndarray] = None
+        self.indices: Optional[np.ndarray] = None
+        self.dirty = False
+        self.vao = None
+        self.vbo = None
+        self.ebo = None
+        self.count = 0
+
+    @classmethod
+    def from_arrays(cls, positions, colors=None, normals=None, indices=None,
+                    mode=GL_TRIANGLES, lit: bool = True) -> 'MeshBuffer':
+        mesh = cls(mode, lit)
+        mesh.set_geometry(positions, colors, normals, indices)
+        return mesh
+
+    @classmethod
+    def from_faces(cls, vertices, faces, color=(0.8, 0.8, 0.8)) -> 'MeshBuffer':
+        """Build a lit triangle mesh from vertices and polygon faces"""
+        positions = np.asarray(vertices, dtype=np.float32).reshape(-1, 3)
+        triangles = triangulate(faces)
+        colors = np.broadcast_to(np.asarray(color, dtype=np.float32), positions.shape)
+        return cls.from_arrays(positions, colors, vertex_normals(positions, triangles),
+                               triangles)
+
+    def set_geometry(self, positions, colors=None, normals=None, indices=None):
+        """Replace the mesh data; the upload happens on the next draw"""
+        self.vertex_data = interleave(positions, colors, normals)
+        self.indices = (None if indices is None
+                        else np.ascontiguousarray(indices, dtype=np.uint32).ravel())
+        self.count = len(self.indices) if self.indices is not None else len(self.vertex_data)
+        self.dirty = True
+
+    def upload(self, program: ShaderProgram):
+        """Copy the vertex and index arrays into GPU buffers"""
+        if self.vao is None:
+            self.vao = glGenVertexArrays(1)
+            self.vbo = glGenBuffers(1)
+        glBindVertexArray(self.vao)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, self.vertex_data.nbytes, self.vertex_data, GL_STATIC_DRAW)
+        for name, offset in ATTRIBUTES:
+            location = program.attributes[name]
+            if location >= 0:
+                glEnableVertexAttribArray(location)
+                glVertexAttribPointer(location, 3, GL_FLOAT, GL_FALSE, STRIDE,
+                                      ctypes.c_void_p(offset))
+        if self.indices is not None:
+            if self.ebo is None:
+                self.ebo = glGenBuffers(1)
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ebo)
+            glBufferData(GL_ELEMENT_ARRAY_BUFFER, self.indices.nbytes, self.indices, GL_STATIC_DRAW)
+        glBindVertexArray(0)
+        self.dirty = False
+
+    def draw(self, program: ShaderProgram, model: Optional[np.ndarray] = None):
+        """Issue a single draw call for the whole mesh, optionally at another transform"""
+        if self.vertex_data is None or self.count == 0:
+            return
+        if self.dirty:
+            self.upload(program)
+        glUniformMatrix4fv(program.u_model, 1, GL_TRUE, self.model if model is None else model)
+        glUniform1i(program.u_lit, int(self.lit))
+        glBindVertexArray(self.vao)
+        if self.indices is not None:
+            glDrawElements(self.mode, self.count, GL_UNSIGNED_INT, None)
+        else:
+            glDrawArrays(self.mode, 0, self.count)
+        glBindVertexArray(0)
+
+    def release(self):
+        """Free the GPU buffers (needs a current GL context)"""
+        if self.vao is not None:
+            glDeleteVertexArrays(1, [self.vao])
+            glDeleteBuffers(1, [self.vbo])
+            if self.ebo is not None:
+                glDeleteBuffers(1, [self.ebo])
+        self.vao = self.vbo = self.ebo = None
+        self.dirty = self.vertex_data is not None
+
+@dataclass
+class SharedMesh:
+    """GPU buffers for one source mesh and its LODs, drawn by many instances"""
+    levels: List[MeshBuffer]
+    users: int = 0
+    source: Any = None  # Keeps identity-keyed source arrays alive while cached
+
+# A mesh drawn at a per-instance model matrix
+Instance = Tuple[MeshBuffer, np.ndarray]
+
+class RetainedRenderer:
+    """Named collection of GPU meshes drawn with one shader"""
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.program: Optional[ShaderProgram] = None
+        self.meshes: Dict[str, MeshBuffer] = {}
+        self.shared: Dict[Hashable, SharedMesh] = {}
+        self._released: List[MeshBuffer] = []
+
+    def initialize(self):
+        """Compile the shader program (needs a current GL context)"""
+        self.program = ShaderProgram()
+        for mesh in self.all_meshes():
+            mesh.dirty = mesh.vertex_data is not None
+
+    def all_meshes(self) -> List[MeshBuffer]:
+        return list(self.meshes.values()) + [mesh for shared in self.shared.values()
+                                             for mesh in shared.levels]
+
+    def add_mesh(self, name: str, mesh: MeshBuffer) -> MeshBuffer:
+        """Add or replace a mesh; may be called without a GL context"""
+        if old := self.meshes.get(name):
+            self._released.append(old)
+        self.meshes[name] = mesh
+        return mesh
+
+    def remove_mesh(self, name: str):
+        """Remove a mesh; its buffers are freed on the next draw"""
+        if mesh := self.meshes.pop(name, None):
+            self._released.append(mesh)
+
+    def acquire_shared(self, key: Hashable, build: Callable[[], List[MeshBuffer]],
+                       source: Any = None) -> List[MeshBuffer]:
+        """LOD meshes for key, built on first use and shared by every later user"""
+        shared = self.shared.get(key)
+        if shared is None:
+            shared = self.shared[key] = SharedMesh(build(), source=source)
+        shared.users += 1
+        return shared.levels
+
+    def drop_shared(self, key: Hashable):
+        """Give up one use of shared meshes; the last user frees their buffers"""
+        shared = self.shared.get(key)
+        if shared is None:
+            return
+        shared.users -= 1
+        if shared.users <= 0:
+            del self.shared[key]
+            self._released.extend(shared.levels)
+
+    def draw(self, names: Optional[List[str]] = None, instances: Iterable[Instance] = ()):
+        """Draw every visible named mesh, or only the named ones, then the instances"""
+        if self.program is None:
+            return
+        for mesh in self._released:
+            mesh.release()
+        self._released.clear()
+
+        self.program.use()
+        meshes = self.meshes.values() if names is None else \
+            [self.meshes[name] for name in names if name in self.meshes]
+        for mesh in meshes:
+            if mesh.visible:
+                mesh.draw(self.program)
+        for mesh, model in instances:
+            mesh.draw(self.program, model)
+        glUseProgram(0)
+
+    def draw_ids(self, instances: List[Instance], colors: np.ndarray):
+        """Draw instances in flat ID colors for picking"""
+        if self.program is None:
+            return
+        self.program.use()
+        glUniform1i(self.program.u_pick, 1)
+        for (mesh, model), color in zip(instances, colors):
+            glUniform3f(self.program.u_pick_color, *color)
+            mesh.draw(self.program, model)
+        glUniform1i(self.program.u_pick, 0)
+        glUseProgram(0)
+
+    def release(self):
+        """Free every GPU resource (needs a current GL context)"""
+        for mesh in self.all_meshes() + self._released:
+            mesh.release()
+        self._released.clear()
+        if self.program is not None:
+            self.program.release()
+            self.program = None
@@ -0,0 +1,175 @@
+"""
+Patch-based undo/redo history for 2D canvases
+"""
+
+import zlib
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional, Tuple
+from PyQt6.QtGui import QImage, QPainter
+from PyQt6.QtCore import QRect
+from mysticscape.tools.tiles import TileGrid
+
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024  # 256 MB of compressed patches
+
+@dataclass
+class Patch:
+    """Compressed pixels for one rectangle of the canvas"""
+    rect: QRect
+    bytes_per_line: int
+    format: QImage.Format
+    data: bytes
+
+    @classmethod
+    def from_image(cls, image: QImage, rect: QRect, level: int) -> 'Patch':
+        """Compress the pixels of image inside rect"""
+        return cls.from_region(image.copy(rect), rect, level)
+
+    @classmethod
+    def from_region(cls, region: QImage, rect: QRect, level: int) -> 'Patch':
+        """Compress an already cropped image that belongs at rect"""
+        bits = region.constBits()
+        bits.setsize(region.sizeInBytes())
+        return cls(QRect(rect), region.bytesPerLine(), region.format(),
+                   zlib.compress(bytes(bits), level))
+
+    def to_image(self) -> QImage:
+        """Decompress the patch back into a standalone image"""
+        raw = zlib.decompress(self.data)
+        return QImage(raw, self.rect.width(), self.rect.height(),
+                      self.bytes_per_line, self.format).copy()
+
+    def apply(self, image: QImage):
+        """Write the patch pixels back into image"""
+        painter = QPainter(image)
+        painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Source)
+        painter.drawImage(self.rect.topLeft(), self.to_image())
+        painter.end()
+
+@dataclass
+class HistoryEntry:
+    before: Patch
+    after: Patch
+
+    @property
+    def rect(self) -> QRect:
+        return self.before.rect
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.before.data) + len(self.after.data)
+
+class PatchHistory:
+    """Undo/redo engine that stores only the area each stroke changed
+
+    Tiles are captured lazily the first time a stroke touches them, so
+    beginning a stroke costs nothing. When the stroke ends the captured
+    tiles are cropped to the stroke's bounding box and compressed.
+    """
+
+    def __init__(self, tiles: TileGrid, memory_budget: int = DEFAULT_MEMORY_BUDGET,
+                 compression_level: int = 1):
+        self.tiles = tiles
+        self.memory_budget = memory_budget
+        self.compression_level = compression_level
+        self.undo_stack: Deque[HistoryEntry] = deque()
+        self.redo_stack: Deque[HistoryEntry] = deque()
+        self.memory_used = 0
+        self._captured: Dict[Tuple[int, int], QImage] = {}
+        self._stroke_rect = QRect()
+        self._recording = False
+
+    def begin_stroke(self):
+        """Start recording a new stroke"""
+        self._captured.clear()
+        self._stroke_rect = QRect()
+        self._recording = True
+
+    def capture(self, image: QImage, rect: QRect):
+        """Save original pixels of any tile in rect before it is drawn on"""
+        if not self._recording:
+            return
+        rect = rect.intersected(self.tiles.bounds())
+        if rect.isEmpty():
+            return
+        for tile in self.tiles.tiles_in_rect(rect):
+            if tile not in self._captured:
+                self._captured[tile] = image.copy(self.tiles.tile_rect(*tile))
+        self._stroke_rect = self._stroke_rect.united(rect)
+
+    def end_stroke(self, image: QImage) -> bool:
+        """Finish the stroke and push its patch onto the undo stack"""
+        if not self._recording:
+            return False
+        self._recording = False
+        if self._stroke_rect.isEmpty():
+            self._captured.clear()
+            return False
+
+        bounds = self._stroke_rect
+        before_image = image.copy(bounds)
+        painter = QPainter(before_image)
+        painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Source)
+        for tile, original in self._captured.items():
+            tile_rect = self.tiles.tile_rect(*tile)
+            overlap = tile_rect.intersected(bounds)
+            painter.drawImage(overlap.topLeft() - bounds.topLeft(), original,
+                              overlap.translated(-tile_rect.topLeft()))
+        painter.end()
+        self._captured.clear()
+
+        level = self.compression_level
+        entry = HistoryEntry(Patch.from_region(before_image, bounds, level),
+                             Patch.from_image(image, bounds, level))
+
+        self._drop(self.redo_stack)
+        self.undo_stack.append(entry)
+        self.memory_used += entry.nbytes
+        self.enforce_budget()
+        return True
+
+    def undo(self, image: QImage) -> Optional[QRect]:
+        """Restore the state before the last stroke, returning the changed area"""
+        if not self.undo_stack:
+            return None
+        entry = self.undo_stack.pop()
+        entry.before.apply(image)
+        self.redo_stack.append(entry)
+        return entry.rect
+
+    def redo(self, image: QImage) -> Optional[QRect]:
+        """Reapply the last undone stroke, returning the changed area"""
+        if not self.redo_stack:
+            return None
+        entry = self.redo_stack.pop()
+        entry.after.apply(image)
+        self.undo_stack.append(entry)
+        return entry.rect
+
+    def enforce_budget(self):
+        """Evict the least recently used entries until under the memory budget"""
+        while self.memory_used > self.memory_budget and self.undo_stack:
+            self.memory_used -= self.undo_stack.popleft().nbytes
+        while self.memory_used > self.memory_budget and self.redo_stack:
+            self.memory_used -= self.redo_stack.popleft().nbytes
+
+    def set_memory_budget(self, memory_budget: int):
+        """Change the memory budget, evicting entries if needed"""
+        self.memory_budget = memory_budget
+        self.enforce_budget()
+
+    def clear(self):
+        """Drop all history"""
+        self._drop(self.undo_stack)
+        self._drop(self.redo_stack)
+
+    def _drop(self, stack: Deque[HistoryEntry]):
+        for entry in stack:
+            self.memory_used -= entry.nbytes
+        stack.clear()
+
+    def can_undo(self) -> bool:
+        return bool(self.undo_stack)
+
+    def can_redo(self) -> bool:
+        return bool(self.redo_stack)
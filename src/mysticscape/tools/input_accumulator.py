@@ -0,0 +1,66 @@
+"""
+Frame-coalesced navigation input
+
+Pointer and wheel events arrive far faster than the display refreshes.
+Instead of moving the camera and requesting a repaint per event, deltas
+are summed per kind and applied once per frame: while a frame is in
+flight new input only accumulates, and when the frame has been presented
+the pending deltas are applied together. A repaint is requested only if
+applying them actually moved the camera.
+"""
+
+import time
+from typing import Callable, Dict, List
+
+FRAME_TIMEOUT = 0.1  # Seconds before a frame that never presented stops holding input back
+
+class InputAccumulator:
+    def __init__(self, apply: Callable[[Dict[str, List[float]]], bool],
+                 request_frame: Callable[[], None], frame_timeout: float = FRAME_TIMEOUT):
+        self.apply = apply                  # Applies merged deltas, returns whether anything moved
+        self.request_frame = request_frame
+        self.frame_timeout = frame_timeout
+        self.deltas: Dict[str, List[float]] = {}
+        self.frame_in_flight = False
+        self.requested_at = 0.0
+        self.events = 0                     # Events merged since the last flush
+        self.applied_frames = 0
+
+    @property
+    def pending(self) -> bool:
+        return bool(self.deltas)
+
+    def add(self, kind: str, dx: float, dy: float = 0.0):
+        """Merge one event's delta and flush it unless a frame is already on its way"""
+        if dx == 0.0 and dy == 0.0:
+            return
+        delta = self.deltas.get(kind)
+        if delta is None:
+            self.deltas[kind] = [dx, dy]
+        else:
+            delta[0] += dx
+            delta[1] += dy
+        self.events += 1
+        if not self.frame_in_flight or time.monotonic() - self.requested_at > self.frame_timeout:
+            self.flush()
+
+    def flush(self):
+        """Apply everything accumulated and request a frame if the view changed"""
+        if not self.deltas:
+            return
+        deltas, self.deltas = self.deltas, {}
+        self.events = 0
+        if self.apply(deltas):
+            self.frame_in_flight = True
+            self.requested_at = time.monotonic()
+            self.applied_frames += 1
+            self.request_frame()
+
+    def frame_presented(self):
+        """Call once a frame has been swapped to the screen"""
+        self.frame_in_flight = False
+        self.flush()
+
+    def clear(self):
+        self.deltas.clear()
+        self.events = 0
@@ -5,8 +5,12 @@ Layer management system for 2D workspace
 from PyQt6.QtGui import QImage, QPainter, QColor
 from PyQt6.QtCore import Qt
 from dataclasses import dataclass
-from typing import Optional
+from typing import List, Optional, Tuple
 import uuid
+import numpy as np
+from mysticscape.tools.compositor import (CompositeSource, get_compositor, image_view,
+                                          store_straight)
+from mysticscape.tools.thumbnails import THUMBNAIL_SIZE, get_thumbnail_service, make_thumbnail
 
 @dataclass
 class LayerProperties:
@@ -23,8 +27,35 @@ class Layer:
         self.image.fill(Qt.GlobalColor.transparent)
         self.properties = LayerProperties()
         self.thumbnail = None
+        self.thumbnail_stale = True
+        self.revision = 0
         self.update_thumbnail()
 
+    @property
+    def pixels(self) -> np.ndarray:
+        """Zero-copy (height, width, 4) BGRA view of the layer image
+
+        Call mark_changed() after writing through it (or painting on
+        self.image), or cached composites will keep the old pixels.
+        """
+        return image_view(self.image)
+
+    def mark_changed(self):
+        """Record an in-place edit of the pixels"""
+        self.revision += 1
+        self.update_thumbnail()
+
+    def composite_source(self) -> CompositeSource:
+        """Read-only pixels, opacity and blend mode for the compositor"""
+        return (image_view(self.image, writable=False),
+                self.properties.opacity, self.properties.blend_mode)
+
+    def composite_key(self) -> tuple:
+        """Everything about this layer that affects a cached composite"""
+        props = self.properties
+        return (self.id, id(self.image), self.revision,
+                props.visible, props.opacity, props.blend_mode)
+
     def resize(self, width: int, height: int):
         """Resize the layer"""
         new_image = QImage(width, height, QImage.Format.Format_ARGB32)
@@ -33,46 +64,47 @@ class Layer:
         painter.drawImage(0, 0, self.image)
         painter.end()
         self.image = new_image
-        self.update_thumbnail()
+        self.mark_changed()
 
-    def update_thumbnail(self, size: int = 64):
-        """Update layer thumbnail"""
-        self.thumbnail = self.image.scaled(size, size, Qt.AspectRatioMode.KeepAspectRatio)
+    def update_thumbnail(self):
+        """Mark the thumbnail stale and queue it for background regeneration"""
+        self.thumbnail_stale = True
+        if service := get_thumbnail_service():
+            service.request(self)
+
+    def get_thumbnail(self, size: int = THUMBNAIL_SIZE) -> QImage:
+        """Return the thumbnail, building it in place if it is stale"""
+        if self.thumbnail_stale or self.thumbnail is None:
+            self.thumbnail = make_thumbnail(self.image, size)
+            self.thumbnail_stale = False
+        return self.thumbnail
 
     def clear(self):
         """Clear the layer"""
         self.image.fill(Qt.GlobalColor.transparent)
-        self.update_thumbnail()
+        self.mark_changed()
 
     def merge_down(self, bottom_layer: 'Layer') -> 'Layer':
         """Merge with the layer below"""
         merged = Layer(self.image.width(), self.image.height())
-        painter = QPainter(merged.image)
-        
-        # Draw bottom layer
-        if bottom_layer.properties.visible:
-            painter.setOpacity(bottom_layer.properties.opacity)
-            painter.drawImage(0, 0, bottom_layer.image)
-        
-        # Draw this layer
-        if self.properties.visible:
-            painter.setOpacity(self.properties.opacity)
-            painter.drawImage(0, 0, self.image)
-        
-        painter.end()
-        merged.update_thumbnail()
+        sources = [layer.composite_source() for layer in (bottom_layer, self)
+                   if layer.properties.visible]
+        get_compositor().composite(sources, merged.pixels)
+        merged.mark_changed()
         return merged
 
 class LayerStack:
     def __init__(self):
         self.layers = []
         self.active_layer_index = -1
+        self.invalidate_composite()
 
     def add_layer(self, layer: Layer) -> int:
         """Add a new layer and return its index"""
         self.layers.append(layer)
         if self.active_layer_index == -1:
             self.active_layer_index = 0
+        self.invalidate_composite()
         return len(self.layers) - 1
 
     def remove_layer(self, index: int):
@@ -81,12 +113,14 @@ class LayerStack:
             self.layers.pop(index)
             if self.active_layer_index >= len(self.layers):
                 self.active_layer_index = len(self.layers) - 1
+            self.invalidate_composite()
 
     def move_layer(self, from_index: int, to_index: int):
         """Move layer from one position to another"""
         if 0 <= from_index < len(self.layers) and 0 <= to_index < len(self.layers):
             layer = self.layers.pop(from_index)
             self.layers.insert(to_index, layer)
+            self.invalidate_composite()
 
     def merge_visible(self) -> Layer:
         """Merge all visible layers"""
@@ -94,17 +128,92 @@ class LayerStack:
             return None
 
         merged = Layer(self.layers[0].image.width(), self.layers[0].image.height())
-        painter = QPainter(merged.image)
-
-        for layer in self.layers:
-            if layer.properties.visible:
-                painter.setOpacity(layer.properties.opacity)
-                painter.drawImage(0, 0, layer.image)
-
-        painter.end()
-        merged.update_thumbnail()
+        self.composite_into(merged.pixels)
+        merged.mark_changed()
         return merged
 
+    @staticmethod
+    def visible_sources(layers: List[Layer]) -> List[CompositeSource]:
+        """Compositor inputs for the visible layers, bottom to top"""
+        return [layer.composite_source() for layer in layers if layer.properties.visible]
+
+    # Cached composites
+    def invalidate_composite(self):
+        """Drop the cached partial composites"""
+        self._cache_key = None
+        self._below: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._above: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    def _composite_key(self) -> tuple:
+        # The active layer's pixels are re-blended every time, so only its
+        # position and the state of the other layers decide cache validity
+        width, height = self.layers[0].image.width(), self.layers[0].image.height()
+        return (width, height, self.active_layer_index,
+                tuple(layer.composite_key() for i, layer in enumerate(self.layers)
+                      if i != self.active_layer_index))
+
+    def _rebuild_composite_cache(self):
+        compositor = get_compositor()
+        width, height = self.layers[0].image.width(), self.layers[0].image.height()
+        active = self.active_layer_index
+        below = self.visible_sources(self.layers[:active])
+        above = self.visible_sources(self.layers[active + 1:])
+
+        def blend_group(sources):
+            color = np.zeros((height, width, 3), dtype=np.float32)
+            alpha = np.zeros((height, width, 1), dtype=np.float32)
+            compositor.run_bands(height, lambda start, stop: compositor.composite_premultiplied(
+                sources, start, stop, width, color[start:stop], alpha[start:stop]))
+            return color, alpha
+
+        self._below = blend_group(below)
+        # Layers above can only be pre-grouped when they all use "over"
+        # compositing; other blend modes depend on the backdrop beneath them
+        if all(blend_mode == "normal" for _, _, blend_mode in above):
+            self._above = blend_group(above)
+        else:
+            self._above = None
+        self._cache_key = self._composite_key()
+
+    def composite_into(self, out: np.ndarray):
+        """Composite all visible layers into a straight-alpha BGRA buffer
+
+        Layers below and above the active layer are cached as premultiplied
+        partial composites, so repeated merges while painting on the active
+        layer only blend the below cache, the active layer and the above
+        cache.
+        """
+        if not 0 <= self.active_layer_index < len(self.layers):
+            get_compositor().composite(self.visible_sources(self.layers), out)
+            return
+
+        if self._cache_key != self._composite_key():
+            self._rebuild_composite_cache()
+
+        compositor = get_compositor()
+        width = out.shape[1]
+        active = self.layers[self.active_layer_index]
+        active_sources = self.visible_sources([active])
+        above_sources = self.visible_sources(self.layers[self.active_layer_index + 1:])
+        below_color, below_alpha = self._below
+
+        def blend_band(start: int, stop: int):
+            color = below_color[start:stop].copy()
+            alpha = below_alpha[start:stop].copy()
+            compositor.composite_premultiplied(active_sources, start, stop, width, color, alpha)
+            if self._above is not None:
+                above_color, above_alpha = self._above
+                color *= 1.0 - above_alpha[start:stop]
+                color += above_color[start:stop]
+                alpha *= 1.0 - above_alpha[start:stop]
+                alpha += above_alpha[start:stop]
+            else:
+                compositor.composite_premultiplied(above_sources, start, stop, width,
+                                                   color, alpha)
+            store_straight(color, alpha, out[start:stop])
+
+        compositor.run_bands(out.shape[0], blend_band)
+
     def get_active_layer(self) -> Optional[Layer]:
         """Get the currently active layer"""
         if 0 <= self.active_layer_index < len(self.layers):
@@ -114,7 +223,9 @@ class LayerStack:
     def set_active_layer(self, index: int):
         """Set the active layer"""
         if 0 <= index < len(self.layers):
-            self.active_layer_index = index
+            if index != self.active_layer_index:
+                self.active_layer_index = index
+                self.invalidate_composite()
 
     def duplicate_layer(self, index: int) -> int:
         """Duplicate a layer and return new index"""
@@ -124,6 +235,7 @@ class LayerStack:
             painter = QPainter(new_layer.image)
             painter.drawImage(0, 0, layer.image)
             painter.end()
+            new_layer.mark_changed()
             new_layer.properties = LayerProperties(**layer.properties.__dict__)
             new_layer.name = f"Copy of {layer.name}"
             return self.add_layer(new_layer)
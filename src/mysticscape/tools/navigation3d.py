@@ -2,11 +2,14 @@
 Enhanced 3D navigation controls and camera management
 """
 
+import math
 import numpy as np
 from enum import Enum
 from dataclasses import dataclass
-from typing import Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 from PyQt6.QtCore import QPoint
+from mysticscape.tools.vec3 import (Vec3, add, cross, length, madd, normalize, scale, sub,
+                                    vec3, view_axes)
 
 class NavigationMode(Enum):
     ORBIT = "orbit"
@@ -35,9 +38,7 @@ class Navigation3D:
 
     def init_navigation(self):
         """Initialize navigation parameters"""
-        self.camera_pos = self.camera_presets["Perspective"].position.copy()
-        self.camera_target = self.camera_presets["Perspective"].target.copy()
-        self.camera_up = self.camera_presets["Perspective"].up.copy()
+        self.set_camera_preset("Perspective")
         self.last_pos = QPoint()
         self.orbit_speed = 0.5
         self.pan_speed = 0.01
@@ -53,72 +54,80 @@ class Navigation3D:
         """Set camera to a preset view"""
         if preset_name in self.camera_presets:
             preset = self.camera_presets[preset_name]
-            self.camera_pos = preset.position.copy()
-            self.camera_target = preset.target.copy()
-            self.camera_up = preset.up.copy()
+            self.camera_pos = vec3(preset.position)
+            self.camera_target = vec3(preset.target)
+            self.camera_up = vec3(preset.up)
+
+    @property
+    def camera(self) -> Tuple[Vec3, Vec3, Vec3]:
+        return self.camera_pos, self.camera_target, self.camera_up
+
+    def apply_input(self, deltas: Dict[str, List[float]]) -> bool:
+        """Apply deltas merged by an InputAccumulator; returns whether the camera moved"""
+        before = self.camera
+        for kind, (dx, dy) in deltas.items():
+            if kind == NavigationMode.ORBIT.value:
+                self.orbit(dx, dy)
+            elif kind == NavigationMode.PAN.value:
+                self.pan(dx, dy)
+            elif kind == NavigationMode.ZOOM.value:
+                self.zoom(dx)
+            elif kind == NavigationMode.FLY.value:
+                self.fly(dx, dy)
+            elif kind == NavigationMode.WALK.value:
+                self.walk(dx, dy)
+        return self.camera != before
 
     def orbit(self, dx: float, dy: float):
         """Orbit camera around target"""
         # Convert to spherical coordinates
-        dir_vector = self.camera_pos - self.camera_target
-        radius = np.linalg.norm(dir_vector)
-        theta = np.arctan2(dir_vector[0], dir_vector[2])
-        phi = np.arctan2(np.sqrt(dir_vector[0]**2 + dir_vector[2]**2), dir_vector[1])
+        x, y, z = sub(self.camera_pos, self.camera_target)
+        radius = length((x, y, z))
+        theta = math.atan2(x, z)
+        phi = math.atan2(math.sqrt(x * x + z * z), y)
 
         # Update angles
         theta -= dx * self.orbit_speed
-        phi = np.clip(phi + dy * self.orbit_speed, 0.1, np.pi - 0.1)
+        phi = min(max(phi + dy * self.orbit_speed, 0.1), math.pi - 0.1)
 
         # Convert back to Cartesian coordinates
-        self.camera_pos = self.camera_target + radius * np.array([
-            np.sin(phi) * np.sin(theta),
-            np.cos(phi),
-            np.sin(phi) * np.cos(theta)
-        ])
+        self.camera_pos = madd(self.camera_target, (
+            math.sin(phi) * math.sin(theta),
+            math.cos(phi),
+            math.sin(phi) * math.cos(theta)
+        ), radius)
 
     def pan(self, dx: float, dy: float):
         """Pan camera in view plane"""
-        forward = self.camera_target - self.camera_pos
-        forward = forward / np.linalg.norm(forward)
-        right = np.cross(forward, self.camera_up)
-        right = right / np.linalg.norm(right)
-        up = np.cross(right, forward)
-        up = up / np.linalg.norm(up)
-
-        offset = (-right * dx + up * dy) * self.pan_speed
-        self.camera_pos += offset
-        self.camera_target += offset
+        _, right, up = view_axes(self.camera_pos, self.camera_target, self.camera_up)
+        offset = add(scale(right, -dx * self.pan_speed), scale(up, dy * self.pan_speed))
+        self.camera_pos = add(self.camera_pos, offset)
+        self.camera_target = add(self.camera_target, offset)
 
     def zoom(self, delta: float):
         """Zoom camera in/out"""
-        forward = self.camera_target - self.camera_pos
-        forward = forward / np.linalg.norm(forward)
-        self.camera_pos += forward * delta * self.zoom_speed
+        forward = normalize(sub(self.camera_target, self.camera_pos))
+        self.camera_pos = madd(self.camera_pos, forward, delta * self.zoom_speed)
 
     def fly(self, dx: float, dy: float):
         """Fly camera in view direction"""
-        forward = self.camera_target - self.camera_pos
-        forward = forward / np.linalg.norm(forward)
-        right = np.cross(forward, self.camera_up)
-        right = right / np.linalg.norm(right)
-        
-        self.camera_pos += (forward * -dy + right * dx) * self.fly_speed
-        self.camera_target += (forward * -dy + right * dx) * self.fly_speed
+        forward, right, _ = view_axes(self.camera_pos, self.camera_target, self.camera_up)
+        offset = add(scale(forward, -dy * self.fly_speed), scale(right, dx * self.fly_speed))
+        self.camera_pos = add(self.camera_pos, offset)
+        self.camera_target = add(self.camera_target, offset)
 
     def walk(self, dx: float, dy: float):
         """Walk camera on ground plane"""
-        forward = self.camera_target - self.camera_pos
-        forward[1] = 0  # Project onto ground plane
-        forward = forward / np.linalg.norm(forward)
-        right = np.cross(forward, np.array([0, 1, 0]))
-        
-        self.camera_pos += (forward * -dy + right * dx) * self.walk_speed
-        self.camera_target += (forward * -dy + right * dx) * self.walk_speed
-
-    def focus_on_point(self, point: np.ndarray, distance: Optional[float] = None):
+        x, _, z = sub(self.camera_target, self.camera_pos)
+        forward = normalize((x, 0.0, z))  # Project onto ground plane
+        right = cross(forward, (0.0, 1.0, 0.0))
+        offset = add(scale(forward, -dy * self.walk_speed), scale(right, dx * self.walk_speed))
+        self.camera_pos = add(self.camera_pos, offset)
+        self.camera_target = add(self.camera_target, offset)
+
+    def focus_on_point(self, point, distance: Optional[float] = None):
         """Focus camera on a specific point"""
-        self.camera_target = point
+        self.camera_target = vec3(point)
         if distance is not None:
-            forward = self.camera_pos - self.camera_target
-            forward = forward / np.linalg.norm(forward)
-            self.camera_pos = self.camera_target + forward * distance
+            forward = normalize(sub(self.camera_pos, self.camera_target))
+            self.camera_pos = madd(self.camera_target, forward, distance)
@@ -5,8 +5,10 @@ Blender-style object creation system for Mystic Scape
 from enum import Enum
 from typing import Optional, Dict, List, Tuple
 from PyQt6.QtCore import Qt
-from PyQt6.QtWidgets import QMenu, QAction
+from PyQt6.QtGui import QAction
+from PyQt6.QtWidgets import QMenu
 import numpy as np
+from mysticscape.tools import primitives
 
 class ObjectType(Enum):
     MESH = "mesh"
@@ -71,16 +73,10 @@ class ObjectCreator:
         menu = self.create_add_menu()
         menu.exec(position)
         
-    def add_mesh(self, mesh_type: MeshType):
+    def add_mesh(self, mesh_type: MeshType, segments: Optional[int] = None,
+                 rings: Optional[int] = None):
         """Add a new mesh object"""
-        if mesh_type == MeshType.CUBE:
-            vertices, faces = self.create_cube()
-        elif mesh_type == MeshType.CYLINDER:
-            vertices, faces = self.create_cylinder()
-        elif mesh_type == MeshType.SPHERE:
-            vertices, faces = self.create_sphere()
-        # Add more mesh types...
-        
+        vertices, faces = primitives.generate(mesh_type.value, segments, rings)
         self.viewport.add_object(vertices, faces, mesh_type.value)
         
     def add_object(self, obj_type: ObjectType):
@@ -93,31 +89,15 @@ class ObjectCreator:
         
     def create_cube(self) -> Tuple[np.ndarray, np.ndarray]:
         """Create default cube vertices and faces"""
-        vertices = np.array([
-            [-1, -1, -1], [1, -1, -1], [1, 1, -1], [-1, 1, -1],
-            [-1, -1, 1], [1, -1, 1], [1, 1, 1], [-1, 1, 1]
-        ], dtype=np.float32)
-        
-        faces = np.array([
-            [0, 1, 2, 3],  # bottom
-            [4, 5, 6, 7],  # top
-            [0, 4, 7, 3],  # left
-            [1, 5, 6, 2],  # right
-            [0, 1, 5, 4],  # front
-            [3, 2, 6, 7]   # back
-        ], dtype=np.int32)
-        
-        return vertices, faces
+        return primitives.generate(MeshType.CUBE.value)
         
     def create_cylinder(self, segments: int = 32) -> Tuple[np.ndarray, np.ndarray]:
         """Create cylinder vertices and faces"""
-        # Implementation here...
-        pass
+        return primitives.generate(MeshType.CYLINDER.value, segments)
         
     def create_sphere(self, segments: int = 32, rings: int = 16) -> Tuple[np.ndarray, np.ndarray]:
         """Create sphere vertices and faces"""
-        # Implementation here...
-        pass
+        return primitives.generate(MeshType.SPHERE.value, segments, rings)
         
     def delete_selected(self):
         """Delete selected objects (X key)"""
@@ -4,7 +4,9 @@
 
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QColorDialog
 from PyQt6.QtGui import QPainter, QPen, QColor, QMouseEvent, QPaintEvent, QImage
-from PyQt6.QtCore import Qt, QPoint
+from PyQt6.QtCore import Qt, QPoint, QRect
+from mysticscape.tools.tiles import TileGrid
+from mysticscape.tools.history import PatchHistory
 
 class BrushTool:
     def __init__(self):
@@ -40,13 +42,18 @@ class Canvas2D(QWidget):
         """Initialize the drawing canvas"""
         self.image = QImage(self.size(), QImage.Format.Format_RGB32)
         self.image.fill(Qt.GlobalColor.white)
-        self.undo_stack = []
-        self.redo_stack = []
+        self.tiles = TileGrid(self.image.width(), self.image.height())
+        self.history = PatchHistory(self.tiles)
 
     def paintEvent(self, event: QPaintEvent):
         """Handle paint events"""
         painter = QPainter(self)
-        painter.drawImage(0, 0, self.image)
+        exposed = event.rect()
+        for column, row in self.tiles.tiles_in_rect(exposed):
+            source = self.tiles.tile_rect(column, row).intersected(exposed)
+            painter.drawImage(source.topLeft(), self.image, source)
+        painter.end()
+        self.tiles.clear_dirty(exposed)
 
     def mousePressEvent(self, event: QMouseEvent):
         """Handle mouse press events"""
@@ -58,6 +65,9 @@ class Canvas2D(QWidget):
     def mouseMoveEvent(self, event: QMouseEvent):
         """Handle mouse move events"""
         if self.drawing:
+            segment = self.segment_rect(self.last_point, event.pos())
+            self.history.capture(self.image, segment)
+
             painter = QPainter(self.image)
             pen = QPen()
             pen.setWidth(self.brush.size)
@@ -66,37 +76,46 @@ class Canvas2D(QWidget):
             painter.setPen(pen)
             
             painter.drawLine(self.last_point, event.pos())
+            painter.end()
+
+            # Repaint only the tiles this segment touched
+            dirty = self.tiles.mark_dirty(segment)
             self.last_point = event.pos()
-            self.update()
+            if not dirty.isEmpty():
+                self.update(dirty)
+
+    def segment_rect(self, start: QPoint, end: QPoint) -> QRect:
+        """Return the canvas area covered by a brush segment"""
+        pad = self.brush.size // 2 + 2
+        return QRect(start, end).normalized().adjusted(-pad, -pad, pad, pad)
 
     def mouseReleaseEvent(self, event: QMouseEvent):
         """Handle mouse release events"""
-        if event.button() == Qt.MouseButton.LeftButton:
+        if event.button() == Qt.MouseButton.LeftButton and self.drawing:
             self.drawing = False
+            self.history.end_stroke(self.image)
 
     def save_state(self):
-        """Save current state for undo"""
-        self.undo_stack.append(self.image.copy())
-        self.redo_stack.clear()
+        """Start recording an undoable change"""
+        self.history.begin_stroke()
 
     def undo(self):
         """Undo last action"""
-        if self.undo_stack:
-            self.redo_stack.append(self.image.copy())
-            self.image = self.undo_stack.pop()
-            self.update()
+        if rect := self.history.undo(self.image):
+            self.update(self.tiles.mark_dirty(rect))
 
     def redo(self):
         """Redo last undone action"""
-        if self.redo_stack:
-            self.undo_stack.append(self.image.copy())
-            self.image = self.redo_stack.pop()
-            self.update()
+        if rect := self.history.redo(self.image):
+            self.update(self.tiles.mark_dirty(rect))
 
     def clear(self):
         """Clear the canvas"""
         self.save_state()
+        self.history.capture(self.image, self.tiles.bounds())
         self.image.fill(Qt.GlobalColor.white)
+        self.history.end_stroke(self.image)
+        self.tiles.mark_all()
         self.update()
 
     def resizeEvent(self, event):
@@ -106,4 +125,6 @@ class Canvas2D(QWidget):
             new_image.fill(Qt.GlobalColor.white)
             painter = QPainter(new_image)
             painter.drawImage(0, 0, self.image)
+            painter.end()
             self.image = new_image
+            self.tiles.resize(new_image.width(), new_image.height())
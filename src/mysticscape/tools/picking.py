@@ -0,0 +1,287 @@
+"""
+Object picking and region selection for the 3D viewport
+
+Objects are binned by world-space center into a uniform grid stored in
+CSR form (rows sorted by cell, plus per-cell start offsets and bounds),
+rebuilt only when the scene graph's version changes. Region selection
+tests whole cells against the selection frustum and falls back to
+per-object tests only in cells the frustum boundary crosses.
+
+Click picking uses the grid to find the few objects whose bounds the
+cursor ray touches, then renders just those with their row encoded as a
+color into a 1x1 scissored region of an offscreen framebuffer and reads
+that single pixel back, which resolves occlusion at triangle precision.
+Without a GL context the nearest bounds hit is used instead.
+"""
+
+import logging
+from typing import Callable, Optional, Sequence, Tuple
+import numpy as np
+from mysticscape.tools.scene_graph import SceneGraph, frustum_planes
+
+OBJECTS_PER_CELL = 8
+MAX_GRID_RESOLUTION = 64
+LASSO_CHUNK = 1 << 16
+MAX_ID_CANDIDATES = 1024  # Nearest-first objects drawn in the ID pass
+
+def encode_ids(rows: np.ndarray) -> np.ndarray:
+    """(k, 3) float colors carrying row + 1 in 24 bits; black means background"""
+    ids = np.asarray(rows, dtype=np.int64) + 1
+    channels = np.stack([ids & 0xFF, (ids >> 8) & 0xFF, (ids >> 16) & 0xFF], axis=-1)
+    return channels.astype(np.float32) / 255.0
+
+def decode_id(pixel: Sequence[int]) -> int:
+    """Row stored in an RGB(A) byte pixel, or -1 for background"""
+    r, g, b = (int(channel) for channel in pixel[:3])
+    return (r | (g << 8) | (b << 16)) - 1
+
+def ray_boxes(origin: np.ndarray, direction: np.ndarray, lo: np.ndarray,
+              hi: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Entry distance and hit mask of one ray against (k, 3) boxes (slab test)"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        inverse = 1.0 / direction
+        t0 = (lo - origin) * inverse
+        t1 = (hi - origin) * inverse
+    t0 = np.nan_to_num(t0, nan=-np.inf)
+    t1 = np.nan_to_num(t1, nan=np.inf)
+    near = np.minimum(t0, t1).max(axis=1)
+    far = np.maximum(t0, t1).min(axis=1)
+    return np.maximum(near, 0.0), (far >= near) & (far >= 0.0)
+
+def points_in_polygon(points: np.ndarray, polygon: np.ndarray) -> np.ndarray:
+    """Even-odd test of (k, 2) points against a closed (m, 2) polygon"""
+    inside = np.zeros(len(points), dtype=bool)
+    start = np.asarray(polygon, dtype=np.float64)
+    end = np.roll(start, -1, axis=0)
+    for begin in range(0, len(points), LASSO_CHUNK):
+        x = points[begin:begin + LASSO_CHUNK, 0:1]
+        y = points[begin:begin + LASSO_CHUNK, 1:2]
+        straddles = (start[:, 1] > y) != (end[:, 1] > y)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            crossing = start[:, 0] + (y - start[:, 1]) * (end[:, 0] - start[:, 0]) \
+                / (end[:, 1] - start[:, 1])
+        inside[begin:begin + LASSO_CHUNK] = np.count_nonzero(straddles & (x < crossing), axis=1) % 2 == 1
+    return inside
+
+def expand_ranges(starts: np.ndarray, stops: np.ndarray) -> np.ndarray:
+    """Concatenation of arange(start, stop) for each pair, without a Python loop"""
+    lengths = stops - starts
+    total = lengths.sum()
+    if not total:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+    return np.arange(total) + offsets
+
+class SpatialGrid:
+    def __init__(self, scene: SceneGraph):
+        self.scene = scene
+        self.built_version = None
+        self.rows = np.empty(0, dtype=np.int64)       # Scene rows sorted by cell
+        self.lo = np.empty((0, 3))                    # World bounds, in the same order
+        self.hi = np.empty((0, 3))
+        self.centers = np.empty((0, 3))
+        self.starts = np.empty(0, dtype=np.int64)     # First sorted entry of each occupied cell
+        self.stops = np.empty(0, dtype=np.int64)
+        self.cell_lo = np.empty((0, 3))               # Union of member bounds per cell
+        self.cell_hi = np.empty((0, 3))
+        self.center_lo = np.empty((0, 3))             # Bounds of member centers per cell
+        self.center_hi = np.empty((0, 3))
+
+    def ensure(self):
+        """Rebuild if the scene changed; world matrices must already be up to date"""
+        if self.built_version != self.scene.version:
+            self.build()
+
+    def build(self):
+        rows = self.scene.live_rows()
+        self.built_version = self.scene.version
+        if not len(rows):
+            self.__init__(self.scene)
+            self.built_version = self.scene.version
+            return
+        bounds = self.scene.world_bounds(rows)
+        centers = bounds.mean(axis=1)
+
+        resolution = int(np.clip(round((len(rows) / OBJECTS_PER_CELL) ** (1.0 / 3.0)),
+                                 1, MAX_GRID_RESOLUTION))
+        low, high = centers.min(axis=0), centers.max(axis=0)
+        size = np.maximum(high - low, 1e-9) / resolution
+        cells = np.clip(((centers - low) / size).astype(np.int64), 0, resolution - 1)
+        cell_ids = np.ravel_multi_index(cells.T, (resolution,) * 3)
+
+        order = np.argsort(cell_ids, kind="stable")
+        sorted_ids = cell_ids[order]
+        self.rows = rows[order]
+        self.lo, self.hi = bounds[order, 0], bounds[order, 1]
+        self.centers = centers[order]
+        self.starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+        self.stops = np.r_[self.starts[1:], len(order)]
+        self.cell_lo = np.minimum.reduceat(self.lo, self.starts)
+        self.cell_hi = np.maximum.reduceat(self.hi, self.starts)
+        self.center_lo = np.minimum.reduceat(self.centers, self.starts)
+        self.center_hi = np.maximum.reduceat(self.centers, self.starts)
+
+    def ray(self, origin: np.ndarray, direction: np.ndarray) -> np.ndarray:
+        """Rows whose world bounds the ray hits, nearest entry first"""
+        self.ensure()
+        _, cell_hit = ray_boxes(origin, direction, self.cell_lo, self.cell_hi)
+        members = expand_ranges(self.starts[cell_hit], self.stops[cell_hit])
+        distance, hit = ray_boxes(origin, direction, self.lo[members], self.hi[members])
+        members, distance = members[hit], distance[hit]
+        return self.rows[members[np.argsort(distance, kind="stable")]]
+
+    def frustum(self, planes: np.ndarray) -> np.ndarray:
+        """Rows whose world-space center lies inside every plane"""
+        # Members index the rebuilt arrays, so look them up before reading rows
+        members = self.frustum_members(planes)
+        return self.rows[members]
+
+    def frustum_members(self, planes: np.ndarray) -> np.ndarray:
+        """Like frustum, but positions in the grid's sorted arrays"""
+        self.ensure()
+        if not len(self.starts):
+            return np.empty(0, dtype=np.int64)
+        normals, offsets = planes[:, :3], planes[:, 3]
+        # Corners of each cell's center box furthest along and against each plane normal
+        positive = normals[None] > 0
+        far_corner = np.where(positive, self.center_hi[:, None], self.center_lo[:, None])
+        near_corner = np.where(positive, self.center_lo[:, None], self.center_hi[:, None])
+        outside = ((far_corner * normals).sum(axis=2) + offsets < 0).any(axis=1)
+        inside = ((near_corner * normals).sum(axis=2) + offsets >= 0).all(axis=1)
+        partial = ~outside & ~inside
+
+        accepted = expand_ranges(self.starts[inside], self.stops[inside])
+        candidates = expand_ranges(self.starts[partial], self.stops[partial])
+        keep = (self.centers[candidates] @ normals.T + offsets >= 0).all(axis=1)
+        return np.concatenate([accepted, candidates[keep]])
+
+class PickBuffer:
+    """Offscreen RGBA8 + depth framebuffer the object-ID pass renders into"""
+
+    def __init__(self):
+        self.fbo = None
+        self.color = None
+        self.depth = None
+        self.size = (0, 0)
+
+    def ensure(self, width: int, height: int):
+        from OpenGL import GL
+        if self.size == (width, height) and self.fbo is not None:
+            return
+        if self.fbo is None:
+            self.fbo = GL.glGenFramebuffers(1)
+            self.color, self.depth = GL.glGenRenderbuffers(2)
+        GL.glBindRenderbuffer(GL.GL_RENDERBUFFER, self.color)
+        GL.glRenderbufferStorage(GL.GL_RENDERBUFFER, GL.GL_RGBA8, width, height)
+        GL.glBindRenderbuffer(GL.GL_RENDERBUFFER, self.depth)
+        GL.glRenderbufferStorage(GL.GL_RENDERBUFFER, GL.GL_DEPTH_COMPONENT24, width, height)
+        GL.glBindFramebuffer(GL.GL_FRAMEBUFFER, self.fbo)
+        GL.glFramebufferRenderbuffer(GL.GL_FRAMEBUFFER, GL.GL_COLOR_ATTACHMENT0,
+                                     GL.GL_RENDERBUFFER, self.color)
+        GL.glFramebufferRenderbuffer(GL.GL_FRAMEBUFFER, GL.GL_DEPTH_ATTACHMENT,
+                                     GL.GL_RENDERBUFFER, self.depth)
+        self.size = (width, height)
+
+    def read_id(self, x: int, y: int, draw: Callable[[], None], restore_fbo: int = 0) -> int:
+        """Run draw into the 1x1 region under (x, y) (GL, bottom-left origin) and decode it"""
+        from OpenGL import GL
+        GL.glBindFramebuffer(GL.GL_FRAMEBUFFER, self.fbo)
+        GL.glViewport(0, 0, *self.size)
+        GL.glEnable(GL.GL_SCISSOR_TEST)
+        GL.glScissor(x, y, 1, 1)
+        GL.glDisable(GL.GL_DITHER)
+        GL.glDisable(GL.GL_BLEND)
+        GL.glClearColor(0.0, 0.0, 0.0, 0.0)
+        GL.glClear(GL.GL_COLOR_BUFFER_BIT | GL.GL_DEPTH_BUFFER_BIT)
+        try:
+            draw()
+            pixel = GL.glReadPixels(x, y, 1, 1, GL.GL_RGBA, GL.GL_UNSIGNED_BYTE)
+        finally:
+            GL.glDisable(GL.GL_SCISSOR_TEST)
+            GL.glEnable(GL.GL_DITHER)
+            GL.glBindFramebuffer(GL.GL_FRAMEBUFFER, restore_fbo)
+        return decode_id(np.frombuffer(bytes(pixel), dtype=np.uint8))
+
+    def release(self):
+        from OpenGL import GL
+        if self.fbo is not None:
+            GL.glDeleteFramebuffers(1, [self.fbo])
+            GL.glDeleteRenderbuffers(2, [self.color, self.depth])
+        self.fbo = self.color = self.depth = None
+        self.size = (0, 0)
+
+class Picker:
+    def __init__(self, scene: SceneGraph):
+        self.logger = logging.getLogger(__name__)
+        self.scene = scene
+        self.grid = SpatialGrid(scene)
+        self.buffer: Optional[PickBuffer] = None  # Created once a GL context exists
+
+    @staticmethod
+    def pixel_ray(view_projection: np.ndarray, x: float, y: float, width: int,
+                  height: int) -> Tuple[np.ndarray, np.ndarray]:
+        """World-space ray through the center of pixel (x, y), top-left origin"""
+        ndc_x = 2.0 * (x + 0.5) / width - 1.0
+        ndc_y = 1.0 - 2.0 * (y + 0.5) / height
+        inverse = np.linalg.inv(view_projection)
+        near = inverse @ np.array([ndc_x, ndc_y, -1.0, 1.0])
+        far = inverse @ np.array([ndc_x, ndc_y, 1.0, 1.0])
+        near, far = near[:3] / near[3], far[:3] / far[3]
+        direction = far - near
+        return near, direction / np.linalg.norm(direction)
+
+    def pick(self, view_projection: np.ndarray, x: int, y: int, width: int, height: int,
+             draw_ids: Optional[Callable[[np.ndarray], None]] = None,
+             restore_fbo: int = 0) -> int:
+        """Row of the object under pixel (x, y), or -1
+
+        draw_ids(rows) must render those rows with their encode_ids colors
+        using the current view; it is only called with a GL context current.
+        """
+        candidates = self.grid.ray(*self.pixel_ray(view_projection, x, y, width, height))
+        if not len(candidates):
+            return -1
+        if draw_ids is None or self.buffer is None:
+            return int(candidates[0])
+        candidates = candidates[:MAX_ID_CANDIDATES]
+        self.buffer.ensure(width, height)
+        row = self.buffer.read_id(x, height - 1 - y, lambda: draw_ids(candidates), restore_fbo)
+        return row if row >= 0 and self.scene.alive[row] else -1
+
+    @staticmethod
+    def box_planes(view_projection: np.ndarray, rect: Tuple[float, float, float, float],
+                   width: int, height: int) -> np.ndarray:
+        x0, y0, x1, y1 = rect
+        ndc = (2.0 * min(x0, x1) / width - 1.0, 1.0 - 2.0 * max(y0, y1) / height,
+               2.0 * max(x0, x1) / width - 1.0, 1.0 - 2.0 * min(y0, y1) / height)
+        return frustum_planes(view_projection, ndc)
+
+    def select_box(self, view_projection: np.ndarray, rect: Tuple[float, float, float, float],
+                   width: int, height: int) -> np.ndarray:
+        """Rows whose centers project inside the pixel rectangle (x0, y0, x1, y1)"""
+        return self.grid.frustum(self.box_planes(view_projection, rect, width, height))
+
+    def select_lasso(self, view_projection: np.ndarray, polygon: np.ndarray,
+                     width: int, height: int) -> np.ndarray:
+        """Rows whose centers project inside a pixel-space polygon"""
+        polygon = np.asarray(polygon, dtype=np.float64)
+        if len(polygon) < 3:
+            return np.empty(0, dtype=np.int64)
+        (x0, y0), (x1, y1) = polygon.min(axis=0), polygon.max(axis=0)
+        members = self.grid.frustum_members(
+            self.box_planes(view_projection, (x0, y0, x1, y1), width, height))
+        pixels = self.project(view_projection, self.grid.centers[members], width, height)
+        return self.grid.rows[members[points_in_polygon(pixels, polygon)]]
+
+    @staticmethod
+    def project(view_projection: np.ndarray, centers: np.ndarray, width: int,
+                height: int) -> np.ndarray:
+        """(k, 2) pixel positions of world-space points"""
+        clip = centers @ view_projection[:2, :3].T + view_projection[:2, 3]
+        w = centers @ view_projection[3, :3] + view_projection[3, 3]
+        ndc = clip / w[:, None]
+        return np.stack([(ndc[:, 0] + 1.0) * width / 2.0, (1.0 - ndc[:, 1]) * height / 2.0], axis=1)
+
+    def release(self):
+        if self.buffer is not None:
+            self.buffer.release()
@@ -0,0 +1,251 @@
+"""
+Procedural mesh primitives
+
+Every generator returns float32 (V, 3) vertices and int32 (F, 3) counter-
+clockwise triangles, Y up, sized to fit the default [-1, 1] cube. Index
+arrays are built from broadcast grids rather than per-face loops, and
+`generate` memoizes results by (type, segments, rings); cached arrays are
+read-only and shared, so copy them before editing in place.
+"""
+
+from functools import lru_cache
+from typing import Callable, Dict, Tuple
+import numpy as np
+
+Mesh = Tuple[np.ndarray, np.ndarray]
+
+CACHE_SIZE = 32
+
+# Resolution used when a caller does not pass one: (segments, rings)
+DEFAULT_RESOLUTION: Dict[str, Tuple[int, int]] = {
+    "cube": (1, 0),
+    "cylinder": (32, 1),
+    "cone": (32, 1),
+    "sphere": (32, 16),
+    "icosphere": (2, 0),   # segments is the subdivision level
+    "plane": (1, 0),       # segments is the number of cuts per side
+    "circle": (32, 0),
+    "torus": (48, 12),     # rings go around the tube
+    "monkey": (32, 16),
+}
+
+# Smallest (segments, rings) that still gives a closed, non-degenerate shape
+MIN_RESOLUTION: Dict[str, Tuple[int, int]] = {
+    "cube": (1, 0),
+    "cylinder": (3, 1),
+    "cone": (3, 1),
+    "sphere": (3, 2),
+    "icosphere": (0, 0),
+    "plane": (1, 0),
+    "circle": (3, 0),
+    "torus": (3, 3),
+    "monkey": (3, 2),
+}
+
+def quad_grid(rows: int, cols: int, wrap_cols: bool = True, wrap_rows: bool = False,
+              offset: int = 0) -> np.ndarray:
+    """Triangles for a rows x cols patch of quads over a row-major vertex grid"""
+    stride = cols if wrap_cols else cols + 1
+    vertex_rows = rows if wrap_rows else rows + 1
+    r = np.arange(rows)[:, None]
+    c = np.arange(cols)[None, :]
+    r1 = (r + 1) % vertex_rows
+    c1 = (c + 1) % stride
+    a = r * stride + c
+    b = r * stride + c1
+    d = r1 * stride + c
+    e = r1 * stride + c1
+    triangles = np.stack([a, d, e, a, e, b], axis=-1).reshape(-1, 3)
+    return (triangles + offset).astype(np.int32)
+
+def fan(center: int, start: int, count: int, flip: bool = False) -> np.ndarray:
+    """Triangles joining a center vertex to a closed ring of count vertices"""
+    ring = start + np.arange(count)
+    following = start + (np.arange(count) + 1) % count
+    hub = np.full(count, center)
+    columns = [hub, following, ring] if flip else [hub, ring, following]
+    return np.stack(columns, axis=1).astype(np.int32)
+
+def ring(segments: int, radius: float = 1.0, y: float = 0.0) -> np.ndarray:
+    """(segments, 3) points on a circle in the XZ plane"""
+    angle = 2.0 * np.pi * np.arange(segments) / segments
+    return np.stack([radius * np.cos(angle), np.full(segments, y), radius * np.sin(angle)], axis=1)
+
+def merge(*meshes: Mesh) -> Mesh:
+    """Concatenate meshes, offsetting each one's indices past the previous vertices"""
+    offsets = np.cumsum([0] + [len(vertices) for vertices, _ in meshes[:-1]])
+    vertices = np.concatenate([vertices for vertices, _ in meshes])
+    faces = np.concatenate([faces + offset for (_, faces), offset in zip(meshes, offsets)])
+    return vertices.astype(np.float32), faces.astype(np.int32)
+
+def transformed(mesh: Mesh, scale=(1.0, 1.0, 1.0), translate=(0.0, 0.0, 0.0)) -> Mesh:
+    vertices, faces = mesh
+    return vertices * np.asarray(scale) + np.asarray(translate), faces
+
+def cube(segments: int = 1, rings: int = 0) -> Mesh:
+    """Cube with four vertices per face so each side shades flat"""
+    # Each face is spanned by two of the axes around its outward normal
+    normals = np.array([[1, 0, 0], [-1, 0, 0], [0, 1, 0], [0, -1, 0], [0, 0, 1], [0, 0, -1]])
+    u = np.roll(normals, 1, axis=1)
+    v = np.cross(normals, u)
+    corners = np.array([[-1, -1], [1, -1], [1, 1], [-1, 1]])
+    vertices = normals[:, None] + corners[None, :, :1] * u[:, None] + corners[None, :, 1:] * v[:, None]
+    base = 4 * np.arange(6)[:, None]
+    faces = (base + np.array([[0, 1, 2], [0, 2, 3]]).reshape(1, -1)).reshape(-1, 3)
+    return vertices.reshape(-1, 3).astype(np.float32), faces.astype(np.int32)
+
+def cylinder(segments: int = 32, rings: int = 1) -> Mesh:
+    """Cylinder of radius 1 from y=-1 to y=1; rings is the number of side bands"""
+    rings = max(1, rings)
+    heights = np.linspace(-1.0, 1.0, rings + 1)
+    side = ring(segments)[None, :, :] + np.array([0.0, 1.0, 0.0]) * heights[:, None, None]
+    side = side.reshape(-1, 3)
+    side_faces = quad_grid(rings, segments)
+
+    # Caps get their own rim vertices so the edge stays sharp
+    bottom = np.vstack([[0.0, -1.0, 0.0], ring(segments, y=-1.0)])
+    top = np.vstack([[0.0, 1.0, 0.0], ring(segments, y=1.0)])
+    return merge((side, side_faces), (bottom, fan(0, 1, segments)),
+                 (top, fan(0, 1, segments, flip=True)))
+
+def cone(segments: int = 32, rings: int = 1) -> Mesh:
+    """Cone with its base at y=-1 and apex at y=1; rings is the number of side bands"""
+    rings = max(1, rings)
+    heights = np.linspace(-1.0, 1.0, rings + 1)[:-1]
+    radii = (1.0 - heights) / 2.0
+    side = (ring(segments)[None, :, :] * np.array([1.0, 0.0, 1.0]) * radii[:, None, None]
+            + np.array([0.0, 1.0, 0.0]) * heights[:, None, None]).reshape(-1, 3)
+    apex = len(side)
+    side = np.vstack([side, [0.0, 1.0, 0.0]])
+    side_faces = np.vstack([quad_grid(rings - 1, segments),
+                            fan(apex, (rings - 1) * segments, segments, flip=True)])
+    base = np.vstack([[0.0, -1.0, 0.0], ring(segments, y=-1.0)])
+    return merge((side, side_faces), (base, fan(0, 1, segments)))
+
+def sphere(segments: int = 32, rings: int = 16) -> Mesh:
+    """UV sphere of radius 1 with rings latitude bands and segments longitude slices"""
+    rings = max(2, rings)
+    theta = np.pi * np.arange(1, rings) / rings
+    phi = 2.0 * np.pi * np.arange(segments) / segments
+    sin_theta = np.sin(theta)[:, None]
+    body = np.stack([sin_theta * np.cos(phi),
+                     np.broadcast_to(np.cos(theta)[:, None], (rings - 1, segments)),
+                     sin_theta * np.sin(phi)], axis=-1).reshape(-1, 3)
+    last = (rings - 2) * segments
+    vertices = np.vstack([body, [[0.0, 1.0, 0.0], [0.0, -1.0, 0.0]]])
+    north, south = len(body), len(body) + 1
+    # Rows run from north to south, the opposite way to the cylinder's bands
+    faces = np.vstack([fan(north, 0, segments, flip=True),
+                       quad_grid(rings - 2, segments)[:, ::-1],
+                       fan(south, last, segments)])
+    return vertices.astype(np.float32), faces
+
+def icosphere(segments: int = 2, rings: int = 0) -> Mesh:
+    """Icosahedron subdivided segments times, each level splitting every triangle in four"""
+    t = (1.0 + 5.0 ** 0.5) / 2.0
+    vertices = np.array([
+        [-1, t, 0], [1, t, 0], [-1, -t, 0], [1, -t, 0],
+        [0, -1, t], [0, 1, t], [0, -1, -t], [0, 1, -t],
+        [t, 0, -1], [t, 0, 1], [-t, 0, -1], [-t, 0, 1],
+    ], dtype=np.float64)
+    faces = np.array([
+        [0, 11, 5], [0, 5, 1], [0, 1, 7], [0, 7, 10], [0, 10, 11],
+        [1, 5, 9], [5, 11, 4], [11, 10, 2], [10, 7, 6], [7, 1, 8],
+        [3, 9, 4], [3, 4, 2], [3, 2, 6], [3, 6, 8], [3, 8, 9],
+        [4, 9, 5], [2, 4, 11], [6, 2, 10], [8, 6, 7], [9, 8, 1],
+    ], dtype=np.int64)
+    vertices /= np.linalg.norm(vertices, axis=1, keepdims=True)
+
+    for _ in range(segments):
+        # Shared edges get one midpoint: dedupe sorted edge pairs
+        edges = np.sort(faces[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2), axis=1)
+        unique, inverse = np.unique(edges, axis=0, return_inverse=True)
+        midpoints = vertices[unique].mean(axis=1)
+        midpoints /= np.linalg.norm(midpoints, axis=1, keepdims=True)
+        mid = inverse.reshape(-1, 3) + len(vertices)
+        a, b, c = faces.T
+        ab, bc, ca = mid.T
+        faces = np.stack([np.stack([a, ab, ca], axis=1), np.stack([b, bc, ab], axis=1),
+                          np.stack([c, ca, bc], axis=1), np.stack([ab, bc, ca], axis=1)],
+                         axis=1).reshape(-1, 3)
+        vertices = np.vstack([vertices, midpoints])
+    return vertices.astype(np.float32), faces.astype(np.int32)
+
+def plane(segments: int = 1, rings: int = 0) -> Mesh:
+    """2x2 plane in XZ facing +Y, cut into segments x segments quads"""
+    segments = max(1, segments)
+    ticks = np.linspace(-1.0, 1.0, segments + 1)
+    x, z = np.meshgrid(ticks, ticks)
+    vertices = np.stack([x, np.zeros_like(x), z], axis=-1).reshape(-1, 3)
+    return vertices.astype(np.float32), quad_grid(segments, segments, wrap_cols=False)
+
+def circle(segments: int = 32, rings: int = 0) -> Mesh:
+    """Filled unit disc in XZ facing +Y"""
+    vertices = np.vstack([[0.0, 0.0, 0.0], ring(segments)])
+    return vertices.astype(np.float32), fan(0, 1, segments, flip=True)
+
+def torus(segments: int = 48, rings: int = 12, major_radius: float = 0.75,
+          minor_radius: float = 0.25) -> Mesh:
+    """Torus around Y; segments go around the main ring, rings around the tube"""
+    major = 2.0 * np.pi * np.arange(segments) / segments
+    minor = 2.0 * np.pi * np.arange(rings) / rings
+    radius = major_radius + minor_radius * np.cos(minor)[None, :]
+    height = np.broadcast_to(minor_radius * np.sin(minor)[None, :], (segments, rings))
+    vertices = np.stack([radius * np.cos(major)[:, None], height,
+                         radius * np.sin(major)[:, None]], axis=-1).reshape(-1, 3)
+    faces = quad_grid(segments, rings, wrap_rows=True)[:, ::-1]
+    return vertices.astype(np.float32), np.ascontiguousarray(faces)
+
+def monkey(segments: int = 32, rings: int = 16) -> Mesh:
+    """Stylised monkey head facing +Z, assembled from deformed spheres"""
+    head = sphere(segments, rings)
+    feature = sphere(max(8, segments // 2), max(4, rings // 2))
+    parts = [transformed(head, (1.0, 0.9, 0.85))]
+    for side in (-1.0, 1.0):
+        parts.append(transformed(feature, (0.45, 0.4, 0.12), (side * 1.05, 0.25, -0.05)))
+        parts.append(transformed(feature, (0.22, 0.22, 0.12), (side * 0.36, 0.22, 0.8)))
+    parts.append(transformed(feature, (0.6, 0.35, 0.4), (0.0, -0.35, 0.62)))
+    return merge(*parts)
+
+GENERATORS: Dict[str, Callable[[int, int], Mesh]] = {
+    "cube": cube,
+    "cylinder": cylinder,
+    "cone": cone,
+    "sphere": sphere,
+    "icosphere": icosphere,
+    "plane": plane,
+    "circle": circle,
+    "torus": torus,
+    "monkey": monkey,
+}
+
+# Types whose shape does not depend on rings share one cache entry
+_USES_RINGS = {"cylinder", "cone", "sphere", "torus", "monkey"}
+
+def generate(mesh_type: str, segments: int = None, rings: int = None) -> Mesh:
+    """Vertices and triangles for a primitive, built once per (type, segments, rings)"""
+    if mesh_type not in GENERATORS:
+        raise ValueError(f"Unknown mesh type: {mesh_type}")
+    default_segments, default_rings = DEFAULT_RESOLUTION[mesh_type]
+    segments = default_segments if segments is None else int(segments)
+    rings = default_rings if rings is None or mesh_type not in _USES_RINGS else int(rings)
+    if mesh_type == "cube":
+        segments = 1
+    min_segments, min_rings = MIN_RESOLUTION[mesh_type]
+    if segments < min_segments:
+        raise ValueError(f"{mesh_type} needs at least {min_segments} segments, got {segments}")
+    if rings < min_rings:
+        raise ValueError(f"{mesh_type} needs at least {min_rings} rings, got {rings}")
+    return _generate(mesh_type, segments, rings)
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _generate(mesh_type: str, segments: int, rings: int) -> Mesh:
+    vertices, faces = GENERATORS[mesh_type](segments, rings)
+    vertices = np.ascontiguousarray(vertices, dtype=np.float32)
+    faces = np.ascontiguousarray(faces, dtype=np.int32)
+    vertices.setflags(write=False)
+    faces.setflags(write=False)
+    return vertices, faces
+
+def clear_cache():
+    _generate.cache_clear()
@@ -0,0 +1,353 @@
+"""
+Scene graph with structure-of-arrays transforms
+
+Objects are rows in contiguous arrays: local and world (N, 4, 4) matrices
+(column vectors, translation in the last column), parent indexes, tree
+depth, local bounds and flag arrays. Editing a transform only marks the
+object dirty; `update_world` spreads the flag down to descendants and
+recomputes world matrices one depth level at a time, so each level is a
+single batched matrix product over just the dirty rows.
+
+Row indexes are stable for an object's lifetime (deleted rows are reused
+later), which lets other systems such as picking refer to objects by index.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+
+INITIAL_CAPACITY = 64
+
+def translation(offset) -> np.ndarray:
+    matrix = np.identity(4)
+    matrix[:3, 3] = offset
+    return matrix
+
+def scaling(factor) -> np.ndarray:
+    matrix = np.identity(4)
+    matrix[[0, 1, 2], [0, 1, 2]] = factor
+    return matrix
+
+def rotation(axis, angle: float) -> np.ndarray:
+    """Rotation of angle radians about a unit axis (Rodrigues)"""
+    x, y, z = np.asarray(axis, dtype=np.float64) / np.linalg.norm(axis)
+    c, s = np.cos(angle), np.sin(angle)
+    t = 1.0 - c
+    matrix = np.identity(4)
+    matrix[:3, :3] = [[t * x * x + c, t * x * y - s * z, t * x * z + s * y],
+                      [t * x * y + s * z, t * y * y + c, t * y * z - s * x],
+                      [t * x * z - s * y, t * y * z + s * x, t * z * z + c]]
+    return matrix
+
+def about(pivot, matrix: np.ndarray) -> np.ndarray:
+    """matrix applied around pivot instead of the origin"""
+    return translation(pivot) @ matrix @ translation(-np.asarray(pivot, dtype=np.float64))
+
+def look_at(eye, target, up) -> np.ndarray:
+    """View matrix matching gluLookAt"""
+    eye = np.asarray(eye, dtype=np.float64)
+    forward = np.asarray(target, dtype=np.float64) - eye
+    forward /= np.linalg.norm(forward)
+    right = np.cross(forward, up)
+    right /= np.linalg.norm(right)
+    true_up = np.cross(right, forward)
+    matrix = np.identity(4)
+    matrix[0, :3], matrix[1, :3], matrix[2, :3] = right, true_up, -forward
+    matrix[:3, 3] = -matrix[:3, :3] @ eye
+    return matrix
+
+def perspective(fov: float, aspect: float, near: float, far: float) -> np.ndarray:
+    """Projection matrix matching gluPerspective (fov in degrees)"""
+    f = 1.0 / np.tan(np.radians(fov) / 2.0)
+    matrix = np.zeros((4, 4))
+    matrix[0, 0] = f / aspect
+    matrix[1, 1] = f
+    matrix[2, 2] = (far + near) / (near - far)
+    matrix[2, 3] = 2.0 * far * near / (near - far)
+    matrix[3, 2] = -1.0
+    return matrix
+
+def frustum_planes(view_projection: np.ndarray, ndc_rect=(-1.0, -1.0, 1.0, 1.0)) -> np.ndarray:
+    """(6, 4) inward planes (a, b, c, d) of the frustum, or of the part of it
+    covering ndc_rect = (x0, y0, x1, y1); a point p is inside when a.p + d >= 0"""
+    x0, y0, x1, y1 = ndc_rect
+    m = view_projection
+    planes = np.array([m[0] - x0 * m[3], x1 * m[3] - m[0],
+                       m[1] - y0 * m[3], y1 * m[3] - m[1],
+                       m[3] + m[2], m[3] - m[2]])
+    return planes / np.linalg.norm(planes[:, :3], axis=1, keepdims=True)
+
+@dataclass
+class TransformSession:
+    """Selection snapshot taken when a grab, rotate or scale starts"""
+    mode: str
+    indices: np.ndarray          # Top-level selected objects that actually move
+    start_world: np.ndarray      # (k, 4, 4) world matrices at the start
+    parent_inverse: np.ndarray   # (k, 4, 4) inverse parent world matrices
+    start_local: np.ndarray      # (k, 4, 4) for cancelling
+    pivot: np.ndarray            # Median point of the moving objects
+
+class SceneGraph:
+    def __init__(self, capacity: int = INITIAL_CAPACITY):
+        self.logger = logging.getLogger(__name__)
+        self.local = np.tile(np.identity(4), (capacity, 1, 1))
+        self.world = self.local.copy()
+        self.parent = np.full(capacity, -1, dtype=np.int32)
+        self.depth = np.zeros(capacity, dtype=np.int32)
+        self.bounds = np.zeros((capacity, 2, 3))  # Local-space AABB min/max
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.dirty = np.zeros(capacity, dtype=bool)
+        self.moved = np.zeros(capacity, dtype=bool)  # World changed since the last take_moved()
+        self.selected = np.zeros(capacity, dtype=bool)
+        self.names: List[Optional[str]] = [None] * capacity
+        self.index: Dict[str, int] = {}
+        self.free: List[int] = []
+        self.suffixes: Dict[str, int] = {}
+        self.count = 0  # High-water mark of used rows
+        self.structure_version = 0
+        self.transform_version = 0  # Bumped whenever world matrices change
+        self._levels: Optional[List[np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.index
+
+    @property
+    def capacity(self) -> int:
+        return len(self.alive)
+
+    def grow(self, capacity: int):
+        extra = capacity - self.capacity
+        self.local = np.concatenate([self.local, np.tile(np.identity(4), (extra, 1, 1))])
+        self.world = np.concatenate([self.world, np.tile(np.identity(4), (extra, 1, 1))])
+        self.parent = np.concatenate([self.parent, np.full(extra, -1, dtype=np.int32)])
+        self.depth = np.concatenate([self.depth, np.zeros(extra, dtype=np.int32)])
+        self.bounds = np.concatenate([self.bounds, np.zeros((extra, 2, 3))])
+        for name in ("alive", "dirty", "moved", "selected"):
+            setattr(self, name, np.concatenate([getattr(self, name), np.zeros(extra, dtype=bool)]))
+        self.names.extend([None] * extra)
+
+    def unique_name(self, base: str) -> str:
+        """base, or base.001, base.002... if taken"""
+        if base not in self.index:
+            return base
+        # Start from the last suffix handed out so bulk adds stay linear
+        suffix = self.suffixes.get(base, 1)
+        while f"{base}.{suffix:03d}" in self.index:
+            suffix += 1
+        self.suffixes[base] = suffix + 1
+        return f"{base}.{suffix:03d}"
+
+    def add(self, name: str, vertices: Optional[np.ndarray] = None, parent: Optional[int] = None,
+            matrix: Optional[np.ndarray] = None) -> int:
+        """Add an object and return its row"""
+        if name in self.index:
+            raise ValueError(f"Object already exists: {name}")
+        if self.free:
+            row = self.free.pop()
+        else:
+            if self.count == self.capacity:
+                self.grow(self.capacity * 2)
+            row = self.count
+            self.count += 1
+
+        self.local[row] = np.identity(4) if matrix is None else matrix
+        self.parent[row] = -1 if parent is None else parent
+        self.depth[row] = 0 if parent is None else self.depth[parent] + 1
+        if vertices is not None and len(vertices):
+            points = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+            self.bounds[row] = points.min(axis=0), points.max(axis=0)
+        else:
+            self.bounds[row] = 0.0
+        self.alive[row] = True
+        self.dirty[row] = True
+        self.selected[row] = False
+        self.names[row] = name
+        self.index[name] = row
+        self.structure_changed()
+        return row
+
+    def remove(self, rows: Iterable[int]):
+        """Delete objects; their children move up to the nearest surviving ancestor
+        and keep their world transforms"""
+        rows = np.unique(np.asarray(list(rows), dtype=np.int64))
+        rows = rows[self.alive[rows]]
+        if not len(rows):
+            return
+        self.update_world()
+        removed = np.zeros(self.capacity, dtype=bool)
+        removed[rows] = True
+
+        live = np.flatnonzero(self.alive[:self.count] & ~removed[:self.count])
+        orphans = live[(self.parent[live] >= 0) & removed[np.maximum(self.parent[live], 0)]]
+        if len(orphans):
+            # Walk each orphan's parent pointer past removed ancestors
+            parents = self.parent[orphans].copy()
+            while True:
+                pending = (parents >= 0) & removed[np.maximum(parents, 0)]
+                if not pending.any():
+                    break
+                parents[pending] = self.parent[parents[pending]]
+            parent_world = np.where((parents >= 0)[:, None, None],
+                                    self.world[np.maximum(parents, 0)], np.identity(4))
+            self.local[orphans] = np.linalg.inv(parent_world) @ self.world[orphans]
+            self.parent[orphans] = parents
+
+        for row in rows:
+            del self.index[self.names[row]]
+            self.names[row] = None
+        self.alive[rows] = False
+        self.selected[rows] = False
+        self.dirty[rows] = False
+        self.moved[rows] = False
+        self.parent[rows] = -1
+        self.free.extend(int(row) for row in rows)
+        self.recompute_depth()
+        self.structure_changed()
+
+    def set_parent(self, row: int, parent: Optional[int], keep_world: bool = True):
+        parent = -1 if parent is None else parent
+        ancestor = parent
+        while ancestor >= 0:
+            if ancestor == row:
+                raise ValueError("Cannot parent an object to its own descendant")
+            ancestor = self.parent[ancestor]
+        if keep_world:
+            self.update_world()
+            parent_world = self.world[parent] if parent >= 0 else np.identity(4)
+            self.local[row] = np.linalg.inv(parent_world) @ self.world[row]
+        self.parent[row] = parent
+        self.dirty[row] = True
+        self.recompute_depth()
+        self.structure_changed()
+
+    def recompute_depth(self):
+        """Depth from parent pointers, one tree level per pass"""
+        depth = np.zeros(self.count, dtype=np.int32)
+        parents = self.parent[:self.count]
+        has_parent = parents >= 0
+        for _ in range(self.count):
+            updated = np.where(has_parent, depth[np.maximum(parents, 0)] + 1, 0)
+            if np.array_equal(updated, depth):
+                break
+            depth = updated
+        self.depth[:self.count] = depth
+
+    def structure_changed(self):
+        self._levels = None
+        self.structure_version += 1
+
+    def levels(self) -> List[np.ndarray]:
+        """Live rows grouped by depth, parents before children"""
+        if self._levels is None:
+            live = np.flatnonzero(self.alive[:self.count])
+            depth = self.depth[live]
+            order = live[np.argsort(depth, kind="stable")]
+            splits = np.flatnonzero(np.diff(np.sort(depth))) + 1
+            self._levels = np.split(order, splits) if len(order) else []
+        return self._levels
+
+    def set_local(self, rows, matrices: np.ndarray):
+        self.local[rows] = matrices
+        self.dirty[rows] = True
+
+    def update_world(self) -> np.ndarray:
+        """Recompute world matrices of dirty objects and their descendants
+
+        Returns the rows whose world matrix changed in this call. They are
+        also marked in moved until take_moved(), so consumers see them even
+        when another caller ran the update first.
+        """
+        if not self.dirty[:self.count].any():
+            return np.empty(0, dtype=np.int64)
+        changed = []
+        for level in self.levels():
+            parents = self.parent[level]
+            has_parent = parents >= 0
+            inherited = has_parent & self.dirty[np.maximum(parents, 0)]
+            self.dirty[level[inherited]] = True
+            rows = level[self.dirty[level]]
+            if not len(rows):
+                continue
+            parents = self.parent[rows]
+            roots = parents < 0
+            self.world[rows[roots]] = self.local[rows[roots]]
+            children = rows[~roots]
+            self.world[children] = self.world[parents[~roots]] @ self.local[children]
+            self.moved[rows] = True
+            changed.append(rows)
+        self.dirty[:self.count] = False
+        if not changed:
+            return np.empty(0, dtype=np.int64)
+        self.transform_version += 1
+        return np.concatenate(changed)
+
+    def take_moved(self) -> np.ndarray:
+        """Rows whose world matrix changed since the previous call"""
+        rows = np.flatnonzero(self.moved[:self.count])
+        self.moved[rows] = False
+        return rows
+
+    def selected_rows(self) -> np.ndarray:
+        return np.flatnonzero(self.selected[:self.count] & self.alive[:self.count])
+
+    def select(self, rows, extend: bool = False):
+        if not extend:
+            self.selected[:] = False
+        self.selected[np.asarray(rows, dtype=np.int64)] = True
+
+    def topmost(self, rows: np.ndarray) -> np.ndarray:
+        """rows without a selected ancestor, so children are not transformed twice"""
+        marked = np.zeros(self.capacity, dtype=bool)
+        marked[rows] = True
+        covered = np.zeros(self.capacity, dtype=bool)
+        for level in self.levels():
+            parents = self.parent[level]
+            valid = parents >= 0
+            safe = np.maximum(parents, 0)
+            covered[level] = valid & (covered[safe] | marked[safe])
+        return rows[~covered[rows]]
+
+    def begin_transform(self, mode: str, rows: Optional[np.ndarray] = None) -> Optional[TransformSession]:
+        rows = self.selected_rows() if rows is None else np.asarray(rows, dtype=np.int64)
+        rows = self.topmost(rows)
+        if not len(rows):
+            return None
+        self.update_world()
+        parents = self.parent[rows]
+        parent_world = np.where((parents >= 0)[:, None, None],
+                                self.world[np.maximum(parents, 0)], np.identity(4))
+        start_world = self.world[rows].copy()
+        return TransformSession(mode, rows, start_world, np.linalg.inv(parent_world),
+                                self.local[rows].copy(), np.median(start_world[:, :3, 3], axis=0))
+
+    def apply_transform(self, session: TransformSession, delta: np.ndarray):
+        """Set every moving object's world matrix to delta @ its start matrix"""
+        self.set_local(session.indices, session.parent_inverse @ (delta @ session.start_world))
+
+    def cancel_transform(self, session: TransformSession):
+        self.set_local(session.indices, session.start_local)
+
+    @property
+    def version(self):
+        return self.structure_version, self.transform_version
+
+    def live_rows(self) -> np.ndarray:
+        return np.flatnonzero(self.alive[:self.count])
+
+    def world_bounds(self, rows=None) -> np.ndarray:
+        """(k, 2, 3) world-space AABBs of the transformed local bounds"""
+        rows = self.live_rows() if rows is None else rows
+        world = self.world[rows]
+        center = (self.bounds[rows, 0] + self.bounds[rows, 1]) / 2.0
+        extent = (self.bounds[rows, 1] - self.bounds[rows, 0]) / 2.0
+        center = np.einsum('nij,nj->ni', world[:, :3, :3], center) + world[:, :3, 3]
+        extent = np.einsum('nij,nj->ni', np.abs(world[:, :3, :3]), extent)
+        return np.stack([center - extent, center + extent], axis=1)
+
+    def world_positions(self, rows=None) -> np.ndarray:
+        rows = self.live_rows() if rows is None else rows
+        return self.world[rows, :3, 3]
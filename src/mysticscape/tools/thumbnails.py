@@ -0,0 +1,130 @@
+"""
+Background thumbnail generation for layers
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+import numpy as np
+from PyQt6.QtCore import QObject, QTimer, Qt, pyqtSignal
+from PyQt6.QtGui import QImage
+from mysticscape.tools.compositor import image_view
+
+THUMBNAIL_SIZE = 64
+DEBOUNCE_MS = 150
+
+def box_downsample(pixels: np.ndarray, size: int) -> np.ndarray:
+    """Halve a (height, width, 4) uint8 image with a 2x2 box filter until it
+    is no more than twice the requested size"""
+    level = pixels
+    while max(level.shape[:2]) > 2 * size and min(level.shape[:2]) >= 2:
+        height = level.shape[0] // 2 * 2
+        width = level.shape[1] // 2 * 2
+        level = level[:height, :width]
+        total = (level[0::2, 0::2].astype(np.uint16) + level[1::2, 0::2]
+                 + level[0::2, 1::2] + level[1::2, 1::2] + 2)
+        level = (total >> 2).astype(np.uint8)
+    return np.ascontiguousarray(level)
+
+def make_thumbnail(image: QImage, size: int = THUMBNAIL_SIZE) -> QImage:
+    """Downsample an image to fit in a size x size box"""
+    if image.isNull():
+        return QImage()
+    if image.depth() != 32:
+        image = image.convertToFormat(QImage.Format.Format_ARGB32)
+    level = box_downsample(image_view(image, writable=False), size)
+    height, width = level.shape[:2]
+    reduced = QImage(level.data, width, height, width * 4, image.format()).copy()
+    return reduced.scaled(size, size, Qt.AspectRatioMode.KeepAspectRatio,
+                          Qt.TransformationMode.SmoothTransformation)
+
+class ThumbnailService(QObject):
+    """Regenerates stale layer thumbnails off the UI thread
+
+    Requests made within the debounce window are coalesced so each layer
+    is downsampled at most once per window, however often it changes.
+    """
+
+    thumbnail_ready = pyqtSignal(str, QImage)  # layer id, thumbnail
+    _finished = pyqtSignal(str, int, QImage)   # layer id, generation, thumbnail
+    _failed = pyqtSignal(str, int)             # layer id, generation
+
+    def __init__(self, size: int = THUMBNAIL_SIZE, delay_ms: int = DEBOUNCE_MS, parent=None):
+        super().__init__(parent)
+        self.size = size
+        self.logger = logging.getLogger(__name__)
+        self._pending: Dict[str, object] = {}
+        self._layers: Dict[str, object] = {}
+        self._generation: Dict[str, int] = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="thumbnails")
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay_ms)
+        self._timer.timeout.connect(self.flush)
+
+        # Emitted from the worker thread, delivered on the UI thread
+        self._finished.connect(self._deliver)
+        self._failed.connect(self._forget)
+
+    def request(self, layer):
+        """Mark a layer's thumbnail stale and schedule regeneration"""
+        layer.thumbnail_stale = True
+        self._pending[layer.id] = layer
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def flush(self):
+        """Start downsampling every pending layer now"""
+        pending, self._pending = self._pending, {}
+        for layer_id, layer in pending.items():
+            generation = self._generation.get(layer_id, 0) + 1
+            self._generation[layer_id] = generation
+            self._layers[layer_id] = layer
+            # QImage copies are implicitly shared, so this is cheap and any
+            # later painting on the layer detaches instead of racing the worker
+            snapshot = QImage(layer.image)
+            self._executor.submit(self._render, layer_id, generation, snapshot)
+
+    def _render(self, layer_id: str, generation: int, image: QImage):
+        try:
+            thumbnail = make_thumbnail(image, self.size)
+        except Exception as e:
+            self.logger.error(f"Failed to generate thumbnail for layer {layer_id}: {str(e)}")
+            self._failed.emit(layer_id, generation)
+            return
+        self._finished.emit(layer_id, generation, thumbnail)
+
+    def _forget(self, layer_id: str, generation: int):
+        """Drop a failed generation; the layer stays stale so its next request retries"""
+        if self._generation.get(layer_id) == generation:
+            del self._generation[layer_id]
+            self._layers.pop(layer_id, None)
+
+    def _deliver(self, layer_id: str, generation: int, thumbnail: QImage):
+        if self._generation.get(layer_id) != generation:
+            return  # A newer request for this layer is in flight
+        layer = self._layers.pop(layer_id, None)
+        del self._generation[layer_id]
+        if layer is None:
+            return
+        layer.thumbnail = thumbnail
+        if layer.id not in self._pending:
+            layer.thumbnail_stale = False
+        self.thumbnail_ready.emit(layer_id, thumbnail)
+
+    def shutdown(self):
+        """Stop the worker thread"""
+        self._timer.stop()
+        self._executor.shutdown(wait=True)
+
+_service: Optional[ThumbnailService] = None
+
+def set_thumbnail_service(service: Optional[ThumbnailService]):
+    """Install the service layers use to refresh their thumbnails"""
+    global _service
+    _service = service
+
+def get_thumbnail_service() -> Optional[ThumbnailService]:
+    """Return the installed thumbnail service, if any"""
+    return _service
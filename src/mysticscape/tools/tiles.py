@@ -0,0 +1,64 @@
+"""
+Tile grid for dirty-region tracking on large 2D canvases
+"""
+
+from typing import Iterator, Set, Tuple
+from PyQt6.QtCore import QRect
+
+TILE_SIZE = 256
+
+class TileGrid:
+    """Splits a canvas into fixed-size tiles and tracks which ones changed"""
+
+    def __init__(self, width: int, height: int, tile_size: int = TILE_SIZE):
+        self.tile_size = tile_size
+        self.dirty: Set[Tuple[int, int]] = set()
+        self.resize(width, height)
+
+    def resize(self, width: int, height: int):
+        """Rebuild the grid for a new canvas size"""
+        self.width = max(width, 0)
+        self.height = max(height, 0)
+        self.columns = (self.width + self.tile_size - 1) // self.tile_size
+        self.rows = (self.height + self.tile_size - 1) // self.tile_size
+        self.mark_all()
+
+    def bounds(self) -> QRect:
+        """Return the full canvas rectangle"""
+        return QRect(0, 0, self.width, self.height)
+
+    def tile_rect(self, column: int, row: int) -> QRect:
+        """Return the canvas rectangle covered by a tile"""
+        x = column * self.tile_size
+        y = row * self.tile_size
+        return QRect(x, y,
+                     min(self.tile_size, self.width - x),
+                     min(self.tile_size, self.height - y))
+
+    def tiles_in_rect(self, rect: QRect) -> Iterator[Tuple[int, int]]:
+        """Yield (column, row) for every tile intersecting rect"""
+        rect = rect.intersected(self.bounds())
+        if rect.isEmpty():
+            return
+        for row in range(rect.top() // self.tile_size, rect.bottom() // self.tile_size + 1):
+            for column in range(rect.left() // self.tile_size, rect.right() // self.tile_size + 1):
+                yield column, row
+
+    def mark_dirty(self, rect: QRect) -> QRect:
+        """Mark tiles touched by rect as dirty and return their union"""
+        region = QRect()
+        for tile in self.tiles_in_rect(rect):
+            self.dirty.add(tile)
+            region = region.united(self.tile_rect(*tile))
+        return region
+
+    def mark_all(self):
+        """Mark every tile as dirty"""
+        self.dirty = {(column, row) for row in range(self.rows)
+                      for column in range(self.columns)}
+
+    def clear_dirty(self, rect: QRect):
+        """Forget dirty tiles that were fully repainted by rect"""
+        for tile in self.tiles_in_rect(rect):
+            if rect.contains(self.tile_rect(*tile)):
+                self.dirty.discard(tile)
@@ -0,0 +1,48 @@
+"""
+Scalar 3-vector math on plain float tuples
+
+Camera navigation works on a handful of 3-vectors per frame, where NumPy's
+per-call overhead and small-array allocations cost far more than the math.
+"""
+
+import math
+from typing import Sequence, Tuple
+
+Vec3 = Tuple[float, float, float]
+
+def vec3(v: Sequence[float]) -> Vec3:
+    return float(v[0]), float(v[1]), float(v[2])
+
+def add(a: Vec3, b: Vec3) -> Vec3:
+    return a[0] + b[0], a[1] + b[1], a[2] + b[2]
+
+def sub(a: Vec3, b: Vec3) -> Vec3:
+    return a[0] - b[0], a[1] - b[1], a[2] - b[2]
+
+def scale(a: Vec3, s: float) -> Vec3:
+    return a[0] * s, a[1] * s, a[2] * s
+
+def madd(a: Vec3, b: Vec3, s: float) -> Vec3:
+    """a + b * s"""
+    return a[0] + b[0] * s, a[1] + b[1] * s, a[2] + b[2] * s
+
+def dot(a: Vec3, b: Vec3) -> float:
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+def cross(a: Vec3, b: Vec3) -> Vec3:
+    return (a[1] * b[2] - a[2] * b[1],
+            a[2] * b[0] - a[0] * b[2],
+            a[0] * b[1] - a[1] * b[0])
+
+def length(a: Vec3) -> float:
+    return math.sqrt(a[0] * a[0] + a[1] * a[1] + a[2] * a[2])
+
+def normalize(a: Vec3) -> Vec3:
+    n = length(a)
+    return (a[0] / n, a[1] / n, a[2] / n) if n > 0.0 else a
+
+def view_axes(position: Vec3, target: Vec3, up: Vec3) -> Tuple[Vec3, Vec3, Vec3]:
+    """Unit forward, right and true-up vectors of a look-at camera"""
+    forward = normalize(sub(target, position))
+    right = normalize(cross(forward, up))
+    return forward, right, cross(right, forward)
@@ -6,21 +6,44 @@ from OpenGL.GL import *
 from OpenGL.GLU import *
 from PyQt6.QtOpenGLWidgets import QOpenGLWidget
 from PyQt6.QtCore import Qt, QPoint
-from PyQt6.QtGui import QMouseEvent, QWheelEvent
+from PyQt6.QtGui import QCursor, QMouseEvent, QWheelEvent
 import numpy as np
+from mysticscape.tools.gpu_mesh import MeshBuffer, RetainedRenderer
+from mysticscape.tools.input_accumulator import InputAccumulator
+from mysticscape.tools.picking import Picker, PickBuffer, encode_ids
+from mysticscape.tools.visibility import Visibility, lod_chain
+from mysticscape.tools.scene_graph import (SceneGraph, about, look_at, perspective, rotation,
+                                           scaling, translation)
+from mysticscape.tools.navigation3d import Navigation3D
+from mysticscape.tools.vec3 import view_axes
+
+TRANSFORM_AXES = {Qt.Key.Key_X: 0, Qt.Key.Key_Y: 1, Qt.Key.Key_Z: 2}
+CLICK_DISTANCE = 3  # Pixels the mouse may move and still count as a click
 
 class Viewport3D(QOpenGLWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.init_camera()
         self.init_navigation()
+        self.renderer = RetainedRenderer()
+        self.renderer.add_mesh("grid", self.build_grid())
+        self.renderer.add_mesh("axes", self.build_axes())
+        self.scene = SceneGraph()
+        self.transform_session = None
+        self.transform_origin = QPoint()
+        self.transform_axis = None
+        self.picker = Picker(self.scene)
+        self.visibility = Visibility(self.scene)
+        self.object_meshes = {}  # Scene row -> key of its shared LOD meshes in the renderer
+        self.press_pos = QPoint()
+        self.region_mode = None  # 'BOX' or 'LASSO' while dragging a selection
+        self.region_path = []
         self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
 
     def init_camera(self):
         """Initialize camera parameters"""
-        self.camera_pos = np.array([0.0, 0.0, 5.0])
-        self.camera_target = np.array([0.0, 0.0, 0.0])
-        self.camera_up = np.array([0.0, 1.0, 0.0])
+        self.navigation = Navigation3D()  # Owns the camera position, target and up vector
+        self.navigation.set_camera_preset("Front")
         self.fov = 45.0
         self.near = 0.1
         self.far = 1000.0
@@ -30,10 +53,10 @@ class Viewport3D(QOpenGLWidget):
         self.last_pos = QPoint()
         self.rotating = False
         self.panning = False
-        self.rotation = np.array([0.0, 0.0, 0.0])
-        self.zoom_speed = 0.1
+        self.rotation = [0.0, 0.0, 0.0]
         self.rotation_speed = 0.5
-        self.pan_speed = 0.01
+        # Pointer and wheel deltas are merged and applied once per presented frame
+        self.input = InputAccumulator(self.apply_navigation, self.update)
 
     def initializeGL(self):
         """Initialize OpenGL settings"""
@@ -42,6 +65,17 @@ class Viewport3D(QOpenGLWidget):
         glEnable(GL_LIGHTING)
         glEnable(GL_LIGHT0)
         glEnable(GL_COLOR_MATERIAL)
+        self.renderer.initialize()
+        self.picker.buffer = PickBuffer()
+        self.frameSwapped.connect(self.input.frame_presented)
+        self.context().aboutToBeDestroyed.connect(self.release_gl)
+
+    def release_gl(self):
+        """Free GPU buffers before the GL context goes away"""
+        self.makeCurrent()
+        self.renderer.release()
+        self.picker.release()
+        self.doneCurrent()
 
     def resizeGL(self, width, height):
         """Handle viewport resize"""
@@ -58,52 +92,260 @@ class Viewport3D(QOpenGLWidget):
         glLoadIdentity()
 
         # Position camera
-        gluLookAt(*self.camera_pos, *self.camera_target, *self.camera_up)
+        position, target, up = self.navigation.camera
+        gluLookAt(*position, *target, *up)
 
         # Apply transformations
         glRotatef(self.rotation[0], 1.0, 0.0, 0.0)
         glRotatef(self.rotation[1], 0.0, 1.0, 0.0)
         glRotatef(self.rotation[2], 0.0, 0.0, 1.0)
 
-        self.draw_grid()
-        self.draw_axes()
-
-    def draw_grid(self):
-        """Draw reference grid"""
-        glBegin(GL_LINES)
-        glColor3f(0.3, 0.3, 0.3)
-        
-        grid_size = 10
-        step = 1
-        
-        for i in range(-grid_size, grid_size + 1, step):
-            glVertex3f(i, 0, -grid_size)
-            glVertex3f(i, 0, grid_size)
-            glVertex3f(-grid_size, 0, i)
-            glVertex3f(grid_size, 0, i)
-            
-        glEnd()
-
-    def draw_axes(self):
-        """Draw coordinate axes"""
-        glBegin(GL_LINES)
-        # X axis (red)
-        glColor3f(1.0, 0.0, 0.0)
-        glVertex3f(0, 0, 0)
-        glVertex3f(1, 0, 0)
-        # Y axis (green)
-        glColor3f(0.0, 1.0, 0.0)
-        glVertex3f(0, 0, 0)
-        glVertex3f(0, 1, 0)
-        # Z axis (blue)
-        glColor3f(0.0, 0.0, 1.0)
-        glVertex3f(0, 0, 0)
-        glVertex3f(0, 0, 1)
-        glEnd()
+        # Grid, axes, user meshes and scene objects are all drawn from GPU buffers
+        self.sync_transforms()
+        self.renderer.draw(instances=self.visible_instances())
+
+    def sync_transforms(self):
+        """Bring world matrices and visibility bounds up to date with the scene"""
+        self.visibility.refresh()
+
+    def object_instances(self, rows, levels=None):
+        """(mesh, model) pairs drawing each row at a level of detail, full detail by default"""
+        models = self.scene.world[rows].astype(np.float32)
+        if levels is None:
+            levels = np.zeros(len(rows), dtype=np.int64)
+        instances = []
+        for row, level, model in zip(np.asarray(rows).tolist(), np.asarray(levels).tolist(),
+                                     models):
+            meshes = self.renderer.shared[self.object_meshes[row]].levels
+            instances.append((meshes[min(level, len(meshes) - 1)], model))
+        return instances
+
+    def visible_instances(self):
+        """Objects in view this frame at their chosen detail"""
+        eye = self.camera_basis()[0]
+        rows, levels = self.visibility.compute(self.view_projection(), eye, self.fov,
+                                               self.height(), self.far)
+        return self.object_instances(rows, levels)
+
+    def scene_rotation(self) -> np.ndarray:
+        """3x3 rotation the viewport applies to the scene after gluLookAt"""
+        rx, ry, rz = np.radians(self.rotation)
+        return (rotation((1, 0, 0), rx) @ rotation((0, 1, 0), ry) @ rotation((0, 0, 1), rz))[:3, :3]
+
+    def view_matrix(self) -> np.ndarray:
+        """The modelview paintGL builds: gluLookAt followed by the scene rotation"""
+        rotation_4x4 = np.identity(4)
+        rotation_4x4[:3, :3] = self.scene_rotation()
+        return look_at(*self.navigation.camera) @ rotation_4x4
+
+    def projection_matrix(self) -> np.ndarray:
+        return perspective(self.fov, self.width() / max(self.height(), 1), self.near, self.far)
+
+    def view_projection(self) -> np.ndarray:
+        return self.projection_matrix() @ self.view_matrix()
+
+    def camera_basis(self):
+        """Camera position, forward, right and up expressed in scene space"""
+        inverse = self.scene_rotation().T
+        position = self.navigation.camera_pos
+        forward, right, up = view_axes(*self.navigation.camera)
+        return tuple(inverse @ np.asarray(v) for v in (position, forward, right, up))
+
+    def build_grid(self, grid_size: int = 10, step: int = 1) -> MeshBuffer:
+        """Build reference grid line geometry"""
+        ticks = np.arange(-grid_size, grid_size + 1, step, dtype=np.float32)
+        lines = np.zeros((len(ticks), 4, 3), dtype=np.float32)
+        lines[:, 0] = np.stack([ticks, np.zeros_like(ticks), np.full_like(ticks, -grid_size)], axis=1)
+        lines[:, 1] = np.stack([ticks, np.zeros_like(ticks), np.full_like(ticks, grid_size)], axis=1)
+        lines[:, 2] = np.stack([np.full_like(ticks, -grid_size), np.zeros_like(ticks), ticks], axis=1)
+        lines[:, 3] = np.stack([np.full_like(ticks, grid_size), np.zeros_like(ticks), ticks], axis=1)
+        positions = lines.reshape(-1, 3)
+        colors = np.full_like(positions, 0.3)
+        return MeshBuffer.from_arrays(positions, colors, mode=GL_LINES, lit=False)
+
+    def build_axes(self) -> MeshBuffer:
+        """Build coordinate axes geometry (X red, Y green, Z blue)"""
+        positions = np.array([
+            [0, 0, 0], [1, 0, 0],
+            [0, 0, 0], [0, 1, 0],
+            [0, 0, 0], [0, 0, 1],
+        ], dtype=np.float32)
+        colors = np.repeat(np.identity(3, dtype=np.float32), 2, axis=0)
+        return MeshBuffer.from_arrays(positions, colors, mode=GL_LINES, lit=False)
+
+    def add_mesh(self, name: str, vertices: np.ndarray, faces: np.ndarray,
+                 color=(0.8, 0.8, 0.8)) -> MeshBuffer:
+        """Add a user mesh drawn every frame; it is uploaded to the GPU on the next frame"""
+        mesh = self.renderer.add_mesh(name, MeshBuffer.from_faces(vertices, faces, color))
+        self.update()
+        return mesh
+
+    def remove_mesh(self, name: str):
+        """Remove a user mesh"""
+        self.renderer.remove_mesh(name)
+        self.update()
+
+    @staticmethod
+    def build_lods(vertices: np.ndarray, faces: np.ndarray):
+        """GPU meshes for a source mesh and its simplified versions, full detail first"""
+        return [MeshBuffer.from_faces(vertices, faces)] + \
+            [MeshBuffer.from_faces(*lod) for lod in lod_chain(vertices, faces)]
+
+    def add_object(self, vertices: np.ndarray, faces: np.ndarray, name: str = "object",
+                   matrix: np.ndarray = None) -> int:
+        """Add a scene object, make it the only selected one and return its row
+
+        Objects created from the same vertex and face arrays share one LOD
+        chain and one set of GPU buffers, so the arrays must not be edited
+        in place afterwards (primitives.generate hands out read-only ones).
+        """
+        row = self.scene.add(self.scene.unique_name(name), vertices, matrix=matrix)
+        key = (id(vertices), id(faces))
+        self.renderer.acquire_shared(key, lambda: self.build_lods(vertices, faces),
+                                     source=(vertices, faces))
+        self.object_meshes[row] = key
+        self.scene.select([row])
+        self.update()
+        return row
+
+    def delete_selected_objects(self):
+        """Delete every selected object (X key)"""
+        rows = self.scene.selected_rows()
+        if not len(rows):
+            return
+        self.cancel_transform()
+        self.scene.remove(rows)
+        for row in rows:
+            self.renderer.drop_shared(self.object_meshes.pop(row, None))
+        self.update()
+
+    def start_transform_mode(self, mode: str):
+        """Start a grab, rotate or scale of the selection driven by the mouse"""
+        if self.transform_session is not None:
+            self.cancel_transform()
+        self.transform_session = self.scene.begin_transform(mode)
+        self.transform_origin = self.mapFromGlobal(QCursor.pos())
+        self.transform_axis = None
+
+    def update_transform(self, pos: QPoint):
+        session = self.transform_session
+        dx = pos.x() - self.transform_origin.x()
+        dy = pos.y() - self.transform_origin.y()
+        camera, forward, right, up = self.camera_basis()
+        axis = None if self.transform_axis is None else np.identity(3)[self.transform_axis]
+
+        if session.mode == 'GRAB':
+            # Scale pixels to world units at the pivot's depth
+            depth = max(np.dot(session.pivot - camera, forward), self.near)
+            pixel = 2.0 * depth * np.tan(np.radians(self.fov) / 2.0) / max(self.height(), 1)
+            offset = (right * dx - up * dy) * pixel
+            if axis is not None:
+                offset = axis * np.dot(offset, axis)
+            delta = translation(offset)
+        elif session.mode == 'ROTATE':
+            delta = about(session.pivot, rotation(-forward if axis is None else axis, dx * 0.01))
+        else:
+            factor = np.exp(dx * 0.005)
+            delta = about(session.pivot, scaling(factor if axis is None
+                                                 else 1.0 + (factor - 1.0) * axis))
+        self.scene.apply_transform(session, delta)
+        self.update()
+
+    def confirm_transform(self):
+        self.transform_session = None
+
+    def cancel_transform(self):
+        if self.transform_session is not None:
+            self.scene.cancel_transform(self.transform_session)
+            self.transform_session = None
+            self.update()
+
+    def pick_object(self, pos: QPoint) -> int:
+        """Row of the object under a widget position, or -1"""
+        self.sync_transforms()
+        view_projection = self.view_projection()
+        ratio = self.devicePixelRatioF()
+        width, height = int(self.width() * ratio), int(self.height() * ratio)
+        x, y = int(pos.x() * ratio), int(pos.y() * ratio)
+        if self.picker.buffer is None or not self.isValid():
+            return self.picker.pick(view_projection, x, y, width, height)
+
+        def draw_ids(rows):
+            glMatrixMode(GL_PROJECTION)
+            glLoadMatrixf(self.projection_matrix().T.astype(np.float32))
+            glMatrixMode(GL_MODELVIEW)
+            glLoadMatrixf(self.view_matrix().T.astype(np.float32))
+            self.renderer.draw_ids(self.object_instances(rows), encode_ids(rows))
+
+        self.makeCurrent()
+        try:
+            return self.picker.pick(view_projection, x, y, width, height, draw_ids,
+                                    self.defaultFramebufferObject())
+        finally:
+            glViewport(0, 0, width, height)
+            self.doneCurrent()
+
+    def apply_selection(self, rows: np.ndarray, extend: bool, toggle: bool = False):
+        if not extend:
+            self.scene.selected[:] = False
+        if toggle:
+            self.scene.selected[rows] = ~self.scene.selected[rows]
+        else:
+            self.scene.selected[rows] = True
+        self.update()
+
+    def select_at(self, pos: QPoint, extend: bool = False):
+        """Click selection; with extend the object under the cursor is toggled"""
+        row = self.pick_object(pos)
+        rows = np.array([row] if row >= 0 else [], dtype=np.int64)
+        self.apply_selection(rows, extend, toggle=extend)
+
+    def select_box(self, start: QPoint, end: QPoint, extend: bool = False):
+        """Select objects whose centers fall inside a widget-space rectangle"""
+        self.sync_transforms()
+        rows = self.picker.select_box(self.view_projection(),
+                                      (start.x(), start.y(), end.x(), end.y()),
+                                      self.width(), self.height())
+        self.apply_selection(rows, extend)
+
+    def select_lasso(self, points, extend: bool = False):
+        """Select objects whose centers fall inside a widget-space polygon"""
+        self.sync_transforms()
+        polygon = np.array([(point.x(), point.y()) for point in points], dtype=np.float64)
+        rows = self.picker.select_lasso(self.view_projection(), polygon,
+                                        self.width(), self.height())
+        self.apply_selection(rows, extend)
+
+    def keyPressEvent(self, event):
+        """Confirm, cancel or constrain an active transform"""
+        if self.transform_session is None:
+            super().keyPressEvent(event)
+        elif event.key() == Qt.Key.Key_Escape:
+            self.cancel_transform()
+        elif event.key() in (Qt.Key.Key_Return, Qt.Key.Key_Enter):
+            self.confirm_transform()
+        elif event.key() in TRANSFORM_AXES:
+            axis = TRANSFORM_AXES[event.key()]
+            self.transform_axis = None if self.transform_axis == axis else axis
+            self.update_transform(self.mapFromGlobal(QCursor.pos()))
+        else:
+            super().keyPressEvent(event)
 
     def mousePressEvent(self, event: QMouseEvent):
         """Handle mouse press events"""
         self.last_pos = event.pos()
+        self.press_pos = event.pos()
+        if self.transform_session is not None:
+            if event.button() == Qt.MouseButton.LeftButton:
+                self.confirm_transform()
+            else:
+                self.cancel_transform()
+            return
+        if event.modifiers() & Qt.KeyboardModifier.ControlModifier:
+            # Ctrl+left drags a selection box, Ctrl+right draws a lasso
+            self.region_mode = 'BOX' if event.button() == Qt.MouseButton.LeftButton else 'LASSO'
+            self.region_path = [event.pos()]
+            return
         if event.button() == Qt.MouseButton.LeftButton:
             self.rotating = True
         elif event.button() == Qt.MouseButton.RightButton:
@@ -111,37 +353,52 @@ class Viewport3D(QOpenGLWidget):
 
     def mouseReleaseEvent(self, event: QMouseEvent):
         """Handle mouse release events"""
+        extend = bool(event.modifiers() & Qt.KeyboardModifier.ShiftModifier)
+        if self.region_mode is not None:
+            self.region_path.append(event.pos())
+            if self.region_mode == 'BOX':
+                self.select_box(self.region_path[0], self.region_path[-1], extend)
+            else:
+                self.select_lasso(self.region_path, extend)
+            self.region_mode = None
+            self.region_path = []
+            return
         if event.button() == Qt.MouseButton.LeftButton:
             self.rotating = False
+            if (event.pos() - self.press_pos).manhattanLength() <= CLICK_DISTANCE:
+                self.select_at(event.pos(), extend)
         elif event.button() == Qt.MouseButton.RightButton:
             self.panning = False
 
     def mouseMoveEvent(self, event: QMouseEvent):
         """Handle mouse move events"""
-        dx = event.x() - self.last_pos.x()
-        dy = event.y() - self.last_pos.y()
+        pos = event.pos()
+        dx = pos.x() - self.last_pos.x()
+        dy = pos.y() - self.last_pos.y()
 
-        if self.rotating:
-            self.rotation[1] += dx * self.rotation_speed
-            self.rotation[0] += dy * self.rotation_speed
-            self.update()
+        if self.transform_session is not None:
+            self.update_transform(pos)
+        elif self.region_mode is not None:
+            self.region_path.append(pos)
+        elif self.rotating:
+            self.input.add("rotate", dx, dy)
         elif self.panning:
-            right = np.cross(self.camera_target - self.camera_pos, self.camera_up)
-            right = right / np.linalg.norm(right)
-            up = np.cross(right, self.camera_target - self.camera_pos)
-            up = up / np.linalg.norm(up)
-            
-            self.camera_pos += (-right * dx + up * dy) * self.pan_speed
-            self.camera_target += (-right * dx + up * dy) * self.pan_speed
-            self.update()
+            self.input.add("pan", dx, dy)
 
-        self.last_pos = event.pos()
+        self.last_pos = pos
 
     def wheelEvent(self, event: QWheelEvent):
         """Handle mouse wheel events for zooming"""
-        delta = event.angleDelta().y()
-        forward = self.camera_target - self.camera_pos
-        forward = forward / np.linalg.norm(forward)
-        
-        self.camera_pos += forward * delta * self.zoom_speed
-        self.update()
+        self.input.add("zoom", event.angleDelta().y())
+
+    def apply_navigation(self, deltas) -> bool:
+        """Apply merged input deltas to the view; returns whether it changed
+
+        Scene rotation belongs to the viewport, pan and zoom to its camera.
+        """
+        before = tuple(self.rotation)
+        if delta := deltas.pop("rotate", None):
+            self.rotation[1] += delta[0] * self.rotation_speed
+            self.rotation[0] += delta[1] * self.rotation_speed
+        moved = self.navigation.apply_input(deltas)
+        return moved or tuple(self.rotation) != before
@@ -0,0 +1,134 @@
+"""
+Per-frame visibility and level-of-detail selection
+
+World bounding spheres are cached per scene row and refreshed only for
+rows whose transforms changed, so an orbiting camera costs one vectorized
+pass over all objects: a sphere test against the six frustum planes, a
+distance cut-off and a projected-size estimate that both drops sub-pixel
+objects and picks the level of detail.
+
+LOD chains for arbitrary meshes are built by vertex clustering: vertices
+are snapped to a coarse grid over the mesh bounds, merged per cell and
+triangles that collapse are dropped.
+"""
+
+from dataclasses import dataclass
+from typing import List, Sequence, Tuple
+import numpy as np
+from mysticscape.tools.scene_graph import SceneGraph, frustum_planes
+
+# Grid resolutions for LOD 1, 2, ... and the projected diameter in pixels
+# below which each level takes over from the previous one
+LOD_RESOLUTIONS = (24, 10, 4)
+LOD_SCREEN_SIZES = (160.0, 48.0, 12.0)
+LOD_MIN_TRIANGLES = 512      # Smaller meshes get no LOD chain
+MIN_SCREEN_SIZE = 1.0        # Objects smaller than this many pixels are culled
+
+def decimate(vertices: np.ndarray, faces: np.ndarray, resolution: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Vertex-clustering simplification onto a resolution^3 grid over the bounds"""
+    vertices = np.asarray(vertices, dtype=np.float32).reshape(-1, 3)
+    faces = np.asarray(faces).reshape(-1, np.shape(faces)[-1])
+    low, high = vertices.min(axis=0), vertices.max(axis=0)
+    size = np.maximum(high - low, 1e-9) / resolution
+    cells = np.clip(((vertices - low) / size).astype(np.int64), 0, resolution - 1)
+    keys = np.ravel_multi_index(cells.T, (resolution,) * 3)
+    unique, remap = np.unique(keys, return_inverse=True)
+
+    # Each cluster is represented by the mean of its vertices
+    counts = np.bincount(remap, minlength=len(unique)).astype(np.float32)[:, None]
+    merged = np.stack([np.bincount(remap, weights=vertices[:, axis], minlength=len(unique))
+                       for axis in range(3)], axis=1).astype(np.float32) / counts
+
+    corners = faces.shape[1]
+    fan = np.arange(1, corners - 1)
+    triangles = np.stack([np.repeat(faces[:, :1], corners - 2, axis=1),
+                          faces[:, fan], faces[:, fan + 1]], axis=2).reshape(-1, 3)
+    triangles = remap[triangles]
+    keep = ((triangles[:, 0] != triangles[:, 1]) & (triangles[:, 1] != triangles[:, 2])
+            & (triangles[:, 2] != triangles[:, 0]))
+    triangles = triangles[keep]
+    # Clusters can collapse several triangles onto the same three vertices
+    triangles = np.unique(triangles, axis=0) if len(triangles) else triangles
+    return merged, triangles.astype(np.int32)
+
+def lod_chain(vertices: np.ndarray, faces: np.ndarray,
+              resolutions: Sequence[int] = LOD_RESOLUTIONS) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """Simplified versions of a mesh, coarsest last; empty for small meshes"""
+    triangles = len(faces) * (np.shape(faces)[-1] - 2)
+    if triangles < LOD_MIN_TRIANGLES:
+        return []
+    chain = []
+    for resolution in resolutions:
+        simplified = decimate(vertices, faces, resolution)
+        if not len(simplified[1]) or len(simplified[1]) >= triangles:
+            break
+        chain.append(simplified)
+        triangles = len(simplified[1])
+    return chain
+
+@dataclass
+class VisibilityStats:
+    objects: int = 0
+    visible: int = 0
+    frustum_culled: int = 0
+    distance_culled: int = 0
+    size_culled: int = 0
+
+class Visibility:
+    def __init__(self, scene: SceneGraph, screen_sizes: Sequence[float] = LOD_SCREEN_SIZES):
+        self.scene = scene
+        self.screen_sizes = np.asarray(screen_sizes, dtype=np.float64)
+        self.max_distance = None          # None uses the camera's far plane
+        self.min_screen_size = MIN_SCREEN_SIZE
+        self.centers = np.zeros((0, 3))
+        self.radii = np.zeros(0)
+        self.structure_version = None
+        self.stats = VisibilityStats()
+
+    def refresh(self):
+        """Recompute bounding spheres of moved rows, or of every row after a structure change"""
+        scene = self.scene
+        scene.update_world()
+        rows = scene.take_moved()
+        if self.structure_version != scene.structure_version or len(self.radii) != scene.capacity:
+            self.centers = np.zeros((scene.capacity, 3))
+            self.radii = np.zeros(scene.capacity)
+            rows = scene.live_rows()
+            self.structure_version = scene.structure_version
+        if not len(rows):
+            return
+        bounds = scene.world_bounds(rows)
+        self.centers[rows] = bounds.mean(axis=1)
+        self.radii[rows] = np.linalg.norm(bounds[:, 1] - bounds[:, 0], axis=1) / 2.0
+
+    def compute(self, view_projection: np.ndarray, eye: np.ndarray, fov: float, height: int,
+                far: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Visible rows and the LOD level of each (0 is full detail)"""
+        self.refresh()
+        rows = self.scene.live_rows()
+        centers, radii = self.centers[rows], self.radii[rows]
+        stats = VisibilityStats(objects=len(rows))
+
+        planes = frustum_planes(view_projection)
+        inside = (centers @ planes[:, :3].T + planes[:, 3] >= -radii[:, None]).all(axis=1)
+        stats.frustum_culled = int(len(rows) - np.count_nonzero(inside))
+        rows, centers, radii = rows[inside], centers[inside], radii[inside]
+
+        distance = np.linalg.norm(centers - eye, axis=1)
+        max_distance = far if self.max_distance is None else self.max_distance
+        near_enough = distance - radii <= max_distance
+        stats.distance_culled = int(len(rows) - np.count_nonzero(near_enough))
+        rows, distance, radii = rows[near_enough], distance[near_enough], radii[near_enough]
+
+        # Projected diameter in pixels; objects around the eye count as full screen
+        focal = height / (2.0 * np.tan(np.radians(fov) / 2.0))
+        with np.errstate(divide="ignore"):
+            screen_size = np.where(distance > radii, 2.0 * radii * focal / distance, np.inf)
+        large_enough = screen_size >= self.min_screen_size
+        stats.size_culled = int(len(rows) - np.count_nonzero(large_enough))
+        rows, screen_size = rows[large_enough], screen_size[large_enough]
+
+        levels = np.count_nonzero(screen_size[:, None] < self.screen_sizes, axis=1)
+        stats.visible = len(rows)
+        self.stats = stats
+        return rows, levels
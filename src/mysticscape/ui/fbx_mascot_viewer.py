@@ -7,12 +7,14 @@ from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtWidgets import QOpenGLWidget
 from OpenGL.GL import *
 from OpenGL.GLU import *
-import trimesh
+from .mascot.asset_cache import load_mascot_mesh
+from .mascot.mesh_buffer import MascotMeshBuffer
 
 class FBXMascotViewer(QOpenGLWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.mesh = None
+        self.mesh_buffer = MascotMeshBuffer()
         self.rotation = 0
         
         # Animation timer
@@ -26,12 +28,9 @@ class FBXMascotViewer(QOpenGLWidget):
             mascot_path = Path(__file__).parent / "resources" / "mascot" / "Leo.fbx"
             print(f"Loading mascot from: {mascot_path}")
             
-            self.mesh = trimesh.load(str(mascot_path))
-            
-            # Center and normalize size
-            self.mesh.vertices -= self.mesh.center_mass
-            scale = 2.0 / self.mesh.scale
-            self.mesh.vertices *= scale
+            # Centred and normalized; the FBX is parsed only on a cache miss
+            self.mesh = load_mascot_mesh(mascot_path)
+            self.mesh_buffer.set_mesh(self.mesh)
             
             print("Successfully loaded Leo mascot!")
             self.update()
@@ -76,11 +75,7 @@ class FBXMascotViewer(QOpenGLWidget):
         
         # Draw mesh
         glColor3f(1.0, 1.0, 1.0)
-        glBegin(GL_TRIANGLES)
-        for face in self.mesh.faces:
-            for vertex_id in face:
-                glVertex3fv(self.mesh.vertices[vertex_id])
-        glEnd()
+        self.mesh_buffer.draw()
         
     def animate(self):
         """Rotate the mascot"""
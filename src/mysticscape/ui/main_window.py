@@ -7,16 +7,22 @@ from PyQt6.QtWidgets import (QMainWindow, QApplication, QLabel, QWidget,
                            QPushButton, QMessageBox, QStackedWidget, QColorDialog,
                            QSpinBox, QComboBox, QListWidget, QListWidgetItem)
 from PyQt6.QtCore import Qt, QTimer
-from PyQt6.QtGui import QAction, QIcon, QColor
+from PyQt6.QtGui import QAction, QIcon, QColor, QImage, QPixmap
 from datetime import datetime, timedelta
+import importlib
 
-from mysticscape.tools.paint2d import Canvas2D
-from mysticscape.tools.viewport3d import Viewport3D
 from mysticscape.tools.layer import Layer, LayerStack
+from mysticscape.tools.thumbnails import ThumbnailService, set_thumbnail_service
 from mysticscape.tools.navigation3d import Navigation3D, NavigationMode
-from mysticscape.ui.hybrid_view import HybridView
 from mysticscape.core.engine import WorkspaceMode
 
+# Workspaces are imported and constructed on first use: (stack index, module, class)
+WORKSPACES = {
+    WorkspaceMode.MODE_3D: (0, "mysticscape.tools.viewport3d", "Viewport3D"),
+    WorkspaceMode.MODE_2D: (1, "mysticscape.tools.paint2d", "Canvas2D"),
+    WorkspaceMode.MODE_HYBRID: (2, "mysticscape.ui.hybrid_view", "HybridView"),
+}
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -24,6 +30,10 @@ class MainWindow(QMainWindow):
         self.trial_end_date = None
         self.current_mode = WorkspaceMode.MODE_3D
         self.layer_stack = LayerStack()
+        self.layer_items = {}
+        self.thumbnail_service = ThumbnailService(parent=self)
+        self.thumbnail_service.thumbnail_ready.connect(self.update_layer_thumbnail)
+        set_thumbnail_service(self.thumbnail_service)
         self.navigation = Navigation3D()
         self.setup_ui()
         self.show_splash_screen()
@@ -38,20 +48,43 @@ class MainWindow(QMainWindow):
         self.stack = QStackedWidget()
         self.setCentralWidget(self.stack)
 
-        # Create workspaces
-        self.canvas_2d = Canvas2D()
-        self.viewport_3d = Viewport3D()
-        self.hybrid_view = HybridView()
-        
-        # Add workspaces to stack
-        self.stack.addWidget(self.viewport_3d)  # Index 0
-        self.stack.addWidget(self.canvas_2d)    # Index 1
-        self.stack.addWidget(self.hybrid_view)  # Index 2
+        # Reserve a stack slot per workspace; each is built on first use
+        self.workspaces = {}
+        for mode in sorted(WORKSPACES, key=lambda m: WORKSPACES[m][0]):
+            self.stack.addWidget(QWidget())
 
         self.setup_toolbar()
         self.setup_status_bar()
         self.setup_dock_widgets()
 
+        # Only the starting workspace is built up front
+        self.workspace(self.current_mode)
+        self.stack.setCurrentIndex(WORKSPACES[self.current_mode][0])
+
+    def workspace(self, mode):
+        """Return the widget for a workspace, building it on first use"""
+        if mode not in self.workspaces:
+            index, module_name, class_name = WORKSPACES[mode]
+            widget = getattr(importlib.import_module(module_name), class_name)()
+            placeholder = self.stack.widget(index)
+            self.stack.removeWidget(placeholder)
+            placeholder.deleteLater()
+            self.stack.insertWidget(index, widget)
+            self.workspaces[mode] = widget
+        return self.workspaces[mode]
+
+    @property
+    def viewport_3d(self):
+        return self.workspace(WorkspaceMode.MODE_3D)
+
+    @property
+    def canvas_2d(self):
+        return self.workspace(WorkspaceMode.MODE_2D)
+
+    @property
+    def hybrid_view(self):
+        return self.workspace(WorkspaceMode.MODE_HYBRID)
+
     def setup_toolbar(self):
         """Setup the main toolbar"""
         # Main toolbar
@@ -179,6 +212,7 @@ class MainWindow(QMainWindow):
     def switch_mode(self, mode):
         """Enhanced mode switching"""
         self.current_mode = mode
+        self.workspace(mode)
         if mode == WorkspaceMode.MODE_3D:
             self.stack.setCurrentIndex(0)
             self.mode_label.setText("3D Mode")
@@ -232,14 +266,39 @@ class MainWindow(QMainWindow):
             self.update_layer_list()
 
     def update_layer_list(self):
-        """Update the layer list widget"""
-        self.layers_list.clear()
-        for layer in reversed(self.layer_stack.layers):
-            item = QListWidgetItem(layer.name)
-            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
-            item.setCheckState(Qt.CheckState.Checked if layer.properties.visible 
-                             else Qt.CheckState.Unchecked)
-            self.layers_list.addItem(item)
+        """Sync the layer list widget with the layer stack, touching only changed rows"""
+        layers = list(reversed(self.layer_stack.layers))
+        wanted = {layer.id for layer in layers}
+
+        # Drop rows for deleted layers
+        for layer_id in list(self.layer_items):
+            if layer_id not in wanted:
+                item = self.layer_items.pop(layer_id)
+                self.layers_list.takeItem(self.layers_list.row(item))
+
+        for row, layer in enumerate(layers):
+            item = self.layer_items.get(layer.id)
+            if item is None:
+                item = QListWidgetItem(layer.name)
+                item.setData(Qt.ItemDataRole.UserRole, layer.id)
+                item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+                self.layer_items[layer.id] = item
+                self.layers_list.insertItem(row, item)
+            elif self.layers_list.row(item) != row:
+                self.layers_list.takeItem(self.layers_list.row(item))
+                self.layers_list.insertItem(row, item)
+
+            if item.text() != layer.name:
+                item.setText(layer.name)
+            check_state = (Qt.CheckState.Checked if layer.properties.visible
+                           else Qt.CheckState.Unchecked)
+            if item.checkState() != check_state:
+                item.setCheckState(check_state)
+
+    def update_layer_thumbnail(self, layer_id: str, thumbnail: QImage):
+        """Refresh the icon of a single layer row"""
+        if item := self.layer_items.get(layer_id):
+            item.setIcon(QIcon(QPixmap.fromImage(thumbnail)))
 
     def change_active_layer(self, item):
         """Change the active layer"""
@@ -254,7 +313,8 @@ class MainWindow(QMainWindow):
     def change_camera_preset(self, preset_name):
         """Change camera to preset view"""
         self.navigation.set_camera_preset(preset_name)
-        self.viewport_3d.update()
+        if viewport := self.workspaces.get(WorkspaceMode.MODE_3D):
+            viewport.update()
 
     # Tool methods
     def activate_brush(self):
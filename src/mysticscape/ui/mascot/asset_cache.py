@@ -0,0 +1,132 @@
+"""
+Binary cache of normalized mascot meshes so FBX files are parsed only once
+"""
+
+import hashlib
+import logging
+import os
+import struct
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Union
+import numpy as np
+
+MAGIC = b"MSMESH\x00\x01"
+VERSION = 1
+# magic, version, vertex count, face count, source mtime (ns), source size, source sha256
+HEADER = struct.Struct("<8sIIIqq32s")
+MTIME_OFFSET = struct.calcsize("<8sIII")
+HEADER_SIZE = 128
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class MascotMesh:
+    """Normalized mascot geometry; arrays may be read-only memory maps"""
+    vertices: np.ndarray        # (N, 3) float32, centred and scaled to size 2
+    vertex_normals: np.ndarray  # (N, 3) float32
+    faces: np.ndarray           # (M, 3) uint32
+
+def default_cache_dir() -> Path:
+    """Directory used for compiled mesh files"""
+    if override := os.environ.get("MYSTICSCAPE_CACHE_DIR"):
+        return Path(override)
+    return Path.home() / ".mysticscape" / "cache" / "meshes"
+
+def cache_path_for(source: Path, cache_dir: Path) -> Path:
+    """Cache file name for a source asset, keyed by its absolute path"""
+    key = hashlib.sha1(str(source.resolve()).encode("utf-8")).hexdigest()
+    return cache_dir / f"{source.stem}-{key[:16]}.msmesh"
+
+def file_digest(path: Path) -> bytes:
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+def normalize_mesh(mesh) -> MascotMesh:
+    """Centre a trimesh mesh on its centre of mass and scale it to size 2"""
+    vertices = np.asarray(mesh.vertices, dtype=np.float64) - mesh.center_mass
+    vertices *= 2.0 / mesh.scale
+    return MascotMesh(vertices.astype(np.float32),
+                      np.asarray(mesh.vertex_normals, dtype=np.float32),
+                      np.asarray(mesh.faces, dtype=np.uint32))
+
+def write_cache(path: Path, mesh: MascotMesh, mtime_ns: int, size: int, digest: bytes):
+    """Write a compiled mesh file atomically"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    header = HEADER.pack(MAGIC, VERSION, len(mesh.vertices), len(mesh.faces),
+                         mtime_ns, size, digest)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header.ljust(HEADER_SIZE, b"\x00"))
+            f.write(np.ascontiguousarray(mesh.vertices, dtype=np.float32).tobytes())
+            f.write(np.ascontiguousarray(mesh.vertex_normals, dtype=np.float32).tobytes())
+            f.write(np.ascontiguousarray(mesh.faces, dtype=np.uint32).tobytes())
+        os.replace(tmp_name, path)
+    except Exception:
+        os.unlink(tmp_name)
+        raise
+
+def update_cache_mtime(path: Path, mtime_ns: int):
+    """Record a new source mtime in a compiled mesh's header"""
+    try:
+        with open(path, "r+b") as f:
+            f.seek(MTIME_OFFSET)
+            f.write(struct.pack("<q", mtime_ns))
+    except OSError as e:
+        logger.warning(f"Could not update mesh cache {path}: {e}")
+
+def read_cache(path: Path, source: Path) -> Optional[MascotMesh]:
+    """Memory-map a compiled mesh if it is still valid for source"""
+    try:
+        data = np.memmap(path, dtype=np.uint8, mode="r")
+    except (OSError, ValueError):
+        return None
+    if len(data) < HEADER_SIZE:
+        return None
+
+    magic, version, vertex_count, face_count, mtime_ns, size, digest = \
+        HEADER.unpack_from(data[:HEADER.size].tobytes())
+    if magic != MAGIC or version != VERSION:
+        return None
+    expected = HEADER_SIZE + vertex_count * 24 + face_count * 12
+    if len(data) != expected:
+        return None
+
+    stat = source.stat()
+    if (stat.st_mtime_ns, stat.st_size) != (mtime_ns, size):
+        # Touched but possibly unchanged; fall back to comparing contents
+        if stat.st_size != size or file_digest(source) != digest:
+            return None
+        # Same contents, so later loads can trust the new mtime without hashing
+        update_cache_mtime(path, stat.st_mtime_ns)
+
+    offset = HEADER_SIZE
+    vertices = np.frombuffer(data, dtype=np.float32, count=vertex_count * 3, offset=offset)
+    offset += vertices.nbytes
+    normals = np.frombuffer(data, dtype=np.float32, count=vertex_count * 3, offset=offset)
+    offset += normals.nbytes
+    faces = np.frombuffer(data, dtype=np.uint32, count=face_count * 3, offset=offset)
+    return MascotMesh(vertices.reshape(-1, 3), normals.reshape(-1, 3), faces.reshape(-1, 3))
+
+def load_mascot_mesh(source: Union[str, Path], cache_dir: Optional[Path] = None) -> MascotMesh:
+    """Load a normalized mascot mesh, parsing the source only on a cache miss"""
+    source = Path(source)
+    cache_file = cache_path_for(source, cache_dir or default_cache_dir())
+
+    if cached := read_cache(cache_file, source):
+        return cached
+
+    import trimesh
+    mesh = normalize_mesh(trimesh.load(str(source), force="mesh"))
+    stat = source.stat()
+    try:
+        write_cache(cache_file, mesh, stat.st_mtime_ns, stat.st_size, file_digest(source))
+    except OSError as e:
+        logger.warning(f"Could not write mesh cache {cache_file}: {e}")
+    return mesh
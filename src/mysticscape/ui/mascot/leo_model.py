@@ -6,10 +6,36 @@ import numpy as np
 from OpenGL.GL import *
 from OpenGL.GLU import *
 import math
+from .mesh_buffer import MascotMeshBuffer
+
+def rotation_y(degrees: float) -> np.ndarray:
+    """Rotation matrix about +Y matching glRotatef(degrees, 0, 1, 0)"""
+    angle = math.radians(degrees)
+    c, s = math.cos(angle), math.sin(angle)
+    return np.array([[c, 0, s], [0, 1, 0], [-s, 0, c]])
+
+def sphere_geometry(radius, slices, stacks, center=(0.0, 0.0, 0.0)):
+    """UV sphere vertices, faces and normals laid out like gluSphere"""
+    theta = np.linspace(0.0, np.pi, stacks + 1)
+    phi = np.linspace(0.0, 2.0 * np.pi, slices + 1)
+    polar, azimuth = np.meshgrid(theta, phi, indexing="ij")
+    normals = np.stack([np.sin(polar) * np.cos(azimuth),
+                        np.sin(polar) * np.sin(azimuth),
+                        np.cos(polar)], axis=-1).reshape(-1, 3)
+    vertices = normals * radius + np.asarray(center)
+
+    row = np.arange(stacks)[:, None] * (slices + 1)
+    column = np.arange(slices)[None, :]
+    a = row + column
+    b = a + slices + 1
+    faces = np.stack([np.stack([a, b, a + 1], axis=-1),
+                      np.stack([a + 1, b, b + 1], axis=-1)], axis=2).reshape(-1, 3)
+    return vertices, faces.astype(np.uint32), normals
 
 class LeoMascot:
     def __init__(self):
         self.rotation = 0
+        self.parts = None  # Built on first render, when a GL context exists
         self.create_model()
         
     def create_model(self):
@@ -27,76 +53,81 @@ class LeoMascot:
         self.eye_color = (0.3, 0.6, 0.9, 1.0)    # Blue
         self.nose_color = (0.3, 0.2, 0.2, 1.0)   # Dark brown
         
-    def draw_sphere(self, radius, slices, stacks):
-        """Draw a sphere with given parameters"""
-        quad = gluNewQuadric()
-        gluSphere(quad, radius, slices, stacks)
-        
-    def draw_mane_segment(self, angle, layer):
-        """Draw a single mane segment"""
-        radius = self.head_radius * (1.2 + layer * 0.2)
+    def build_geometry(self):
+        """Tessellate Leo once into GPU buffers, one per material"""
+        head = MascotMeshBuffer()
+        head.set_arrays(*sphere_geometry(self.head_radius, 32, 32))
+
+        mane = MascotMeshBuffer()
+        mane.set_arrays(*self.mane_geometry())
+
+        # Eyes share one buffer
+        left_eye = sphere_geometry(0.15, 16, 16, center=(0.4, 0.3, 0.7))
+        right_eye = sphere_geometry(0.15, 16, 16, center=(-0.4, 0.3, 0.7))
+        eyes = MascotMeshBuffer()
+        eyes.set_arrays(np.concatenate([left_eye[0], right_eye[0]]),
+                        np.concatenate([left_eye[1], right_eye[1] + len(left_eye[0])]),
+                        np.concatenate([left_eye[2], right_eye[2]]))
+
+        nose = MascotMeshBuffer()
+        nose.set_arrays(*sphere_geometry(0.2, 16, 16, center=(0, 0, 0.9)))
+
+        self.parts = [
+            (head, self.face_color),
+            (mane, self.mane_color),
+            (eyes, self.eye_color),
+            (nose, self.nose_color),
+        ]
+
+    def mane_geometry(self):
+        """Build every mane spike as one flat triangle list"""
         height = self.head_radius * 0.3
-        
-        glPushMatrix()
-        glRotatef(angle, 0, 1, 0)
-        glTranslatef(radius, 0, 0)
-        glRotatef(90, 0, 1, 0)
-        
-        # Draw mane spike
-        glBegin(GL_TRIANGLES)
-        glVertex3f(0, height, 0)
-        glVertex3f(-height/2, -height/2, 0)
-        glVertex3f(height/2, -height/2, 0)
-        glEnd()
-        
-        glPopMatrix()
-        
-    def draw_mane(self):
-        """Draw Leo's mane"""
-        glColor4f(*self.mane_color)
-        
-        for layer in range(self.mane_layers):
-            for i in range(self.mane_segments):
-                angle = (360.0 * i) / self.mane_segments
-                self.draw_mane_segment(angle, layer)
-                
-    def draw_face(self):
-        """Draw Leo's face features"""
-        # Draw eyes
-        glColor4f(*self.eye_color)
-        glPushMatrix()
-        glTranslatef(0.4, 0.3, 0.7)
-        self.draw_sphere(0.15, 16, 16)
-        glTranslatef(-0.8, 0, 0)
-        self.draw_sphere(0.15, 16, 16)
-        glPopMatrix()
-        
-        # Draw nose
-        glColor4f(*self.nose_color)
-        glPushMatrix()
-        glTranslatef(0, 0, 0.9)
-        self.draw_sphere(0.2, 16, 16)
-        glPopMatrix()
-        
+        spike = np.array([
+            [0, height, 0],
+            [-height / 2, -height / 2, 0],
+            [height / 2, -height / 2, 0],
+        ])
+        # Each spike is turned 90 degrees to face outwards ...
+        spike = spike @ rotation_y(90.0).T
+
+        layers = np.arange(self.mane_layers)
+        segments = np.arange(self.mane_segments)
+        radii = self.head_radius * (1.2 + layers * 0.2)
+        angles = 360.0 * segments / self.mane_segments
+
+        # ... pushed out to the mane radius, then spun around the head
+        offsets = np.zeros((len(radii), 3))
+        offsets[:, 0] = radii
+        placed = spike[None, :, :] + offsets[:, None, :]  # (layers, 3, 3)
+        spin = np.stack([rotation_y(angle) for angle in angles])  # (segments, 3, 3)
+        vertices = np.einsum("sij,lvj->slvi", spin, placed).reshape(-1, 3)
+
+        faces = np.arange(len(vertices), dtype=np.uint32).reshape(-1, 3)
+        return vertices, faces, None
+
     def render(self):
         """Render the Leo mascot"""
+        if self.parts is None:
+            self.build_geometry()
+
         glPushMatrix()
-        
+
         # Apply rotation animation
         glRotatef(self.rotation, 0, 1, 0)
-        
-        # Draw head
-        glColor4f(*self.face_color)
-        self.draw_sphere(self.head_radius, 32, 32)
-        
-        # Draw mane
-        self.draw_mane()
-        
-        # Draw face features
-        self.draw_face()
-        
+
+        for buffer, color in self.parts:
+            glColor4f(*color)
+            buffer.draw()
+
         glPopMatrix()
-        
+
+    def release(self):
+        """Free the GPU buffers (needs a current GL context)"""
+        if self.parts is not None:
+            for buffer, _ in self.parts:
+                buffer.release()
+            self.parts = None
+
     def update(self, dt):
         """Update mascot animation"""
         self.rotation += 45.0 * dt  # 45 degrees per second
@@ -0,0 +1,93 @@
+"""
+Shared GPU upload path for mascot meshes
+"""
+
+import ctypes
+import numpy as np
+from OpenGL.GL import *
+
+# Interleaved vertex layout: position (3 floats), normal (3 floats)
+STRIDE = 6 * 4
+NORMAL_OFFSET = 3 * 4
+
+def pack_mesh(vertices, faces, normals=None):
+    """Pack a triangle mesh into contiguous interleaved float32 vertices and
+    uint32 indices ready for glBufferData"""
+    positions = np.asarray(vertices, dtype=np.float32).reshape(-1, 3)
+    indices = np.ascontiguousarray(faces, dtype=np.uint32).reshape(-1)
+    if normals is None:
+        triangles = indices.reshape(-1, 3)
+        corners = positions[triangles]
+        face_normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+        normals = np.zeros_like(positions)
+        for corner in range(3):
+            np.add.at(normals, triangles[:, corner], face_normals)
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        normals = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+
+    data = np.empty((len(positions), 6), dtype=np.float32)
+    data[:, :3] = positions
+    data[:, 3:] = normals
+    return data, indices
+
+class MascotMeshBuffer:
+    """Mascot geometry held in a VBO/EBO pair and drawn with one call
+
+    Works with the fixed-function lighting the mascot widgets set up, so
+    materials and lights behave exactly as with glBegin/glEnd.
+    """
+
+    def __init__(self):
+        self.vertex_data = None
+        self.indices = None
+        self.count = 0
+        self.vbo = None
+        self.ebo = None
+        self.dirty = False
+
+    def set_mesh(self, mesh):
+        """Pack a trimesh mesh; no GL context is needed until draw()"""
+        self.set_arrays(mesh.vertices, mesh.faces, mesh.vertex_normals)
+
+    def set_arrays(self, vertices, faces, normals=None):
+        """Pack raw vertex/face arrays; no GL context is needed until draw()"""
+        self.vertex_data, self.indices = pack_mesh(vertices, faces, normals)
+        self.count = len(self.indices)
+        self.dirty = True
+
+    def upload(self):
+        """Copy the packed arrays into GPU buffers"""
+        if self.vbo is None:
+            self.vbo, self.ebo = glGenBuffers(2)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, self.vertex_data.nbytes, self.vertex_data, GL_STATIC_DRAW)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ebo)
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, self.indices.nbytes, self.indices, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+        self.dirty = False
+
+    def draw(self):
+        """Draw the whole mesh with a single indexed draw call"""
+        if self.count == 0:
+            return
+        if self.dirty:
+            self.upload()
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ebo)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_NORMAL_ARRAY)
+        glVertexPointer(3, GL_FLOAT, STRIDE, ctypes.c_void_p(0))
+        glNormalPointer(GL_FLOAT, STRIDE, ctypes.c_void_p(NORMAL_OFFSET))
+        glDrawElements(GL_TRIANGLES, self.count, GL_UNSIGNED_INT, None)
+        glDisableClientState(GL_NORMAL_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+
+    def release(self):
+        """Free the GPU buffers (needs a current GL context)"""
+        if self.vbo is not None:
+            glDeleteBuffers(2, [self.vbo, self.ebo])
+            self.vbo = self.ebo = None
+        self.dirty = self.vertex_data is not None
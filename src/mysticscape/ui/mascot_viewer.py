@@ -8,13 +8,14 @@ from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtWidgets import QOpenGLWidget
 from OpenGL.GL import *
 from OpenGL.GLU import *
-import numpy as np
-import trimesh
+from .mascot.asset_cache import load_mascot_mesh
+from .mascot.mesh_buffer import MascotMeshBuffer
 
 class MascotViewer(QOpenGLWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.mesh = None
+        self.mesh_buffer = MascotMeshBuffer()
         self.rotation = 0
         
         # Setup animation timer
@@ -32,13 +33,9 @@ class MascotViewer(QOpenGLWidget):
             mascot_path = Path(__file__).parent / "resources" / "mascot" / "Leo.fbx"
             print(f"Loading mascot from: {mascot_path}")
             
-            # Load the mesh using trimesh
-            self.mesh = trimesh.load(str(mascot_path))
-            
-            # Center and scale the mesh
-            self.mesh.vertices -= self.mesh.center_mass
-            scale = 2.0 / self.mesh.scale
-            self.mesh.vertices *= scale
+            # Load the centred and scaled mesh, parsing the FBX only on a cache miss
+            self.mesh = load_mascot_mesh(mascot_path)
+            self.mesh_buffer.set_mesh(self.mesh)
             
             print("Successfully loaded Leo mascot!")
             return True
@@ -92,22 +89,7 @@ class MascotViewer(QOpenGLWidget):
         
         # Render mesh
         glColor3f(1.0, 1.0, 1.0)  # White base color for lighting
-        glBegin(GL_TRIANGLES)
-        
-        # Draw each face with proper normals
-        for face in self.mesh.faces:
-            vertices = self.mesh.vertices[face]
-            # Calculate face normal
-            normal = np.cross(vertices[1] - vertices[0], 
-                            vertices[2] - vertices[0])
-            normal = normal / np.linalg.norm(normal)
-            
-            # Set normal and draw vertices
-            glNormal3fv(normal)
-            for vertex in vertices:
-                glVertex3fv(vertex)
-                
-        glEnd()
+        self.mesh_buffer.draw()
         
     def animate(self):
         """Update rotation animation"""
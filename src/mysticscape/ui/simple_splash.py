@@ -131,10 +131,16 @@ class SimpleSplash(QSplashScreen):
             self.status.setText(message)
         QApplication.processEvents()
 
-def show_splash_screen():
-    """Create and show splash screen"""
+def show_splash_screen(simulate_progress: bool = True):
+    """Create and show splash screen
+
+    Pass simulate_progress=False when the caller reports real startup
+    progress through update_progress().
+    """
     splash = SimpleSplash()
     splash.show()
+    if not simulate_progress:
+        return splash
     
     # Loading steps
     def update_splash():
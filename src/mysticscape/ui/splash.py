@@ -12,7 +12,8 @@ from PyQt6.QtWidgets import (QSplashScreen, QApplication, QProgressBar,
 from OpenGL.GL import *
 from OpenGL.GLU import *
 import numpy as np
-import trimesh
+from .mascot.asset_cache import load_mascot_mesh
+from .mascot.mesh_buffer import MascotMeshBuffer
 
 class MascotViewer(QOpenGLWidget):
     """OpenGL widget for displaying 3D mascot"""
@@ -20,6 +21,7 @@ class MascotViewer(QOpenGLWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.mesh = None
+        self.mesh_buffer = MascotMeshBuffer()
         self.rotation = 0
         
         # Start rotation timer
@@ -30,7 +32,8 @@ class MascotViewer(QOpenGLWidget):
     def load_mascot(self, fbx_path):
         """Load mascot FBX model"""
         try:
-            self.mesh = trimesh.load(fbx_path)
+            self.mesh = load_mascot_mesh(fbx_path)
+            self.mesh_buffer.set_mesh(self.mesh)
             self.update()
             return True
         except Exception as e:
@@ -68,12 +71,7 @@ class MascotViewer(QOpenGLWidget):
         glRotatef(self.rotation, 0, 1, 0)
         
         # Render mesh
-        glBegin(GL_TRIANGLES)
-        for face in self.mesh.faces:
-            for vertex_index in face:
-                vertex = self.mesh.vertices[vertex_index]
-                glVertex3f(*vertex)
-        glEnd()
+        self.mesh_buffer.draw()
 
 class EnhancedSplash(QSplashScreen):
     """Enhanced splash screen with 3D mascot"""
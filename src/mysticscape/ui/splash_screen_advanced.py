@@ -14,15 +14,22 @@ from PyQt6.QtWidgets import (QSplashScreen, QApplication, QProgressBar,
 from OpenGL.GL import *
 from OpenGL.GLU import *
 import numpy as np
-import trimesh
-from PIL import Image, ImageDraw, ImageFont
+from mysticscape.core.lazy import lazy_import
+from .mascot.asset_cache import MascotMesh, load_mascot_mesh
+from .mascot.mesh_buffer import MascotMeshBuffer
+
+# Only needed when rendering splash artwork
+Image = lazy_import("PIL.Image")
+ImageDraw = lazy_import("PIL.ImageDraw")
+ImageFont = lazy_import("PIL.ImageFont")
 
 class BlenderStyleMascot(QOpenGLWidget):
     """OpenGL widget for displaying 3D mascot with Blender-style rendering"""
     
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.mesh: Optional[trimesh.Trimesh] = None
+        self.mesh: Optional[MascotMesh] = None
+        self.mesh_buffer = MascotMeshBuffer()
         self.rotation = 0
         self.light_position = [5.0, 5.0, 10.0, 1.0]
         self.material_ambient = [0.2, 0.2, 0.2, 1.0]
@@ -38,13 +45,9 @@ class BlenderStyleMascot(QOpenGLWidget):
     def load_mascot(self, fbx_path: str) -> bool:
         """Load mascot FBX model with textures"""
         try:
-            # Load mesh with texture coordinates
-            self.mesh = trimesh.load(fbx_path)
-            
-            # Normalize mesh size and center it
-            self.mesh.vertices -= self.mesh.center_mass
-            scale = 2.0 / self.mesh.scale
-            self.mesh.vertices *= scale
+            # Centred and normalized; the FBX is parsed only on a cache miss
+            self.mesh = load_mascot_mesh(fbx_path)
+            self.mesh_buffer.set_mesh(self.mesh)
             
             self.update()
             return True
@@ -103,19 +106,8 @@ class BlenderStyleMascot(QOpenGLWidget):
         glMaterialf(GL_FRONT, GL_SHININESS, self.material_shininess)
         
         # Render mesh with smooth shading
-        glEnable(GL_SMOOTH)
-        glBegin(GL_TRIANGLES)
-        for face in self.mesh.faces:
-            # Calculate face normal for lighting
-            vertices = self.mesh.vertices[face]
-            normal = np.cross(vertices[1] - vertices[0], 
-                            vertices[2] - vertices[0])
-            normal = normal / np.linalg.norm(normal)
-            
-            for vertex_index in face:
-                glNormal3fv(normal)
-                glVertex3fv(self.mesh.vertices[vertex_index])
-        glEnd()
+        glShadeModel(GL_SMOOTH)
+        self.mesh_buffer.draw()
 
 class BlenderStyleSplash(QSplashScreen):
     """Blender-style splash screen with 3D mascot"""
@@ -0,0 +1,41 @@
+import os
+
+import numpy as np
+
+from mysticscape.ui.mascot import asset_cache
+from mysticscape.ui.mascot.asset_cache import (MascotMesh, cache_path_for, file_digest,
+                                               read_cache, write_cache)
+
+def make_mesh():
+    rng = np.random.default_rng(0)
+    return MascotMesh(rng.random((30, 3), dtype=np.float32),
+                      rng.random((30, 3), dtype=np.float32),
+                      rng.integers(0, 30, (40, 3)).astype(np.uint32))
+
+def compile_source(tmp_path):
+    source = tmp_path / "mascot.fbx"
+    source.write_bytes(b"fbx" * 1000)
+    stat = source.stat()
+    cache_file = cache_path_for(source, tmp_path / "cache")
+    write_cache(cache_file, make_mesh(), stat.st_mtime_ns, stat.st_size, file_digest(source))
+    return source, cache_file
+
+def test_touched_source_is_hashed_once(tmp_path, monkeypatch):
+    source, cache_file = compile_source(tmp_path)
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    hashed = []
+    monkeypatch.setattr(asset_cache, "file_digest",
+                        lambda path: hashed.append(path) or file_digest(path))
+    for _ in range(3):
+        mesh = read_cache(cache_file, source)
+        np.testing.assert_array_equal(mesh.faces, make_mesh().faces)
+    assert len(hashed) == 1
+
+def test_changed_source_invalidates_cache(tmp_path):
+    source, cache_file = compile_source(tmp_path)
+    stat = source.stat()
+    source.write_bytes(b"xbf" * 1000)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert read_cache(cache_file, source) is None
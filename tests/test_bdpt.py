@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from mysticscape.core.bdpt import ACCUMULATION_FILE, BidirectionalSettings, BiPathTracer
+from mysticscape.core.path_tracer import Camera, benchmark_scene
+
+class Interrupted(Exception):
+    pass
+
+def settings():
+    return BidirectionalSettings(samples_per_pass=1, passes=4, max_depth=3, tile_size=8,
+                                 checkpoint_interval=0.0)
+
+def test_resume_matches_uninterrupted_render(tmp_path):
+    scene, camera = benchmark_scene(), Camera(width=16, height=12)
+    expected = BiPathTracer(settings(), workers=1).render(scene, camera)
+
+    def stop_after_two(image, done):
+        if done == 2:
+            # A kill during the next pass would leave part of it in the working buffer
+            working = np.memmap(tmp_path / ACCUMULATION_FILE, dtype=np.float64, mode="r+")
+            working[::7] += 1.0
+            working.flush()
+            raise Interrupted
+
+    with pytest.raises(Interrupted):
+        BiPathTracer(settings(), workers=1).render(scene, camera, tmp_path, stop_after_two)
+    tracer = BiPathTracer(settings(), workers=1)
+    resumed_passes = []
+    image = tracer.render(scene, camera, tmp_path,
+                          lambda image, done: resumed_passes.append(done))
+    assert resumed_passes == [3, 4]
+    np.testing.assert_allclose(image, expected)
+    assert sorted(path.name for path in tmp_path.glob("snapshot-*")) == ["snapshot-4.f64"]
@@ -0,0 +1,18 @@
+import warnings
+
+import numpy as np
+
+from mysticscape.core.bvh import intersect_triangles
+
+def test_parallel_rays_miss_without_warnings():
+    # The first ray runs parallel to the triangle's plane, the second hits it head-on
+    origins = np.array([[-1.0, 0.2], [1.0, 0.2], [1.0, 1.0]])
+    directions = np.array([[-1.0, 0.0], [1.0, 0.0], [0.0, -1.0]])
+    v0 = np.zeros((3, 2))
+    e1 = np.array([[1.0, 1.0], [0.0, 0.0], [0.0, 0.0]])
+    e2 = np.array([[0.0, 0.0], [1.0, 1.0], [0.0, 0.0]])
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        t, u, v = intersect_triangles(origins, directions, v0, e1, e2)
+    assert t[0] == np.inf
+    assert t[1] == np.float64(1.0) and u[1] == np.float64(0.2) and v[1] == np.float64(0.2)
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("PyQt6.QtGui")
+
+from mysticscape.tools.compositor import get_compositor
+from mysticscape.tools.layer import Layer, LayerStack
+
+def make_stack(count=3, size=32):
+    stack = LayerStack()
+    rng = np.random.default_rng(0)
+    for _ in range(count):
+        layer = Layer(size, size)
+        layer.pixels[:] = rng.integers(0, 256, layer.pixels.shape, dtype=np.uint8)
+        layer.mark_changed()
+        stack.add_layer(layer)
+    stack.set_active_layer(1)
+    return stack
+
+def uncached(stack):
+    width, height = stack.layers[0].image.width(), stack.layers[0].image.height()
+    out = np.zeros((height, width, 4), dtype=np.uint8)
+    get_compositor().composite(LayerStack.visible_sources(stack.layers), out)
+    return out
+
+def cached(stack):
+    width, height = stack.layers[0].image.width(), stack.layers[0].image.height()
+    out = np.zeros((height, width, 4), dtype=np.uint8)
+    stack.composite_into(out)
+    return out
+
+@pytest.mark.parametrize("edited", [0, 2])
+def test_edit_of_inactive_layer_invalidates_cache(edited):
+    stack = make_stack()
+    cached(stack)
+
+    stack.layers[edited].pixels[:8] = 255
+    stack.layers[edited].mark_changed()
+    difference = np.abs(cached(stack).astype(int) - uncached(stack).astype(int))
+    assert difference.max() <= 1
+
+def test_mark_changed_bumps_revision():
+    layer = Layer(4, 4)
+    revision = layer.revision
+    layer.mark_changed()
+    assert layer.revision == revision + 1
@@ -0,0 +1,48 @@
+import builtins
+import sys
+import threading
+
+import pytest
+
+from mysticscape.core.lazy import MissingModule, lazy_import
+
+SLOW_MODULE = '''
+import time
+import builtins
+builtins.slow_module_runs = getattr(builtins, "slow_module_runs", 0) + 1
+time.sleep(0.2)
+VALUE = 42
+'''
+
+def test_concurrent_first_access_imports_once(tmp_path, monkeypatch):
+    (tmp_path / "slow_lazy_module.py").write_text(SLOW_MODULE)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "slow_lazy_module", raising=False)
+
+    module = lazy_import("slow_lazy_module")
+    assert "slow_lazy_module" not in sys.modules
+
+    results, errors = [], []
+    def read():
+        try:
+            results.append(module.VALUE)
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    try:
+        assert not errors and results == [42] * 8
+        assert builtins.slow_module_runs == 1
+    finally:
+        del builtins.slow_module_runs
+        sys.modules.pop("slow_lazy_module", None)
+
+def test_missing_module_raises_on_use():
+    module = lazy_import("mysticscape_no_such_module")
+    assert isinstance(module, MissingModule)
+    with pytest.raises(ModuleNotFoundError):
+        module.anything
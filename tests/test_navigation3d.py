@@ -0,0 +1,25 @@
+import pytest
+
+pytest.importorskip("PyQt6.QtCore")
+
+from mysticscape.tools.navigation3d import Navigation3D
+
+def test_apply_input_pans_and_zooms():
+    navigation = Navigation3D()
+    navigation.set_camera_preset("Front")
+    assert navigation.apply_input({"pan": [10.0, 5.0], "zoom": [20.0, 0.0]})
+    position, target, up = navigation.camera
+    assert position == pytest.approx((-0.1, 0.05, 3.0))
+    assert target == pytest.approx((-0.1, 0.05, 0.0))
+    assert up == (0.0, 1.0, 0.0)
+
+def test_apply_input_reports_no_motion():
+    navigation = Navigation3D()
+    assert not navigation.apply_input({})
+    assert not navigation.apply_input({"unknown": [1.0, 1.0]})
+
+def test_orbit_keeps_distance_to_target():
+    navigation = Navigation3D()
+    navigation.apply_input({"orbit": [0.3, -0.2]})
+    position, target, _ = navigation.camera
+    assert sum((p - t) ** 2 for p, t in zip(position, target)) == pytest.approx(75.0)
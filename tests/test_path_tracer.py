@@ -0,0 +1,38 @@
+import gc
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from mysticscape.core import path_tracer
+from mysticscape.core.path_tracer import Camera, RenderSettings, UniPathTracer, benchmark_scene
+
+def settings():
+    return RenderSettings(samples_per_pixel=2, max_depth=3, tile_size=8)
+
+def open_handles(name):
+    return [obj for obj in gc.get_objects()
+            if isinstance(obj, shared_memory.SharedMemory) and obj._name.lstrip("/") == name
+            and obj._buf is not None]
+
+def test_worker_releases_the_frame_buffer_after_each_tile():
+    scene, camera = benchmark_scene(), Camera(width=16, height=12)
+    shm = shared_memory.SharedMemory(create=True, size=16 * 12 * 3 * 4)
+    name = shm.name.lstrip("/")
+    try:
+        path_tracer._init_worker(scene.arrays(), camera, settings(), shm.name)
+        tiles = path_tracer.split_tiles(camera.width, camera.height, 8)
+        for index, tile in enumerate(tiles):
+            path_tracer._render_tile(index, tile)
+        assert open_handles(name) == [shm]
+        frame = np.ndarray((12, 16, 3), dtype=np.float32, buffer=shm.buf).copy()
+        assert frame.any()
+    finally:
+        path_tracer._worker.clear()
+        shm.close()
+        shm.unlink()
+
+def test_render_is_independent_of_worker_count():
+    scene, camera = benchmark_scene(), Camera(width=16, height=12)
+    single = UniPathTracer(settings(), workers=1).render(scene, camera)
+    pooled = UniPathTracer(settings(), workers=2).render(scene, camera)
+    np.testing.assert_array_equal(single, pooled)
@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+
+from mysticscape.tools.picking import Picker, decode_id, encode_ids, ray_boxes
+from mysticscape.tools.scene_graph import SceneGraph, look_at, perspective, translation
+
+WIDTH, HEIGHT = 800, 600
+CUBE = np.array([[-1.0, -1.0, -1.0], [1.0, 1.0, 1.0]]) * 0.1
+
+def make_scene(count=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    scene = SceneGraph()
+    for i in range(count):
+        scene.add(f"o{i}", CUBE, matrix=translation(rng.uniform(-10, 10, 3)))
+    scene.update_world()
+    return scene
+
+def view_projection():
+    return perspective(45.0, WIDTH / HEIGHT, 0.1, 1000.0) @ look_at([0, 0, 30], [0, 0, 0], [0, 1, 0])
+
+def brute_box(scene, rect):
+    rows = scene.live_rows()
+    centers = scene.world_bounds(rows).mean(axis=1)
+    pixels = Picker.project(view_projection(), centers, WIDTH, HEIGHT)
+    x0, y0, x1, y1 = rect
+    inside = ((pixels[:, 0] >= x0) & (pixels[:, 0] <= x1)
+              & (pixels[:, 1] >= y0) & (pixels[:, 1] <= y1))
+    return set(rows[inside].tolist())
+
+def brute_lasso(pixels, polygon):
+    inside = []
+    for x, y in pixels:
+        crossings = False
+        for (x1, y1), (x2, y2) in zip(polygon, np.roll(polygon, -1, axis=0)):
+            if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+                crossings = not crossings
+        inside.append(crossings)
+    return np.array(inside)
+
+def test_id_colors_round_trip():
+    rows = np.array([0, 1, 255, 256, 70000, (1 << 24) - 2])
+    colors = np.round(encode_ids(rows) * 255).astype(int)
+    assert [decode_id(color) for color in colors] == rows.tolist()
+    assert decode_id((0, 0, 0, 255)) == -1
+
+def test_box_selection_matches_brute_force():
+    scene = make_scene()
+    picker = Picker(scene)
+    rect = (100, 80, 500, 420)
+    rows = picker.select_box(view_projection(), rect, WIDTH, HEIGHT)
+    assert len(rows) == len(set(rows.tolist()))
+    assert set(rows.tolist()) == brute_box(scene, rect)
+
+def test_box_selection_after_scene_changes_without_manual_rebuild():
+    scene = make_scene()
+    picker = Picker(scene)
+    rect = (100, 80, 500, 420)
+    picker.select_box(view_projection(), rect, WIDTH, HEIGHT)
+
+    moved = scene.live_rows()[::4]
+    scene.set_local(moved, np.array([translation(np.random.default_rng(1).uniform(-10, 10, 3))
+                                     for _ in moved]))
+    scene.update_world()
+    assert set(picker.select_box(view_projection(), rect, WIDTH, HEIGHT).tolist()) \
+        == brute_box(scene, rect)
+
+    scene.remove(scene.live_rows()[:500])
+    scene.add("late", CUBE)
+    scene.update_world()
+    assert set(picker.select_box(view_projection(), rect, WIDTH, HEIGHT).tolist()) \
+        == brute_box(scene, rect)
+
+def test_box_selection_on_fresh_picker():
+    scene = make_scene()
+    rect = (0, 0, WIDTH, HEIGHT)
+    assert set(Picker(scene).select_box(view_projection(), rect, WIDTH, HEIGHT).tolist()) \
+        == brute_box(scene, rect)
+
+def test_lasso_selection_matches_brute_force():
+    scene = make_scene()
+    picker = Picker(scene)
+    polygon = np.array([[100.0, 100.0], [600.0, 150.0], [350.0, 550.0], [120.0, 400.0]])
+    rows = picker.select_lasso(view_projection(), polygon, WIDTH, HEIGHT)
+
+    live = scene.live_rows()
+    pixels = Picker.project(view_projection(), scene.world_bounds(live).mean(axis=1),
+                            WIDTH, HEIGHT)
+    assert set(rows.tolist()) == set(live[brute_lasso(pixels, polygon)].tolist())
+
+@pytest.mark.parametrize("pixel", [(400, 300), (410, 290), (100, 50), (640, 480)])
+def test_pick_returns_nearest_bounds_hit(pixel):
+    scene = make_scene(5000)
+    picker = Picker(scene)
+    origin, direction = picker.pixel_ray(view_projection(), *pixel, WIDTH, HEIGHT)
+    bounds = scene.world_bounds(scene.live_rows())
+    distance, hit = ray_boxes(origin, direction, bounds[:, 0], bounds[:, 1])
+    expected = scene.live_rows()[np.flatnonzero(hit)[np.argmin(distance[hit])]] if hit.any() else -1
+    assert picker.pick(view_projection(), *pixel, WIDTH, HEIGHT) == expected
+
+def test_pick_sees_moved_object():
+    scene = SceneGraph()
+    row = scene.add("cube", CUBE)
+    scene.update_world()
+    picker = Picker(scene)
+    assert picker.pick(view_projection(), 400, 300, WIDTH, HEIGHT) == row
+
+    scene.set_local(row, translation([5.0, 0.0, 0.0]))
+    scene.update_world()
+    assert picker.pick(view_projection(), 400, 300, WIDTH, HEIGHT) == -1
@@ -0,0 +1,57 @@
+import json
+
+from mysticscape.core.pipeline import PluginManager
+
+PLUGIN = '''
+from mysticscape.core.pipeline import Plugin, PluginType
+
+class {name}(Plugin):
+    def initialize(self):
+        return True
+
+    def shutdown(self):
+        pass
+
+def create_plugin():
+    return {name}("{name}", "1.0", PluginType.CUSTOM)
+'''
+
+def write_plugin(directory, name):
+    directory.mkdir(exist_ok=True)
+    (directory / f"{name.lower()}.py").write_text(PLUGIN.format(name=name))
+
+def cached_paths(cache_path):
+    return sorted(entry["path"] for entry in json.loads(cache_path.read_text()))
+
+def scan(cache_path, directory):
+    manager = PluginManager(cache_path, max_workers=1)
+    manager.add_plugin_path(directory)
+    manager.scan_plugins()
+    return manager
+
+def test_scans_of_different_paths_share_the_cache(tmp_path):
+    cache_path = tmp_path / "plugins.json"
+    write_plugin(tmp_path / "a", "Alpha")
+    write_plugin(tmp_path / "b", "Beta")
+
+    scan(cache_path, tmp_path / "a")
+    scan(cache_path, tmp_path / "b")
+    assert cached_paths(cache_path) == [str(tmp_path / "a" / "alpha.py"),
+                                        str(tmp_path / "b" / "beta.py")]
+
+    manager = scan(cache_path, tmp_path / "a")
+    assert "Alpha" in manager.manifests and "Alpha" not in manager.plugins
+
+def test_removed_plugin_leaves_the_cache(tmp_path):
+    cache_path = tmp_path / "plugins.json"
+    write_plugin(tmp_path / "a", "Alpha")
+    write_plugin(tmp_path / "a", "Gamma")
+    write_plugin(tmp_path / "b", "Beta")
+    scan(cache_path, tmp_path / "b")
+    scan(cache_path, tmp_path / "a")
+
+    (tmp_path / "a" / "gamma.py").unlink()
+    manager = scan(cache_path, tmp_path / "a")
+    assert set(manager.manifests) == {"Alpha"}
+    assert cached_paths(cache_path) == [str(tmp_path / "a" / "alpha.py"),
+                                        str(tmp_path / "b" / "beta.py")]
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from mysticscape.tools import primitives
+
+@pytest.mark.parametrize("mesh_type", sorted(primitives.GENERATORS))
+def test_minimum_resolution_builds_a_closed_mesh(mesh_type):
+    segments, rings = primitives.MIN_RESOLUTION[mesh_type]
+    vertices, faces = primitives.generate(mesh_type, segments, rings)
+    assert len(vertices) >= 3 and len(faces) >= 1
+    assert faces.min() >= 0 and faces.max() < len(vertices)
+    # No triangle collapses to a line or a point
+    a, b, c = vertices[faces].transpose(1, 0, 2)
+    assert (np.linalg.norm(np.cross(b - a, c - a), axis=1) > 1e-6).all()
+
+@pytest.mark.parametrize("mesh_type, segments, rings", [
+    ("cylinder", 2, 1),
+    ("cone", 2, 1),
+    ("sphere", 2, 16),
+    ("sphere", 32, 1),
+    ("circle", 2, None),
+    ("torus", 2, 1),
+    ("torus", 48, 2),
+    ("monkey", 0, 16),
+    ("plane", 0, None),
+    ("icosphere", -1, None),
+])
+def test_too_low_resolution_raises(mesh_type, segments, rings):
+    primitives.clear_cache()
+    with pytest.raises(ValueError):
+        primitives.generate(mesh_type, segments, rings)
+    assert primitives._generate.cache_info().currsize == 0
@@ -0,0 +1,126 @@
+import numpy as np
+import pytest
+
+from mysticscape.core.query import (QueryError, SceneObject, SceneQueryEngine, matches,
+                                    parse_query)
+
+TYPES = ["Mesh", "Light", "Camera", "Empty"]
+MATERIALS = ["gold", "iron", "glass"]
+
+@pytest.mark.parametrize("query", [
+    "type in (Mesh",
+    "type in (Mesh,",
+    "type in Mesh",
+    "type = Mesh 5",
+    "type = Mesh or height > 2",
+    "type = Mesh and",
+    "height 5",
+    "height",
+    "5 = height",
+    "has",
+    "inside (0, 0, 0, 1, 1)",
+    "intersects (0, 0, 0, 1, 1, 'a')",
+    "height >= )",
+])
+def test_malformed_query_raises_query_error(query):
+    with pytest.raises(QueryError):
+        parse_query(query)
+
+def test_parse_clauses():
+    clauses = parse_query('type = Mesh and material in ("gold", "iron") and has tag '
+                          'and height >= 2 AND inside (0, 0, 0, 10, 10, 10)')
+    assert [(c.kind, c.name, c.op, c.value) for c in clauses] == [
+        ("compare", "type", "=", "Mesh"),
+        ("in", "material", "in", ["gold", "iron"]),
+        ("has", "tag", "", None),
+        ("compare", "height", ">=", 2),
+        ("bounds", "bounds", "inside", (0.0, 0.0, 0.0, 10.0, 10.0, 10.0)),
+    ]
+
+def make_engine(count=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    engine = SceneQueryEngine(chunk_size=256)
+    for i in range(count):
+        attributes = {"material": MATERIALS[rng.integers(len(MATERIALS))],
+                      "height": int(rng.integers(0, 10))}
+        if i % 3 == 0:
+            attributes["tag"] = "prop"
+        lo = rng.uniform(-20, 20, 3)
+        engine.add(SceneObject(f"/world/{TYPES[i % len(TYPES)].lower()}{i}",
+                               TYPES[i % len(TYPES)], attributes,
+                               tuple(lo) + tuple(lo + rng.uniform(0, 3, 3))))
+    return engine
+
+def brute(engine, query):
+    clauses = parse_query(query)
+    found = set()
+    for obj in engine.objects:
+        if obj is None:
+            continue
+        ok = True
+        for clause in clauses:
+            if clause.kind == "bounds":
+                lo, hi = np.array(obj.bounds[:3]), np.array(obj.bounds[3:])
+                box_lo, box_hi = np.array(clause.value[:3]), np.array(clause.value[3:])
+                if clause.op == "inside":
+                    ok &= bool(np.all(lo >= box_lo) and np.all(hi <= box_hi))
+                else:
+                    ok &= bool(np.all(lo <= box_hi) and np.all(hi >= box_lo))
+                continue
+            if clause.name in ("type", "path"):
+                present, value = True, getattr(obj, clause.name)
+            else:
+                present, value = clause.name in obj.attributes, obj.attributes.get(clause.name)
+            ok &= present if clause.kind == "has" else present and matches(value, clause.op,
+                                                                            clause.value)
+        if ok:
+            found.add(obj.path)
+    return found
+
+@pytest.mark.parametrize("query", [
+    "type = Mesh",
+    'type = Mesh and material = "gold"',
+    "material in (gold, glass) and height >= 5",
+    "has tag and height < 3",
+    "path like /world/light1* and height != 4",
+    "intersects (-5, -5, -5, 5, 5, 5)",
+    "type = Camera and inside (-15, -15, -15, 15, 15, 15)",
+])
+@pytest.mark.parametrize("parallel", [False, True])
+def test_execute_matches_brute_force(query, parallel):
+    engine = make_engine()
+    try:
+        assert {obj.path for obj in engine.execute(query, parallel)} == brute(engine, query)
+    finally:
+        engine.shutdown()
+
+def test_indexes_follow_edits():
+    engine = make_engine(500)
+    try:
+        list(engine.execute("material = gold and height > 5"))
+        for obj in [o for o in engine.objects if o is not None][::7]:
+            engine.update(obj.path, material="gold", height=9)
+        for obj in [o for o in engine.objects if o is not None][::11]:
+            engine.remove(obj.path)
+        query = "material = gold and height > 5"
+        assert {obj.path for obj in engine.execute(query)} == brute(engine, query)
+    finally:
+        engine.shutdown()
+
+def test_has_matches_unhashable_values():
+    engine = SceneQueryEngine()
+    engine.add(SceneObject("/a", "Mesh", {"tags": ["x", "y"]}))
+    engine.add(SceneObject("/b", "Mesh", {"tags": ("x",)}))
+    engine.add(SceneObject("/c", "Light", {"tags": ["z"]}))
+    engine.add(SceneObject("/d", "Mesh"))
+    assert {obj.path for obj in engine.execute("has tags")} == {"/a", "/b", "/c"}
+    assert {obj.path for obj in engine.execute("type = Mesh and has tags")} == {"/a", "/b"}
+    engine.remove("/a")
+    assert {obj.path for obj in engine.execute("has tags")} == {"/b", "/c"}
+
+@pytest.mark.parametrize("query", ["h > 1", "h >= 1", "h < 5", "h <= 5"])
+def test_nan_never_matches_ranges(query):
+    engine = SceneQueryEngine()
+    engine.add(SceneObject("/nan", "Mesh", {"h": float("nan")}))
+    engine.add(SceneObject("/three", "Mesh", {"h": 3}))
+    assert {obj.path for obj in engine.execute(query)} == {"/three"}
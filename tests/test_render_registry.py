@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from mysticscape.core.render_registry import RendererRegistry
+
+class Engine:
+    def __init__(self, size):
+        self.buffer = np.zeros(size, dtype=np.uint8)
+        self.released = False
+
+    def release(self):
+        self.released = True
+
+def failing():
+    raise RuntimeError("no license")
+
+def test_engines_are_built_lazily_and_evicted_least_recently_used():
+    registry = RendererRegistry(memory_cap=2500)
+    for key in "abc":
+        registry.register(key, lambda: Engine(1000))
+    assert not any(registry.is_built(key) for key in "abc")
+
+    first = registry.activate("a")
+    registry.get("b")
+    registry.get("c")
+    assert registry.is_built("a") and not registry.is_built("b") and registry.is_built("c")
+    assert not first.released and registry.activate("a") is first
+
+def test_new_engine_is_not_evicted_by_its_own_build():
+    registry = RendererRegistry(memory_cap=1500)
+    registry.register("a", lambda: Engine(1000))
+    registry.register("b", lambda: Engine(1000))
+    registry.activate("a")
+    second = registry.activate("b")
+    assert registry.active == "b" and registry.is_built("b") and not second.released
+    assert not registry.is_built("a")
+
+def test_failed_activation_keeps_previous_engine_active():
+    registry = RendererRegistry()
+    registry.register("a", lambda: Engine(10))
+    registry.register("broken", failing)
+    engine = registry.activate("a")
+    with pytest.raises(RuntimeError):
+        registry.activate("broken")
+    assert registry.active == "a" and registry.get("a") is engine
+    with pytest.raises(KeyError):
+        registry.activate("missing")
+
+@pytest.mark.parametrize("trace", [False, True])
+def test_memory_estimate_covers_engine_buffers(trace):
+    registry = RendererRegistry(trace_allocations=trace)
+    registry.register("a", lambda: Engine(1 << 20))
+    registry.activate("a")
+    assert registry.memory_used >= 1 << 20
@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+
+from mysticscape.tools.scene_graph import SceneGraph, rotation, scaling, translation
+from mysticscape.tools.visibility import Visibility
+
+def random_matrix(rng):
+    return (translation(rng.uniform(-5, 5, 3)) @ rotation(rng.normal(size=3), rng.uniform(0, 6))
+            @ scaling(rng.uniform(0.5, 2.0)))
+
+def make_tree(count=300, seed=0):
+    """Random forest where every parent row precedes its children"""
+    rng = np.random.default_rng(seed)
+    scene = SceneGraph(capacity=8)
+    for i in range(count):
+        parent = int(rng.integers(-1, i)) if i else -1
+        scene.add(f"n{i}", parent=parent if parent >= 0 else None, matrix=random_matrix(rng))
+    return scene, rng
+
+def naive_world(scene, row):
+    matrix = scene.local[row]
+    parent = scene.parent[row]
+    while parent >= 0:
+        matrix = scene.local[parent] @ matrix
+        parent = scene.parent[parent]
+    return matrix
+
+def assert_world_matches_naive(scene):
+    for row in scene.live_rows():
+        np.testing.assert_allclose(scene.world[row], naive_world(scene, row), atol=1e-9)
+
+def test_update_world_matches_recursive_reference():
+    scene, rng = make_tree()
+    scene.update_world()
+    assert_world_matches_naive(scene)
+
+    moved = rng.choice(scene.live_rows(), 20, replace=False)
+    scene.set_local(moved, np.array([random_matrix(rng) for _ in moved]))
+    changed = set(scene.update_world().tolist())
+    assert set(moved.tolist()) <= changed
+    assert_world_matches_naive(scene)
+    assert len(scene.update_world()) == 0
+
+def test_remove_keeps_children_world_transforms():
+    scene, rng = make_tree()
+    scene.update_world()
+    before = scene.world.copy()
+    removed = rng.choice(scene.live_rows(), 60, replace=False)
+    scene.remove(removed)
+    scene.update_world()
+
+    live = scene.live_rows()
+    assert not np.isin(live, removed).any()
+    assert not np.isin(scene.parent[live], removed).any()
+    np.testing.assert_allclose(scene.world[live], before[live], atol=1e-9)
+    assert_world_matches_naive(scene)
+
+def test_removed_rows_are_reused():
+    scene, _ = make_tree(10)
+    row = scene.index["n3"]
+    scene.remove([row])
+    assert "n3" not in scene and scene.add("again") == row
+
+def test_set_parent_rejects_cycles():
+    scene = SceneGraph()
+    root = scene.add("root")
+    child = scene.add("child", parent=root)
+    with pytest.raises(ValueError):
+        scene.set_parent(root, child)
+
+def test_transform_moves_topmost_selection_and_cancel_restores():
+    scene = SceneGraph()
+    parent = scene.add("parent", matrix=translation([1.0, 0.0, 0.0]))
+    child = scene.add("child", parent=parent, matrix=translation([0.0, 2.0, 0.0]))
+    other = scene.add("other", matrix=rotation([0, 0, 1], 0.5))
+    scene.select([parent, child, other])
+    scene.update_world()
+    start = scene.world.copy()
+
+    session = scene.begin_transform("GRAB")
+    assert sorted(session.indices.tolist()) == [parent, other]
+    delta = translation([0.0, 0.0, 3.0])
+    scene.apply_transform(session, delta)
+    scene.update_world()
+    for row in (parent, child, other):
+        np.testing.assert_allclose(scene.world[row], delta @ start[row], atol=1e-12)
+
+    scene.cancel_transform(session)
+    scene.update_world()
+    np.testing.assert_allclose(scene.world[:scene.count], start[:scene.count], atol=1e-12)
+
+def test_transform_without_selection_is_none():
+    scene = SceneGraph()
+    scene.add("cube")
+    assert scene.begin_transform("GRAB") is None
+
+def test_unique_names():
+    scene = SceneGraph()
+    for _ in range(4):
+        scene.add(scene.unique_name("cube"))
+    assert sorted(scene.index) == ["cube", "cube.001", "cube.002", "cube.003"]
+
+def test_moves_survive_an_update_by_another_caller():
+    scene = SceneGraph()
+    row = scene.add("cube", np.array([[-1.0, -1.0, -1.0], [1.0, 1.0, 1.0]]))
+    scene.select([row])
+    visibility = Visibility(scene)
+    visibility.refresh()
+
+    session = scene.begin_transform("GRAB")
+    scene.apply_transform(session, translation([10.0, 0.0, 0.0]))
+    # Starting another grab before the next paint updates the world itself
+    scene.begin_transform("GRAB")
+    visibility.refresh()
+    np.testing.assert_allclose(visibility.centers[row], [10.0, 0.0, 0.0])
+    assert len(scene.take_moved()) == 0
@@ -0,0 +1,47 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("PyQt6.QtWidgets")
+
+from PyQt6.QtGui import QImage
+from PyQt6.QtWidgets import QApplication
+
+from mysticscape.tools import thumbnails
+from mysticscape.tools.thumbnails import ThumbnailService
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication([])
+
+def make_layer():
+    image = QImage(256, 128, QImage.Format.Format_ARGB32)
+    image.fill(0xff336699)
+    return SimpleNamespace(id="layer", image=image, thumbnail=None, thumbnail_stale=False)
+
+def wait_for(app, condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.005)
+    return condition()
+
+def test_failed_thumbnail_is_retried_on_next_request(app, monkeypatch):
+    service = ThumbnailService(delay_ms=0)
+    layer = make_layer()
+    make_thumbnail = thumbnails.make_thumbnail
+    try:
+        monkeypatch.setattr(thumbnails, "make_thumbnail", lambda image, size: 1 / 0)
+        service.request(layer)
+        service.flush()
+        assert wait_for(app, lambda: not service._generation)
+        assert layer.thumbnail is None and layer.thumbnail_stale
+
+        monkeypatch.setattr(thumbnails, "make_thumbnail", make_thumbnail)
+        service.request(layer)
+        service.flush()
+        assert wait_for(app, lambda: layer.thumbnail is not None)
+        assert not layer.thumbnail_stale and layer.thumbnail.width() == thumbnails.THUMBNAIL_SIZE
+    finally:
+        service.shutdown()
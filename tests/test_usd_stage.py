@@ -0,0 +1,122 @@
+import threading
+import time
+
+import numpy as np
+
+from mysticscape.core.usd_stage import ChangeJournal, ChangeKind, StreamingStage, box_region
+
+KIB = 1024
+
+def make_stage(tmp_path, count=4, budget=1 << 30):
+    stage = StreamingStage(memory_budget=budget)
+    for i in range(count):
+        asset = tmp_path / f"p{i}.npy"
+        np.save(asset, np.full(KIB, i, dtype=np.uint8))
+        stage.define_prim(f"/world/p{i}", "Mesh", bounds=(i * 10, 0, 0, i * 10 + 1, 1, 1),
+                          payload=asset)
+    return stage
+
+def test_journal_cursor_advances_per_consumer():
+    journal = ChangeJournal()
+    journal.register("renderer")
+    journal.append("/a", ChangeKind.ADDED)
+    journal.append("/b", ChangeKind.CHANGED, ("color",))
+
+    changes = journal.consume("renderer")
+    assert not changes.full_resync and changes.paths == {"/a", "/b"}
+    assert [change.sequence for change in changes.changes] == [0, 1]
+    assert journal.consume("renderer").paths == set()
+
+    journal.append("/a", ChangeKind.CHANGED)
+    assert journal.consume("renderer").paths == {"/a"}
+
+def test_new_consumer_gets_full_resync():
+    journal = ChangeJournal()
+    journal.append("/a", ChangeKind.ADDED)
+    assert journal.consume("exporter").full_resync
+    journal.append("/b", ChangeKind.ADDED)
+    assert journal.consume("exporter").paths == {"/b"}
+
+def test_journal_trims_seen_entries_and_resyncs_lagging_consumers():
+    journal = ChangeJournal(max_entries=3)
+    journal.register("fast")
+    journal.register("slow")
+    for i in range(2):
+        journal.append(f"/p{i}", ChangeKind.ADDED)
+    journal.consume("fast")
+    assert len(journal.entries) == 2  # slow has not seen them yet
+
+    journal.consume("slow")
+    assert journal.entries == [] and journal.first_sequence == 2
+
+    for i in range(5):
+        journal.append(f"/q{i}", ChangeKind.ADDED)
+    assert len(journal.entries) == 3
+    assert journal.consume("slow").full_resync
+    assert journal.consume("slow").paths == set()
+
+def test_eviction_is_lru_under_budget(tmp_path):
+    stage = make_stage(tmp_path, budget=3 * KIB)
+    for i in range(3):
+        stage.payload_data(f"/world/p{i}")
+    stage.payload_data("/world/p0")  # p1 is now least recently used
+    stage.payload_data("/world/p3")
+    assert list(stage.loaded) == ["/world/p2", "/world/p0", "/world/p3"]
+    assert stage.memory_used == 3 * KIB
+
+def test_visible_payloads_are_evicted_last(tmp_path):
+    stage = make_stage(tmp_path, budget=2 * KIB)
+    stage.update_viewport(box_region((0, 0, 0), (1, 1, 1)))  # Loads p0
+    stage.payload_data("/world/p1")
+    stage.payload_data("/world/p2")
+    assert set(stage.loaded) == {"/world/p0", "/world/p2"}
+    assert stage.prims["/world/p1"].payload.data is None
+
+    changes = stage.consume_changes("renderer")
+    assert changes.full_resync
+    stage.payload_data("/world/p3")
+    kinds = {(c.path, c.kind) for c in stage.consume_changes("renderer").changes}
+    assert kinds == {("/world/p3", ChangeKind.LOADED), ("/world/p2", ChangeKind.UNLOADED)}
+
+def test_concurrent_loads_read_the_asset_once(tmp_path):
+    stage = make_stage(tmp_path, count=0)
+    calls = []
+    def slow_loader(path):
+        calls.append(path)
+        time.sleep(0.1)
+        return np.zeros(KIB, dtype=np.uint8)
+    stage.register_loader(".slow", slow_loader)
+    stage.define_prim("/slow", payload=tmp_path / "asset.slow")
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(stage.load("/slow")))
+               for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert len(results) == 6 and all(payload.loaded for payload in results)
+    assert len({id(payload) for payload in results}) == 1
+
+def test_load_after_redefinition_returns_the_new_payload(tmp_path):
+    stage = make_stage(tmp_path, count=0)
+    release = threading.Event()
+    def loader(path):
+        if path.stem == "old":
+            release.wait(5)
+        return path.stem
+    stage.register_loader(".asset", loader)
+    stage.define_prim("/prim", payload=tmp_path / "old.asset")
+
+    old = []
+    reader = threading.Thread(target=lambda: old.append(stage.load("/prim")))
+    reader.start()
+    while stage.prims["/prim"].payload.pending is None:
+        time.sleep(0.001)
+
+    stage.define_prim("/prim", payload=tmp_path / "new.asset")
+    assert stage.payload_data("/prim") == "new"
+    release.set()
+    reader.join()
+    assert old[0].data == "new" and stage.payload_data("/prim") == "new"
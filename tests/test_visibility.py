@@ -0,0 +1,79 @@
+import numpy as np
+
+from mysticscape.tools import primitives
+from mysticscape.tools.scene_graph import (SceneGraph, frustum_planes, look_at, perspective,
+                                           translation)
+from mysticscape.tools.visibility import LOD_MIN_TRIANGLES, Visibility, decimate, lod_chain
+
+WIDTH, HEIGHT, FOV, FAR = 800, 600, 45.0, 200.0
+EYE = np.array([0.0, 0.0, 30.0])
+
+def view_projection():
+    return perspective(FOV, WIDTH / HEIGHT, 0.1, FAR) @ look_at(EYE, [0, 0, 0], [0, 1, 0])
+
+def make_scene(count=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    vertices, _ = primitives.generate("cube")
+    scene = SceneGraph()
+    for i in range(count):
+        scene.add(f"o{i}", vertices * rng.uniform(0.05, 1.0),
+                  matrix=translation(rng.uniform(-80, 80, 3)))
+    scene.update_world()
+    return scene
+
+def test_lod_chain_gets_coarser():
+    vertices, faces = primitives.generate("sphere", 96, 48)
+    chain = lod_chain(vertices, faces)
+    counts = [len(faces)] + [len(lod_faces) for _, lod_faces in chain]
+    assert len(chain) >= 2 and counts == sorted(counts, reverse=True)
+    for lod_vertices, lod_faces in chain:
+        assert lod_faces.max() < len(lod_vertices)
+        assert (lod_faces[:, 0] != lod_faces[:, 1]).all()
+        # Clustering keeps the shape inside the original bounds
+        assert (lod_vertices.min(axis=0) >= vertices.min(axis=0) - 1e-5).all()
+        assert (lod_vertices.max(axis=0) <= vertices.max(axis=0) + 1e-5).all()
+
+def test_small_meshes_get_no_lods():
+    vertices, faces = primitives.generate("cube")
+    assert len(faces) < LOD_MIN_TRIANGLES and lod_chain(vertices, faces) == []
+
+def test_decimate_merges_vertices():
+    vertices, faces = primitives.generate("sphere", 64, 32)
+    merged, triangles = decimate(vertices, faces, 4)
+    assert len(merged) <= 4 ** 3 and len(triangles) < len(faces)
+
+def test_visible_rows_cover_every_object_in_view():
+    scene = make_scene()
+    visibility = Visibility(scene)
+    visibility.min_screen_size = 0.0
+    rows, levels = visibility.compute(view_projection(), EYE, FOV, HEIGHT, FAR)
+
+    live = scene.live_rows()
+    centers = scene.world_bounds(live).mean(axis=1)
+    planes = frustum_planes(view_projection())
+    inside = (centers @ planes[:, :3].T + planes[:, 3] >= 0).all(axis=1)
+    assert set(live[inside].tolist()) <= set(rows.tolist())
+    assert len(rows) < len(live)
+    assert len(levels) == len(rows) and levels.min() >= 0
+
+def test_levels_grow_with_distance():
+    scene = SceneGraph()
+    vertices, _ = primitives.generate("cube")
+    rows = [scene.add(f"o{distance}", vertices, matrix=translation(EYE - [0.0, 0.0, distance]))
+            for distance in (5.0, 30.0, 90.0, 180.0)]
+    scene.update_world()
+    visible, levels = Visibility(scene).compute(view_projection(), EYE, FOV, HEIGHT, FAR)
+    by_row = dict(zip(visible.tolist(), levels.tolist()))
+    assert [by_row[row] for row in rows] == sorted(by_row[row] for row in rows)
+    assert by_row[rows[0]] == 0 and by_row[rows[-1]] > 0
+
+def test_moved_objects_are_refreshed():
+    scene = SceneGraph()
+    row = scene.add("cube", primitives.generate("cube")[0])
+    scene.update_world()
+    visibility = Visibility(scene)
+    assert row in visibility.compute(view_projection(), EYE, FOV, HEIGHT, FAR)[0]
+
+    scene.set_local(row, translation([0.0, 0.0, 100.0]))
+    visibility.refresh()
+    assert row not in visibility.compute(view_projection(), EYE, FOV, HEIGHT, FAR)[0]
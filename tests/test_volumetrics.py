@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from mysticscape.core.volumetrics import SparseVoxelGrid, cloud_density, sphere_blocks
+
+SIZE = 48
+STEP = 0.05
+SIGMA = 0.05
+
+def make_grid(path=None, dtype=np.float32):
+    grid = SparseVoxelGrid((SIZE, SIZE, SIZE), dtype=dtype, path=path)
+    for center, radius in [((20, 22, 24), 12.0), ((34, 30, 20), 8.0)]:
+        grid.fill(cloud_density(np.asarray(center, dtype=np.float64), radius, frequency=0.4),
+                  sphere_blocks(center, radius, grid))
+    return grid
+
+def all_voxels():
+    return np.indices((SIZE,) * 3).reshape(3, -1).T
+
+def dense(grid):
+    return grid.get_values(all_voxels()).reshape((SIZE,) * 3)
+
+def assert_index_consistent(grid):
+    owners = grid.owners[:grid.count]
+    np.testing.assert_array_equal(grid.index[tuple(owners.T)], np.arange(grid.count))
+    assert np.count_nonzero(grid.index >= 0) == grid.count
+
+def test_prune_compacts_and_keeps_surviving_data():
+    grid = make_grid()
+    # Clear a scattering of blocks so prune has holes to fill from the tail
+    cleared = grid.owners[:grid.count][::3]
+    for block in cleared:
+        grid.pool.data[grid.index[tuple(block)]] = 0.0
+    before = dense(grid)
+    count = grid.count
+
+    removed = grid.prune()
+    assert removed >= len(cleared) and grid.count == count - removed
+    assert_index_consistent(grid)
+    np.testing.assert_array_equal(dense(grid), before)
+    assert grid.prune() == 0
+
+    # Reallocating after a prune starts from zeroed slots
+    grid.set_values(np.array([[0, 0, 0]]), 1.0)
+    assert grid.get_values(np.array([[0, 0, 1]]))[0] == 0.0
+
+@pytest.mark.parametrize("in_place", [False, True])
+def test_save_and_open_round_trip(tmp_path, in_place):
+    grid = make_grid(tmp_path / "grid" if in_place else None, dtype=np.float16)
+    grid.prune()
+    target = tmp_path / "grid" if in_place else tmp_path / "copy"
+    grid.save(target)
+
+    reopened = SparseVoxelGrid.open(target)
+    assert reopened.count == grid.count and reopened.dtype == grid.dtype
+    np.testing.assert_array_equal(reopened.block_data(), grid.block_data())
+    np.testing.assert_array_equal(reopened.index, grid.index)
+    np.testing.assert_array_equal(dense(reopened), dense(grid))
+
+def dense_march(values, origins, directions):
+    """Transmittance by uniform steps through the whole domain, no skipping"""
+    transmittance = np.ones(origins.shape[1])
+    for ray in range(origins.shape[1]):
+        o, d = origins[:, ray], directions[:, ray] / np.linalg.norm(directions[:, ray])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t_lo, t_hi = -o / d, (SIZE - o) / d
+        t_enter = max(np.nanmax(np.fmin(t_lo, t_hi)), 0.0)
+        t_exit = np.nanmin(np.fmax(t_lo, t_hi))
+        ts = np.arange(t_enter, t_exit, STEP)
+        voxel = np.clip(np.floor(o[:, None] + d[:, None] * ts).astype(int), 0, SIZE - 1)
+        transmittance[ray] = np.exp(-SIGMA * STEP * values[tuple(voxel)].sum())
+    return transmittance
+
+def test_march_matches_dense_reference():
+    grid = make_grid()
+    rng = np.random.default_rng(0)
+    count = 200
+    origins = np.stack([rng.uniform(0, SIZE, count), rng.uniform(0, SIZE, count),
+                        np.full(count, SIZE + 10.0)])
+    targets = np.stack([rng.uniform(0, SIZE, count), rng.uniform(0, SIZE, count),
+                        np.full(count, -10.0)])
+    directions = targets - origins
+
+    radiance, transmittance = grid.march(origins, directions, step=STEP, sigma=SIGMA,
+                                         min_transmittance=0.0)
+    expected = dense_march(dense(grid), origins, directions)
+    assert (expected < 0.9).any() and (expected == 1.0).any()
+    np.testing.assert_allclose(transmittance, expected, atol=2e-3)
+    np.testing.assert_allclose(radiance[0], 1.0 - transmittance, atol=1e-9)